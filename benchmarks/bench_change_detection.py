@@ -0,0 +1,111 @@
+"""Benchmark per-event vs vectorized change detection.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_change_detection.py [sizes...]
+
+Each run builds N stored documents and N fetched events of which ~1% differ
+(start moved, description or location changed) and times
+`detect_and_apply_updates` for both engines against an in-memory repository.
+Both sides carry `description_hash` and datetime times, as stored documents
+and filtered feed events do in the service, and each run checks that only
+the real changes are written.
+
+Results on a 1-vCPU Linux container (Python 3.11, NumPy 2.4), 1% real changes:
+
+       events   per-event   vectorized
+       10,000      0.065s       0.025s
+      100,000      0.616s       0.285s
+    1,000,000      6.655s       3.072s
+"""
+from __future__ import annotations
+
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+from flight_controll.event import change_detector, vectorized
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+
+class InMemoryRepo:
+    def __init__(self, docs: List[Dict[str, Any]]):
+        self.docs = docs
+        self.writes = 0
+
+    def find_docs_by_uids(self, uids: List[str]) -> List[Dict[str, Any]]:
+        return self.docs
+
+    def update_one(self, uid: str, set_payload: Dict[str, Any]) -> None:
+        self.writes += 1
+
+    def bulk_update(self, updates: List[Tuple[str, Dict[str, Any]]]) -> None:
+        self.writes += len(updates)
+
+
+def build_dataset(n: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], int]:
+    """Return ``(stored, fetched, changes)`` where `changes` events really differ."""
+    stored, fetched = [], []
+    changes = 0
+    for i in range(n):
+        uid = f"event-{i:08d}@example.com"
+        # ~2000 distinct half-hour slots, like a busy multi-month schedule
+        day, slot = divmod(i % 2000, 40)
+        start = datetime(2099, 1 + day // 28, 1 + day % 28, slot // 2 + 2, 30 * (slot % 2))
+        end = start + timedelta(hours=1)
+        desc = f"Flight {i}\nGate {i % 40}\nDTSTAMP:20250101T120000Z\n"
+        stored.append(
+            {
+                "uid": uid,
+                "summary": f"Flight {i}",
+                "start_time": start,
+                "end_time": end,
+                "description": desc,
+                "description_hash": change_detector.description_hash(desc),
+                "location": "ARN",
+            }
+        )
+        # a new DTSTAMP alone is not a change
+        ev = {
+            "uid": uid,
+            "summary": f"Flight {i}",
+            "dtstart": start,
+            "dtend": end,
+            "description": desc.replace("20250101", "20250102"),
+            "location": "ARN",
+        }
+        if i % 300 == 0:
+            ev["dtstart"] = end
+        elif i % 300 == 100:
+            ev["description"] = desc + "Delayed"
+        elif i % 300 == 200:
+            ev["location"] = "GOT"
+        changes += i % 300 in (0, 100, 200)
+        ev["description_hash"] = change_detector.description_hash(ev["description"])
+        fetched.append(ev)
+    return stored, fetched, changes
+
+
+def run(n: int) -> None:
+    stored, fetched, changes = build_dataset(n)
+    uids = {ev["uid"] for ev in fetched}
+    for name, detect in (
+        ("per-event", change_detector.detect_and_apply_updates),
+        ("vectorized", vectorized.detect_and_apply_updates),
+    ):
+        repo = InMemoryRepo(stored)
+        start = time.perf_counter()
+        updates = detect(fetched, uids, repo)
+        elapsed = time.perf_counter() - start
+        print(f"{n:>9} events  {name:<11} {elapsed:8.3f}s  updates={len(updates)} writes={repo.writes}")
+        if len(updates) != changes or repo.writes != changes:
+            sys.exit(f"{name}: expected {changes} updates and writes")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or list(DEFAULT_SIZES)
+    if not vectorized.numpy_available():
+        sys.exit("numpy is required for the vectorized benchmark")
+    for size in sizes:
+        run(size)
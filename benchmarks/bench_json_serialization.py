@@ -0,0 +1,94 @@
+"""Benchmark JSON serialization of event payloads.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_json_serialization.py [sizes...]
+
+Builds representative response bodies for N events and reports the best-of-5
+time to render them as a Flask JSON response with Flask's default provider,
+with `FastJSONProvider` on orjson and with its stdlib fallback:
+
+- ``fetch``: `POST /events/fetch`, parsed feed events with naive datetimes;
+- ``trigger-check``: `POST /events/trigger-check`, the added events after a
+  run, which also carry their description hash and versioning fields.
+"""
+from __future__ import annotations
+
+import hashlib
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from flight_controll.rest import json_provider
+from flight_controll.rest.json_provider import FastJSONProvider
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+REPEATS = 5
+T0 = datetime(2099, 3, 1, 6, 0)
+
+
+def fetch_payload(n: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "uid": f"flight-{i}@example.com",
+            "summary": f"Flight {i} ARN-GOT",
+            "dtstart": T0 + timedelta(minutes=15 * i),
+            "dtend": T0 + timedelta(minutes=15 * i + 55),
+            "location": "ARN",
+            "description": f"Gate {i % 40}\nCrew & catering confirmed\nAircraft SE-R{i % 26:02d}",
+        }
+        for i in range(n)
+    ]
+
+
+def trigger_check_payload(n: int) -> List[Dict[str, Any]]:
+    events = fetch_payload(n)
+    for i, event in enumerate(events):
+        event["sequence"] = i % 3
+        event["last_modified"] = "20990201T120000Z"
+        event["dtstamp"] = "20990201T120000Z"
+        event["description_hash"] = hashlib.sha1(event["description"].encode("utf-8")).hexdigest()
+    return events
+
+
+def best_of(render: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        render()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(n: int) -> None:
+    app = Flask(__name__)
+    providers = {"default": DefaultJSONProvider(app), "fast": FastJSONProvider(app)}
+    orjson = json_provider.orjson
+    for name, build in (("fetch", fetch_payload), ("trigger-check", trigger_check_payload)):
+        payload = build(n)
+        timings = {}
+        with app.app_context():
+            for label, provider in providers.items():
+                timings[label] = best_of(lambda: provider.response(payload))
+            json_provider.orjson = None
+            try:
+                timings["fast-stdlib"] = best_of(lambda: providers["fast"].response(payload))
+            finally:
+                json_provider.orjson = orjson
+            size = len(providers["fast"].response(payload).get_data())
+        print(
+            f"{name:>13} {n:>7} events  default={timings['default'] * 1000:8.1f} ms  "
+            f"orjson={timings['fast'] * 1000:8.1f} ms  stdlib={timings['fast-stdlib'] * 1000:8.1f} ms  "
+            f"speedup={timings['default'] / timings['fast']:5.1f}x  body={size / 1e6:.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    if not json_provider.orjson_available():
+        print("orjson is not installed; the 'orjson' column measures the stdlib fallback")
+    sizes = [int(arg) for arg in sys.argv[1:]] or list(DEFAULT_SIZES)
+    for size in sizes:
+        run(size)
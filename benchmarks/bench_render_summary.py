@@ -0,0 +1,85 @@
+"""Benchmark summary email rendering.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_render_summary.py [sizes...]
+
+Each run renders a summary for N added events plus N/10 removed and N/10
+updated events and reports the best-of-5 wall time, the peak traced memory
+and the size of the plain and HTML bodies.
+"""
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Tuple
+
+from flight_controll.event.renderer import render_summary
+
+DEFAULT_SIZES = (1_000, 10_000)
+REPEATS = 5
+
+
+def build_changes(n: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    added = [
+        {
+            "uid": f"added-{i}",
+            "summary": f"Flight {i} <ARN-GOT>",
+            "dtstart": "2099-03-01T10:00:00",
+            "dtend": "2099-03-01T11:00:00",
+            "description": f"Gate {i % 40}\nCrew & catering confirmed\n",
+            "location": "ARN",
+        }
+        for i in range(n)
+    ]
+    removed = [
+        {
+            "uid": f"removed-{i}",
+            "summary": f"Flight {i}",
+            "start_time": "2099-03-02T10:00:00",
+            "end_time": "2099-03-02T11:00:00",
+            "description": "Cancelled",
+            "location": "GOT",
+        }
+        for i in range(n // 10)
+    ]
+    updated = [
+        {
+            "uid": f"updated-{i}",
+            "summary": f"Flight {i}",
+            "old_start": "2099-03-03T10:00:00+00:00",
+            "new_start": "2099-03-03T12:00:00+00:00",
+            "old_end": "2099-03-03T11:00:00+00:00",
+            "new_end": "2099-03-03T13:00:00+00:00",
+            "old_description": "Gate 1",
+            "new_description": "Gate 1",
+            "old_location": "ARN",
+            "new_location": "ARN",
+            "changed_fields": ["start", "end"],
+        }
+        for i in range(n // 10)
+    ]
+    return added, removed, updated
+
+
+def run(n: int) -> None:
+    added, removed, updated = build_changes(n)
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        plain, html = render_summary(added, removed, updated)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    render_summary(added, removed, updated)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(
+        f"{n:>7} events  {best * 1000:8.1f} ms  peak={peak / 1e6:6.1f} MB  "
+        f"plain={len(plain) / 1e6:.1f} MB  html={len(html) / 1e6:.1f} MB"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or list(DEFAULT_SIZES)
+    for size in sizes:
+        run(size)
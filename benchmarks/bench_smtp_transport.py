@@ -0,0 +1,67 @@
+"""Benchmark per-message SMTP connections vs the pooled `SMTPTransport`.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_smtp_transport.py [messages]
+
+Starts a local `aiosmtpd` sink (no TLS, no auth) as a stand-in relay and
+sends the same number of messages through `MailService` with and without a
+shared transport.
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.handlers import Sink
+
+from flight_controll.mail.sender import MailService
+from flight_controll.mail.transport import SMTPTransport
+
+HOST = "127.0.0.1"
+PORT = 8025
+DEFAULT_MESSAGES = 200
+
+
+class PlainMailService(MailService):
+    """MailService without STARTTLS/LOGIN for the unauthenticated local sink."""
+
+    def _send_once(self, msg):
+        import smtplib
+
+        with smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.timeout) as server:
+            server.send_message(msg)
+
+
+def run(messages: int) -> None:
+    body = "Events Update:\n\n" + "Summary: Flight\n" * 50
+    html_body = f"<html><body><pre>{body}</pre></body></html>"
+
+    per_message = PlainMailService(HOST, PORT, "bench@example.com", None, max_retries=1)
+    start = time.perf_counter()
+    for i in range(messages):
+        per_message.send_email("r@example.com", f"Update {i}", body, html_body=html_body)
+    elapsed = time.perf_counter() - start
+    print(f"per-message connections: {messages} msgs in {elapsed:.3f}s ({messages / elapsed:.0f} msg/s)")
+
+    transport = SMTPTransport(HOST, PORT, "bench@example.com", None, use_tls=False)
+    pooled = MailService(HOST, PORT, "bench@example.com", None, max_retries=1, transport=transport)
+    start = time.perf_counter()
+    for i in range(messages):
+        pooled.send_email("r@example.com", f"Update {i}", body, html_body=html_body)
+    elapsed = time.perf_counter() - start
+    transport.close()
+    print(
+        f"pooled transport:        {messages} msgs in {elapsed:.3f}s ({messages / elapsed:.0f} msg/s), "
+        f"connections={transport.connects}"
+    )
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MESSAGES
+    controller = Controller(Sink(), hostname=HOST, port=PORT)
+    controller.start()
+    try:
+        run(count)
+    finally:
+        controller.stop()
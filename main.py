@@ -1,28 +1,8 @@
-import logging
-import sys
-
 from flight_controll import create_app
+from flight_controll.serving import setup_logging
 
-
-def setup_logging(app):
-    """Configure logging for the Flask app and root logger (handler, formatter, level)."""
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setLevel(logging.INFO)
-    formatter = logging.Formatter(
-        "[%(asctime)s] [%(levelname)s] %(name)s - %(message)s"
-    )
-    handler.setFormatter(formatter)
-
-    app.logger.handlers = []
-    app.logger.addHandler(handler)
-    app.logger.setLevel(logging.INFO)
-
-    root_logger = logging.getLogger()
-    root_logger.handlers = []
-    root_logger.addHandler(handler)
-    root_logger.setLevel(logging.INFO)
-
-
+# development server: API and scheduler in one process. In production run
+# `gunicorn -c gunicorn.conf.py wsgi:app` and `python -m flight_controll.scheduler`.
 app = create_app()
 setup_logging(app)
 
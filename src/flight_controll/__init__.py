@@ -2,8 +2,13 @@ from flask import Flask
 from typing import Optional
 
 from .config import Config
+from .event.ics import CalendarRenderer
 from .rest import register_blueprints
+from .rest.cache import ResponseCache
+from .rest.jobs import JobRegistry
+from .rest.json_provider import FastJSONProvider
 from .scheduler.scheduler import init_scheduler
+from .scheduler.single_flight import SingleFlight
 from .extensions import init_extensions
 
 
@@ -21,6 +26,8 @@ def create_app(
             is used.
     """
     app = Flask(__name__)
+    # orjson-backed, ISO-8601 datetimes (see rest/json_provider.py)
+    app.json = FastJSONProvider(app)
 
     cfg = config_object or Config
     app.config.from_object(cfg)
@@ -31,9 +38,32 @@ def create_app(
     else:
         app.app_config = cfg
 
+    # one coordinator shared by the scheduler and the manual trigger endpoint
+    app.extensions["single_flight"] = SingleFlight()
+    fetch_cache_ttl = getattr(app.app_config, "FETCH_CACHE_TTL_SECONDS", 0)
+    if fetch_cache_ttl:
+        # answers repeated `POST /events/fetch` while feed and stored events are unchanged
+        app.extensions["fetch_cache"] = ResponseCache(
+            ttl_seconds=fetch_cache_ttl,
+            max_entries=getattr(app.app_config, "FETCH_CACHE_MAX_ENTRIES", 32),
+            fresh_seconds=getattr(app.app_config, "FETCH_CACHE_FRESH_SECONDS", 10),
+        )
+
+    # `GET /events/calendar.ics`: per-event VEVENT blocks and rendered bodies by ETag
+    app.extensions["calendar_renderer"] = CalendarRenderer()
+    app.extensions["calendar_cache"] = ResponseCache(ttl_seconds=3600, max_entries=4)
+
     # initialize long-lived extensions (Mongo client, collections, etc.)
     init_extensions(app)
 
+    # background executor for `POST /events/trigger-check` in async mode; job
+    # states go to Mongo when configured so any worker can answer a poll
+    app.extensions["job_registry"] = JobRegistry(
+        max_workers=getattr(app.app_config, "API_JOB_WORKERS", 2),
+        history=getattr(app.app_config, "API_JOB_HISTORY", 100),
+        collection=app.extensions.get("jobs_collection"),
+    )
+
     register_blueprints(app)
 
     # determine whether to run scheduler (explicit override wins)
@@ -1,8 +1,15 @@
 """Application configuration from environment variables.
 
 Main env vars: SCHEDULER_ENABLED, SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD,
-RECIPIENT_EMAIL, WEB_CAL_URL, WEBCAL_SCHEDULER_DELAY_MINUTES, MONGO_HOST, MONGO_DB,
-MONGO_COLLECTION, MONGO_USERNAME, MONGO_PASSWORD.
+RECIPIENT_EMAIL, SMTP_POOL_SIZE, SMTP_USE_TLS, SMTP_HEALTH_CHECK_SECONDS,
+MAIL_QUEUE_ENABLED, MAIL_QUEUE_MAXSIZE, MAIL_OUTBOX_DIR, MAIL_OUTBOX_MAX_ATTEMPTS,
+WEB_CAL_URL, WEBCAL_SCHEDULER_DELAY_MINUTES, WEBCAL_FEEDS, MONGO_HOST, MONGO_DB,
+MONGO_COLLECTION, MONGO_USERNAME, MONGO_PASSWORD, CHANGE_DETECTION_ENGINE,
+DIFF_BATCH_SIZE, PIPELINE_QUEUE_DEPTH, DIGEST_WINDOW_MINUTES, PRIORITY_HORIZON_HOURS,
+SUMMARY_BODY_BUDGET_CHARS, RECIPIENT_SUBSCRIPTIONS, MAIL_FANOUT_WORKERS,
+WEBCAL_SCHEDULER_MODE, WEBCAL_MIN_INTERVAL_SECONDS, WEBCAL_MAX_INTERVAL_SECONDS,
+LEADER_ELECTION_ENABLED, LEADER_LEASE_SECONDS, CHECK_LOCK_SECONDS,
+CHECK_LOCK_WAIT_SECONDS, TRIGGER_CHECK_ASYNC, API_JOB_WORKERS, FETCH_CACHE_TTL_SECONDS.
 """
 import os
 
@@ -20,15 +27,89 @@ class Config:
     SMTP_USERNAME = os.environ.get("SMTP_USERNAME")
     SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD")
     RECIPIENT_EMAIL = os.environ.get("RECIPIENT_EMAIL")
+    # JSON list of {"email", "locations", "summary_pattern", "horizon_hours"}; when set it
+    # replaces RECIPIENT_EMAIL (see event/subscriptions.py)
+    RECIPIENT_SUBSCRIPTIONS = os.environ.get("RECIPIENT_SUBSCRIPTIONS")
+    # concurrent sends when a summary fans out to several recipients (capped at SMTP_POOL_SIZE)
+    MAIL_FANOUT_WORKERS: int = int(os.environ.get("MAIL_FANOUT_WORKERS", 4))
+    SMTP_POOL_SIZE: int = int(os.environ.get("SMTP_POOL_SIZE", 1))
+    SMTP_USE_TLS = str_to_bool(os.environ.get("SMTP_USE_TLS", "True"))
+    SMTP_HEALTH_CHECK_SECONDS: float = float(os.environ.get("SMTP_HEALTH_CHECK_SECONDS", 30))
+
+    # send summary emails from a background worker instead of the tick/request thread
+    MAIL_QUEUE_ENABLED = str_to_bool(os.environ.get("MAIL_QUEUE_ENABLED", "False"))
+    MAIL_QUEUE_MAXSIZE: int = int(os.environ.get("MAIL_QUEUE_MAXSIZE", 100))
+    MAIL_QUEUE_ENQUEUE_TIMEOUT_SECONDS: float = float(
+        os.environ.get("MAIL_QUEUE_ENQUEUE_TIMEOUT_SECONDS", 0)
+    )
+    MAIL_QUEUE_SHUTDOWN_TIMEOUT_SECONDS: float = float(
+        os.environ.get("MAIL_QUEUE_SHUTDOWN_TIMEOUT_SECONDS", 30)
+    )
+
+    # spool every summary to disk before sending and retry with backoff; unset disables
+    MAIL_OUTBOX_DIR = os.environ.get("MAIL_OUTBOX_DIR")
+    MAIL_OUTBOX_BASE_DELAY_SECONDS: float = float(os.environ.get("MAIL_OUTBOX_BASE_DELAY_SECONDS", 30))
+    MAIL_OUTBOX_MAX_DELAY_SECONDS: float = float(os.environ.get("MAIL_OUTBOX_MAX_DELAY_SECONDS", 3600))
+    MAIL_OUTBOX_MAX_ATTEMPTS: int = int(os.environ.get("MAIL_OUTBOX_MAX_ATTEMPTS", 10))
+    MAIL_OUTBOX_DRAIN_SECONDS: int = int(os.environ.get("MAIL_OUTBOX_DRAIN_SECONDS", 60))
 
     WEB_CAL_URL = os.environ.get("WEB_CAL_URL")
     WEBCAL_SCHEDULER_DELAY_MINUTES: int = int(
         os.environ.get("WEBCAL_SCHEDULER_DELAY_MINUTES", 15)
     )
+    # JSON list of {"name", "url", "interval_minutes", "collection"}; when set it
+    # replaces WEB_CAL_URL with one staggered job per feed (see scheduler/feeds.py)
+    WEBCAL_FEEDS = os.environ.get("WEBCAL_FEEDS")
+    # "fixed" polls every WEBCAL_SCHEDULER_DELAY_MINUTES; "adaptive" shortens the
+    # interval after changes, backs off while unchanged and honours Cache-Control
+    # max-age / Retry-After, within the min/max bounds below
+    WEBCAL_SCHEDULER_MODE = os.environ.get("WEBCAL_SCHEDULER_MODE", "fixed")
+    WEBCAL_MIN_INTERVAL_SECONDS: float = float(os.environ.get("WEBCAL_MIN_INTERVAL_SECONDS", 60))
+    WEBCAL_MAX_INTERVAL_SECONDS: float = float(os.environ.get("WEBCAL_MAX_INTERVAL_SECONDS", 3600))
+    WEBCAL_BACKOFF_FACTOR: float = float(os.environ.get("WEBCAL_BACKOFF_FACTOR", 2))
+    # with several replicas, only the holder of a Mongo lease runs webcal_check;
+    # keep LEADER_LEASE_SECONDS + skew below the check interval for fast failover
+    LEADER_ELECTION_ENABLED = str_to_bool(os.environ.get("LEADER_ELECTION_ENABLED", "False"))
+    LEADER_LEASE_SECONDS: float = float(os.environ.get("LEADER_LEASE_SECONDS", 30))
+    LEADER_MAX_CLOCK_SKEW_SECONDS: float = float(os.environ.get("LEADER_MAX_CLOCK_SKEW_SECONDS", 5))
+    # every check run holds a Mongo lock so a manual trigger-check in a web worker
+    # and a scheduled tick never overlap; a trigger waits CHECK_LOCK_WAIT_SECONDS
+    # for a running check before answering 409
+    CHECK_LOCK_SECONDS: float = float(os.environ.get("CHECK_LOCK_SECONDS", 60))
+    CHECK_LOCK_WAIT_SECONDS: float = float(os.environ.get("CHECK_LOCK_WAIT_SECONDS", 60))
+
+    # POST /events/trigger-check answers 202 with a job id by default instead of
+    # only when the client sends `Prefer: respond-async` or `?async=true`
+    TRIGGER_CHECK_ASYNC = str_to_bool(os.environ.get("TRIGGER_CHECK_ASYNC", "False"))
+    API_JOB_WORKERS: int = int(os.environ.get("API_JOB_WORKERS", 2))
+    API_JOB_HISTORY: int = int(os.environ.get("API_JOB_HISTORY", 100))
+    # POST /events/fetch responses are cached per feed name, feed validator and
+    # stored-state version for FETCH_CACHE_TTL_SECONDS (0 disables); within
+    # FETCH_CACHE_FRESH_SECONDS of the last check they are served without revalidating
+    FETCH_CACHE_TTL_SECONDS: float = float(os.environ.get("FETCH_CACHE_TTL_SECONDS", 300))
+    FETCH_CACHE_FRESH_SECONDS: float = float(os.environ.get("FETCH_CACHE_FRESH_SECONDS", 10))
+    FETCH_CACHE_MAX_ENTRIES: int = int(os.environ.get("FETCH_CACHE_MAX_ENTRIES", 32))
 
     MONGO_HOST = os.environ.get("MONGO_HOST")
     MONGO_DB = os.environ.get("MONGO_DB")
     MONGO_COLLECTION = os.environ.get("MONGO_COLLECTION")
     MONGO_USERNAME = os.environ.get("MONGO_USERNAME")
     MONGO_PASSWORD = os.environ.get("MONGO_PASSWORD")
-    
\ No newline at end of file
+
+    # "standard" (set lookups), "streaming" (sorted-merge diff, constant memory)
+    # or "vectorized" (NumPy changed mask, falls back to standard without numpy)
+    CHANGE_DETECTION_ENGINE = os.environ.get("CHANGE_DETECTION_ENGINE", "standard")
+    DIFF_BATCH_SIZE: int = int(os.environ.get("DIFF_BATCH_SIZE", 500))
+    # batches of DIFF_BATCH_SIZE buffered between pipeline stages (see event/pipeline.py)
+    PIPELINE_QUEUE_DEPTH: int = int(os.environ.get("PIPELINE_QUEUE_DEPTH", 8))
+
+    # coalesce changes across ticks into one summary per window, buffered per feed
+    # in <feed collection>_digest; 0 sends every tick
+    DIGEST_WINDOW_MINUTES: int = int(os.environ.get("DIGEST_WINDOW_MINUTES", 0))
+
+    # removals/updates of events starting within this many hours are mailed at once
+    PRIORITY_HORIZON_HOURS: float = float(os.environ.get("PRIORITY_HORIZON_HOURS", 0))
+
+    # past this combined body size the summary is truncated and the full change set
+    # is attached as changes.csv.gz; 0 disables the cap
+    SUMMARY_BODY_BUDGET_CHARS: int = int(os.environ.get("SUMMARY_BODY_BUDGET_CHARS", 2_000_000))
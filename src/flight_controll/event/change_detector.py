@@ -1,17 +1,84 @@
 from __future__ import annotations
 
+import hashlib
 import re
-from typing import Any, Dict, List, Optional, Set
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from . import repository, utils
 
+_DTSTAMP_RE = re.compile(r"DTSTAMP:[^\n]*\n?")
+
+# Memoizes the fetch-time hash of repeated raw descriptions. Change detection
+# compares against the `description_hash` stored on each document, so it does
+# not depend on hits here once a calendar outgrows the cache.
+DESCRIPTION_HASH_CACHE_SIZE = 16384
+
 
 def normalize_dtstamp(text: Optional[str]) -> str:
     """Normalize an event description by removing DTSTAMP lines."""
     if text is None:
         return ""
-    new_text = re.sub(r"DTSTAMP:[^\n]*\n?", "", text)
-    return new_text.strip()
+    if "DTSTAMP:" not in text:
+        return text.strip()
+    return _DTSTAMP_RE.sub("", text).strip()
+
+
+@lru_cache(maxsize=DESCRIPTION_HASH_CACHE_SIZE)
+def _description_hash(text: str) -> str:
+    return hashlib.sha1(normalize_dtstamp(text).encode("utf-8")).hexdigest()
+
+
+def description_hash(text: Optional[str]) -> str:
+    """Return a stable hash of the DTSTAMP-normalized description.
+
+    The hash is attached to each fetched event and stored on its document as
+    `description_hash`, so comparisons never re-normalize stored descriptions.
+    """
+    return _description_hash(text or "")
+
+
+FIELD_START = "start"
+FIELD_END = "end"
+FIELD_DESCRIPTION = "description"
+FIELD_LOCATION = "location"
+FIELD_SUMMARY = "summary"
+
+
+def changed_fields(
+    old_start: Optional[Any],
+    old_end: Optional[Any],
+    new_start: Optional[Any],
+    new_end: Optional[Any],
+    old_desc: Optional[str],
+    new_desc: Optional[str],
+    old_loc: Optional[str],
+    new_loc: Optional[str],
+    old_desc_hash: Optional[str] = None,
+    new_desc_hash: Optional[str] = None,
+) -> List[str]:
+    """Return the names of the compared fields that differ.
+
+    Descriptions are compared after DTSTAMP normalization, using the
+    precomputed `description_hash` values when both are given, and locations
+    treat None and "" as equal. The result is ordered start, end, description,
+    location.
+    """
+    fields: List[str] = []
+    if old_start != new_start:
+        fields.append(FIELD_START)
+    if old_end != new_end:
+        fields.append(FIELD_END)
+    if old_desc_hash is not None and new_desc_hash is not None:
+        desc_changed = old_desc_hash != new_desc_hash
+    else:
+        desc_changed = normalize_dtstamp(old_desc) != normalize_dtstamp(new_desc)
+    if desc_changed:
+        fields.append(FIELD_DESCRIPTION)
+    if (old_loc or "") != (new_loc or ""):
+        fields.append(FIELD_LOCATION)
+    return fields
 
 
 def event_changed(
@@ -23,20 +90,142 @@ def event_changed(
     new_desc: Optional[str],
     old_loc: Optional[str],
     new_loc: Optional[str],
+    old_desc_hash: Optional[str] = None,
+    new_desc_hash: Optional[str] = None,
 ) -> bool:
-    if (old_start is None) != (new_start is None):
-        return True
-    if old_start is not None and new_start is not None and old_start != new_start:
-        return True
-    if (old_end is None) != (new_end is None):
-        return True
-    if old_end is not None and new_end is not None and old_end != new_end:
-        return True
-    if normalize_dtstamp(old_desc) != normalize_dtstamp(new_desc):
-        return True
-    if (old_loc or "") != (new_loc or ""):
-        return True
-    return False
+    return bool(
+        changed_fields(
+            old_start,
+            old_end,
+            new_start,
+            new_end,
+            old_desc,
+            new_desc,
+            old_loc,
+            new_loc,
+            old_desc_hash,
+            new_desc_hash,
+        )
+    )
+
+
+def version_key(row: Dict[str, Any]) -> Optional[Tuple[Any, Any]]:
+    """Return the (SEQUENCE, LAST-MODIFIED) pair, or None without LAST-MODIFIED.
+
+    SEQUENCE alone is not a version: many providers emit a constant
+    ``SEQUENCE:0``, and RFC 5545 does not require a bump for every edit.
+    """
+    last_modified = row.get("last_modified")
+    if last_modified is None:
+        return None
+    return row.get("sequence"), last_modified
+
+
+def version_unchanged(ev: Dict[str, Any], stored: Dict[str, Any]) -> bool:
+    """Return True if the feed reports the same event version as the stored doc.
+
+    LAST-MODIFIED moves whenever an event is edited, so an identical pair
+    means the field comparison can be skipped. Unless both sides carry
+    LAST-MODIFIED this is always False and the fields are compared.
+    """
+    key = version_key(ev)
+    return key is not None and key == version_key(stored)
+
+
+def build_update(
+    ev: Dict[str, Any], stored: Dict[str, Any]
+) -> Optional[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+    """Compare a fetched event with its stored document.
+
+    Args:
+        ev: event dict as returned by the fetcher.
+        stored: the stored document with the same uid.
+
+    Returns:
+        ``None`` when the event is unchanged, otherwise a ``(set_payload,
+        record)`` pair. ``set_payload`` is the minimal ``$set`` document: only
+        the changed fields plus a refreshed ``updated_at``. ``record`` is the
+        update record used in the summary email; its ``changed_fields`` list
+        carries the same per-field change mask. ``record`` is None when only
+        the version markers moved without any visible change, in which case
+        the payload just refreshes them so the next tick can skip the event.
+        Legacy documents without a stored `description_hash` get it backfilled
+        in the same payload, even when nothing else changed. Times are written
+        as datetimes, like on insert, so date-range queries keep matching.
+    """
+    if version_unchanged(ev, stored):
+        return None
+
+    uid = ev.get("uid")
+    old_start = utils.parse_dt(stored.get("start_time") or stored.get("dtstart"))
+    old_end = utils.parse_dt(stored.get("end_time") or stored.get("dtend"))
+    new_start = utils.parse_dt(ev.get("dtstart") or ev.get("start_time"))
+    new_end = utils.parse_dt(ev.get("dtend") or ev.get("end_time"))
+    old_desc = stored.get("description")
+    new_desc = ev.get("description")
+    old_loc = stored.get("location")
+    new_loc = ev.get("location")
+    stored_hash = stored.get("description_hash")
+    # legacy documents without a stored hash are hashed once and backfilled below
+    old_desc_hash = stored_hash or description_hash(old_desc)
+    new_desc_hash = ev.get("description_hash") or description_hash(new_desc)
+
+    fields = changed_fields(
+        old_start,
+        old_end,
+        new_start,
+        new_end,
+        old_desc,
+        new_desc,
+        old_loc,
+        new_loc,
+        old_desc_hash,
+        new_desc_hash,
+    )
+    set_payload: Dict[str, Any] = {
+        k: ev[k] for k in ("sequence", "last_modified") if k in ev and ev[k] != stored.get(k)
+    }
+    versions_moved = bool(set_payload)
+    if FIELD_DESCRIPTION in fields or not stored_hash:
+        set_payload["description_hash"] = new_desc_hash
+    if not fields:
+        if not set_payload:
+            return None
+        # a hash backfill alone is not a visible change
+        if versions_moved:
+            set_payload["updated_at"] = datetime.now(timezone.utc).isoformat()
+        return set_payload, None
+
+    if "dtstamp" in ev:
+        set_payload["dtstamp"] = ev["dtstamp"]
+    if FIELD_START in fields and new_start is not None:
+        set_payload["start_time"] = new_start
+    if FIELD_END in fields and new_end is not None:
+        set_payload["end_time"] = new_end
+    if FIELD_DESCRIPTION in fields and "description" in ev:
+        set_payload["description"] = new_desc
+    if FIELD_LOCATION in fields and "location" in ev:
+        set_payload["location"] = new_loc
+    # summary alone never triggers an update, but is refreshed alongside one
+    if "summary" in ev and ev["summary"] != stored.get("summary"):
+        set_payload["summary"] = ev["summary"]
+        fields.append(FIELD_SUMMARY)
+    set_payload["updated_at"] = datetime.now(timezone.utc).isoformat()
+
+    record = {
+        "uid": uid,
+        "summary": ev.get("summary", stored.get("summary")),
+        "old_description": old_desc,
+        "new_description": new_desc,
+        "old_location": old_loc,
+        "new_location": new_loc,
+        "old_start": old_start.isoformat() if old_start is not None else None,
+        "old_end": old_end.isoformat() if old_end is not None else None,
+        "new_start": new_start.isoformat() if new_start is not None else None,
+        "new_end": new_end.isoformat() if new_end is not None else None,
+        "changed_fields": fields,
+    }
+    return set_payload, record
 
 
 def detect_and_apply_updates(
@@ -53,59 +242,30 @@ def detect_and_apply_updates(
         uid = ev.get("uid")
         if uid not in stored_by_uid:
             continue
-        stored = stored_by_uid[uid]
-
-        old_start = utils.parse_dt(stored.get("start_time") or stored.get("dtstart"))
-        old_end = utils.parse_dt(stored.get("end_time") or stored.get("dtend"))
-        new_start = utils.parse_dt(ev.get("dtstart") or ev.get("start_time"))
-        new_end = utils.parse_dt(ev.get("dtend") or ev.get("end_time"))
-        old_desc = stored.get("description")
-        new_desc = ev.get("description")
-        old_loc = stored.get("location")
-        new_loc = ev.get("location")
-
-        if not event_changed(
-            old_start,
-            old_end,
-            new_start,
-            new_end,
-            old_desc,
-            new_desc,
-            old_loc,
-            new_loc,
-        ):
-            continue
 
-        set_payload: Dict[str, Any] = {}
-        if new_start is not None:
-            set_payload["start_time"] = new_start.isoformat()
-        if new_end is not None:
-            set_payload["end_time"] = new_end.isoformat()
-        for k in ("summary", "description", "location"):
-            if k in ev:
-                set_payload[k] = ev[k]
+        change = build_update(ev, stored_by_uid[uid])
+        if change is None:
+            continue
 
+        set_payload, record = change
         if set_payload:
             repo.update_one(uid, set_payload)
-
-        updates.append(
-            {
-                "uid": uid,
-                "summary": ev.get("summary", stored.get("summary")),
-                "old_description": old_desc,
-                "new_description": new_desc,
-                "old_location": old_loc,
-                "new_location": new_loc,
-                "old_start": old_start.isoformat() if old_start is not None else None,
-                "old_end": old_end.isoformat() if old_end is not None else None,
-                "new_start": new_start.isoformat() if new_start is not None else None,
-                "new_end": new_end.isoformat() if new_end is not None else None,
-            }
-        )
+        if record is not None:
+            updates.append(record)
 
     return updates
 
 
+def is_removable(doc: Dict[str, Any]) -> bool:
+    """Return True if a stored doc that vanished from the feed should be removed.
+
+    Only events starting in the future, or within the removal window, are
+    removed and reported; older events are left untouched.
+    """
+    st = utils.parse_dt(doc.get("start_time") or doc.get("dtstart"))
+    return st is not None and utils.is_within_removal_window(st)
+
+
 def fetch_removed_events(
     existing_all: Set[str], fetched_uids: Set[str], repo: repository.EventRepository
 ) -> List[Dict[str, Any]]:
@@ -116,8 +276,7 @@ def fetch_removed_events(
     stored = repo.find_docs_by_uids(removed_uids)
     future_docs: List[Dict[str, Any]] = []
     for doc in stored:
-        st = utils.parse_dt(doc.get("start_time") or doc.get("dtstart"))
-        if st is not None and utils.is_within_removal_window(st):
+        if is_removable(doc):
             future_docs.append(doc)
 
     if future_docs:
@@ -0,0 +1,199 @@
+"""Digest buffer that coalesces change records across scheduler ticks.
+
+With a digest window configured, each tick's added/removed/updated records
+are merged into a persistent per-uid buffer instead of being emailed
+immediately. Repeated changes to the same uid collapse into their net effect:
+
+- added then removed cancels out;
+- added then updated stays an addition carrying the latest values;
+- removed then added becomes an update (or nothing, if it came back as it was);
+- several updates keep the first old values and the last new values, and
+  cancel out when the event ends up where it started.
+
+The buffer is flushed as one consolidated summary once its oldest entry is
+older than the window.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import utils
+from .change_detector import FIELD_SUMMARY, changed_fields
+from .streaming_diff import ADDED, REMOVED, UPDATED
+
+logger = logging.getLogger(__name__)
+
+Entry = Tuple[str, Dict[str, Any]]
+
+
+def _view(kind: str, record: Dict[str, Any], side: str = "new") -> Dict[str, Any]:
+    """Return the event state a record describes as start/end/description/location."""
+    if kind == UPDATED:
+        return {
+            "summary": record.get("summary"),
+            "start": record.get(f"{side}_start"),
+            "end": record.get(f"{side}_end"),
+            "description": record.get(f"{side}_description"),
+            "location": record.get(f"{side}_location"),
+        }
+    return {
+        "summary": record.get("summary"),
+        "start": record.get("dtstart") or record.get("start_time"),
+        "end": record.get("dtend") or record.get("end_time"),
+        "description": record.get("description"),
+        "location": record.get("location"),
+    }
+
+
+def _iso(value: Any) -> Optional[str]:
+    dt = utils.parse_dt(value)
+    return dt.isoformat() if dt is not None else None
+
+
+def _updated_between(uid: str, old: Dict[str, Any], new: Dict[str, Any]) -> Optional[Entry]:
+    """Build an update record from two event states; None if nothing differs."""
+    fields = changed_fields(
+        utils.parse_dt(old["start"]),
+        utils.parse_dt(old["end"]),
+        utils.parse_dt(new["start"]),
+        utils.parse_dt(new["end"]),
+        old["description"],
+        new["description"],
+        old["location"],
+        new["location"],
+    )
+    if old["summary"] != new["summary"]:
+        fields.append(FIELD_SUMMARY)
+    if not fields:
+        return None
+    return UPDATED, {
+        "uid": uid,
+        "summary": new["summary"],
+        "old_description": old["description"],
+        "new_description": new["description"],
+        "old_location": old["location"],
+        "new_location": new["location"],
+        "old_start": _iso(old["start"]),
+        "old_end": _iso(old["end"]),
+        "new_start": _iso(new["start"]),
+        "new_end": _iso(new["end"]),
+        "changed_fields": fields,
+    }
+
+
+def coalesce(previous: Optional[Entry], kind: str, record: Dict[str, Any]) -> Optional[Entry]:
+    """Merge a new change into the buffered entry for the same uid.
+
+    Args:
+        previous: the buffered ``(kind, record)`` entry, or None.
+        kind: one of ``"added"``, ``"removed"`` or ``"updated"``.
+        record: the change record as produced by change detection.
+
+    Returns:
+        The net ``(kind, record)`` entry, or None when the changes cancel out.
+    """
+    if previous is None:
+        return kind, record
+    prev_kind, prev_record = previous
+    uid = record.get("uid", prev_record.get("uid"))
+
+    if prev_kind == ADDED:
+        if kind == REMOVED:
+            return None
+        if kind == UPDATED:
+            latest = _view(UPDATED, record)
+            merged = dict(prev_record)
+            merged.update(
+                {
+                    "summary": latest["summary"],
+                    "dtstart": latest["start"],
+                    "dtend": latest["end"],
+                    "description": latest["description"],
+                    "location": latest["location"],
+                }
+            )
+            return ADDED, merged
+        return kind, record
+
+    if prev_kind == REMOVED and kind == ADDED:
+        return _updated_between(uid, _view(REMOVED, prev_record), _view(ADDED, record))
+
+    if prev_kind == UPDATED and kind == UPDATED:
+        return _updated_between(uid, _view(UPDATED, prev_record, "old"), _view(UPDATED, record))
+
+    return kind, record
+
+
+class DigestBuffer:
+    """Persistent per-uid buffer of coalesced change records.
+
+    Args:
+        collection: a pymongo Collection-like object holding one document per
+            uid: ``{uid, kind, record, first_seen, last_seen}``.
+        clock: wall-clock function returning epoch seconds, injectable for tests.
+    """
+
+    def __init__(self, collection: object, clock: Callable[[], float] = time.time):
+        self.collection = collection
+        self.clock = clock
+
+    def add(
+        self,
+        added: List[Dict[str, Any]],
+        removed: List[Dict[str, Any]],
+        updated: List[Dict[str, Any]],
+    ) -> None:
+        """Merge one tick's changes into the buffer."""
+        changes = [(ADDED, r) for r in added] + [(REMOVED, r) for r in removed] + [
+            (UPDATED, r) for r in updated
+        ]
+        if not changes:
+            return
+        now = self.clock()
+        for kind, record in changes:
+            record = {k: v for k, v in record.items() if k != "_id"}
+            uid = record["uid"]
+            doc = self.collection.find_one({"uid": uid})
+            previous = (doc["kind"], doc["record"]) if doc else None
+            merged = coalesce(previous, kind, record)
+            if merged is None:
+                self.collection.delete_one({"uid": uid})
+                continue
+            self.collection.replace_one(
+                {"uid": uid},
+                {
+                    "uid": uid,
+                    "kind": merged[0],
+                    "record": merged[1],
+                    "first_seen": doc["first_seen"] if doc else now,
+                    "last_seen": now,
+                },
+                upsert=True,
+            )
+
+    def _entries(self) -> List[Dict[str, Any]]:
+        return sorted(self.collection.find({}), key=lambda d: d["first_seen"])
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+    def is_due(self, window_seconds: float) -> bool:
+        """Return True when the oldest buffered change is at least `window_seconds` old."""
+        entries = self._entries()
+        return bool(entries) and self.clock() - entries[0]["first_seen"] >= window_seconds
+
+    def pending(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]], List[str]]:
+        """Return the buffered ``(added, removed, updated, uids)`` in first-seen order."""
+        changes: Dict[str, List[Dict[str, Any]]] = {ADDED: [], REMOVED: [], UPDATED: []}
+        uids: List[str] = []
+        for doc in self._entries():
+            changes[doc["kind"]].append(doc["record"])
+            uids.append(doc["uid"])
+        return changes[ADDED], changes[REMOVED], changes[UPDATED], uids
+
+    def clear(self, uids: List[str]) -> None:
+        """Drop the given uids once their digest has been sent."""
+        if uids:
+            self.collection.delete_many({"uid": {"$in": uids}})
@@ -1,9 +1,17 @@
 import logging
-from typing import List, Dict, Any, Optional, Set
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime
+import itertools
 import time
-from . import repository, notifier, utils
-from .change_detector import detect_and_apply_updates, fetch_removed_events, normalize_dtstamp
+import uuid
+from . import repository, notifier, pipeline, utils, vectorized
+from .digest import DigestBuffer
+from .change_detector import (
+    description_hash,
+    detect_and_apply_updates,
+    fetch_removed_events,
+    normalize_dtstamp,
+)
 
 from pymongo import MongoClient
 from ..webcal.fetcher import WebcalFetcher
@@ -30,11 +38,13 @@ class EventService:
         mongo_client: Optional[MongoClient] = None,
         events_collection: Optional[object] = None,
         repo: Optional[repository.EventRepository] = None,
+        digest_collection: Optional[object] = None,
     ):
         self.logger = logging.getLogger(__name__)
         self.config = config
         self.email_sender_cls = email_sender_cls
         self.fetcher_cls = fetcher_cls
+        self.digest_buffer = DigestBuffer(digest_collection) if digest_collection is not None else None
         # Repository injection: accept an EventRepository instance directly
         if repo is not None:
             self.repository = repo
@@ -61,6 +71,8 @@ class EventService:
         self.db = self.mongo_client[self.config.MONGO_DB]
         self.events_collection = self.db[self.config.MONGO_COLLECTION]
         self.repository = repository.EventRepository(self.events_collection)
+        if self.digest_buffer is None and getattr(self.config, "DIGEST_WINDOW_MINUTES", 0):
+            self.digest_buffer = DigestBuffer(self.db[f"{self.config.MONGO_COLLECTION}_digest"])
 
     def store_events(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Persist new event dicts to the events collection.
@@ -86,25 +98,64 @@ class EventService:
             else:
                 raise RuntimeError("No repository or events_collection available on EventService")
 
+    def _prepare_events(self, events: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Drop events from excluded locations and attach `description_hash`."""
+        excluded_lower = [loc.lower() for loc in EXCLUDED_LOCATIONS]
+        for event in events:
+            if event.get("location") and event["location"].strip().lower() in excluded_lower:
+                continue
+            event["description_hash"] = description_hash(event.get("description"))
+            yield event
+
     def fetch_events(self) -> List[Dict[str, Any]]:
         """Fetch events from the external calendar provider and filter them.
 
         Returns:
             A list of event dictionaries. Events from excluded locations are
-            filtered out.
+            filtered out. Each event carries a `description_hash` of its
+            DTSTAMP-normalized description, computed once here at parse time.
+            The fetcher's HTTP polling hints are kept as `last_cache_hints`.
         """
         fetcher: WebcalFetcher = self.fetcher_cls(self.config.WEB_CAL_URL)
-        events = fetcher.fetch_events()
-        excluded_lower = [loc.lower() for loc in EXCLUDED_LOCATIONS]
-        filtered_events = [
-            event
-            for event in events
-            if not (
-                event.get("location")
-                and event["location"].strip().lower() in excluded_lower
-            )
-        ]
-        return filtered_events
+        try:
+            events = fetcher.fetch_events()
+        finally:
+            hints = getattr(fetcher, "cache_hints", None)
+            self.last_cache_hints = hints if isinstance(hints, dict) else {}
+        return list(self._prepare_events(events))
+
+    def fetch_events_if_changed(self, validator: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """Like `fetch_events`, but None while the feed still matches `validator`.
+
+        The current feed validator is kept as `last_feed_validator`; it is None
+        when the fetcher cannot revalidate, and the events are then always
+        returned.
+        """
+        fetcher: WebcalFetcher = self.fetcher_cls(self.config.WEB_CAL_URL)
+        conditional = callable(getattr(type(fetcher), "fetch_events_if_changed", None))
+        try:
+            events = fetcher.fetch_events_if_changed(validator) if conditional else fetcher.fetch_events()
+        finally:
+            hints = getattr(fetcher, "cache_hints", None)
+            self.last_cache_hints = hints if isinstance(hints, dict) else {}
+        self.last_feed_validator = getattr(fetcher, "validator", None) if conditional else None
+        return None if events is None else list(self._prepare_events(events))
+
+    def iter_fetched_events(self) -> Iterator[Dict[str, Any]]:
+        """Like `fetch_events`, but yields events while the feed is still downloading.
+
+        Uses the fetcher's `iter_events` when its class provides one and
+        falls back to `fetch_events` otherwise.
+        """
+        fetcher: WebcalFetcher = self.fetcher_cls(self.config.WEB_CAL_URL)
+        try:
+            if callable(getattr(type(fetcher), "iter_events", None)):
+                yield from self._prepare_events(fetcher.iter_events())
+            else:
+                yield from self._prepare_events(fetcher.fetch_events())
+        finally:
+            hints = getattr(fetcher, "cache_hints", None)
+            self.last_cache_hints = hints if isinstance(hints, dict) else {}
 
     def send_events_email(self, events: List[Dict[str, Any]]) -> None:
         """Send one plain-text email describing the provided events.
@@ -139,10 +190,12 @@ class EventService:
         added_events: List[Dict[str, Any]],
         removed_events: List[Dict[str, Any]],
         updated_events: Optional[List[Dict[str, Any]]] = None,
+        send_id: Optional[str] = None,
     ) -> None:
         """Send a single summary email covering added, removed and updated events.
 
         Delegates to the `notifier` module which builds the HTML/plain bodies.
+        `send_id` identifies the send for the outbox's de-duplication.
         """
         notifier.send_summary(
             self.email_sender_cls,
@@ -150,8 +203,92 @@ class EventService:
             added_events or [],
             removed_events or [],
             updated_events or [],
+            send_id=send_id,
         )
 
+    def _notify(
+        self,
+        added_events: List[Dict[str, Any]],
+        removed_events: List[Dict[str, Any]],
+        updated_events: List[Dict[str, Any]],
+    ) -> str:
+        """Send this run's changes, or buffer them when a digest window is set.
+
+        With `PRIORITY_HORIZON_HOURS`, removals and updates of events starting
+        within the horizon are sent right away as a compact urgent email and
+        only the remaining changes continue to the regular summary. If the
+        urgent email fails, its changes go to the regular summary as well.
+
+        With `DIGEST_WINDOW_MINUTES` and a digest buffer, changes are coalesced
+        into the buffer and one consolidated summary is sent once the oldest
+        buffered change is older than the window.
+
+        Returns:
+            ``"sent"`` when a summary was handed to the sender (or there was
+            nothing to send) and ``"buffered"`` when changes are being held.
+        """
+        # one id per notification run; the outbox de-duplicates per send, not per content
+        run_id = uuid.uuid4().hex
+        horizon_hours = getattr(self.config, "PRIORITY_HORIZON_HOURS", 0)
+        if horizon_hours:
+            (urgent_removed, urgent_updated), (removed_events, updated_events) = notifier.split_by_priority(
+                removed_events, updated_events, horizon_hours
+            )
+            if urgent_removed or urgent_updated:
+                try:
+                    notifier.send_urgent(
+                        self.email_sender_cls, self.config, urgent_removed, urgent_updated, send_id=f"{run_id}:urgent"
+                    )
+                except Exception:
+                    # report them with the regular summary (or digest) instead of losing them
+                    (self.logger or logging.getLogger(__name__)).exception(
+                        "fetch_persist_and_send_events.urgent_failed",
+                        extra={"urgent_count": len(urgent_removed) + len(urgent_updated)},
+                    )
+                    removed_events = urgent_removed + removed_events
+                    updated_events = urgent_updated + updated_events
+                else:
+                    if self.logger:
+                        self.logger.info(
+                            "fetch_persist_and_send_events.urgent",
+                            extra={"urgent_count": len(urgent_removed) + len(urgent_updated)},
+                        )
+
+        window_minutes = getattr(self.config, "DIGEST_WINDOW_MINUTES", 0)
+        digest_buffer = getattr(self, "digest_buffer", None)
+        if not window_minutes or digest_buffer is None:
+            self.send_summary_email(added_events, removed_events, updated_events, send_id=f"{run_id}:summary")
+            return "sent"
+
+        digest_buffer.add(added_events, removed_events, updated_events)
+        if not digest_buffer.is_due(window_minutes * 60):
+            return "buffered" if len(digest_buffer) else "sent"
+        added, removed, updated, uids = digest_buffer.pending()
+        self.send_summary_email(added, removed, updated, send_id=f"{run_id}:digest")
+        digest_buffer.clear(uids)
+        return "sent"
+
+    def iter_new_events(self, batch_size: Optional[int] = None, store: bool = False) -> Iterator[Dict[str, Any]]:
+        """Stream the fetched events that are not stored yet, as the feed downloads.
+
+        Events are checked against the repository (and, with `store`,
+        persisted) in batches of `batch_size` (default ``DIFF_BATCH_SIZE``),
+        so memory stays bounded by one batch however large the feed is.
+        """
+        batch_size = max(1, batch_size or getattr(self.config, "DIFF_BATCH_SIZE", 500))
+        fetched = self.iter_fetched_events()
+        try:
+            while True:
+                batch = list(itertools.islice(fetched, batch_size))
+                if not batch:
+                    return
+                new_events = self.filter_new_events(batch)
+                if store and new_events:
+                    self.store_events(new_events)
+                yield from new_events
+        finally:
+            fetched.close()
+
     def filter_new_events(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         uids = [event["uid"] for event in events]
         existing_uids_cursor = self.repository.collection.find({"uid": {"$in": uids}}, {"uid": 1})
@@ -167,31 +304,21 @@ class EventService:
     def normalize_dtstamp(self, text: Optional[str]) -> str:
         return normalize_dtstamp(text)
 
-    def fetch_persist_and_send_events(self) -> List[Dict[str, Any]]:
-        # ensure repository is available for instances created without __init__
-        try:
-            self._ensure_repository()
-        except Exception:
-            # if repository cannot be ensured, allow original behavior to raise later
-            pass
-
-        start_ts = time.monotonic()
-        if self.logger:
-            self.logger.info("fetch_persist_and_send_events.start", extra={"action": "fetch_start"})
+    def _detect_changes(
+        self, events: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Detect and persist added, removed and updated events with set lookups.
 
-        # fetch remote events
-        events = self.fetch_events()
-        fetched_count = len(events)
+        Returns:
+            A ``(new_events, removed_events, updated_events)`` tuple.
+        """
         fetched_uids = {event["uid"] for event in events}
-        if self.logger:
-            self.logger.info("fetch_persist_and_send_events.fetched", extra={"fetched_count": fetched_count})
 
         # Which fetched uids already exist in DB?
         existing_matching = self._existing_matching_uids(fetched_uids)
 
         # New events are those fetched but not present in DB
         new_events = [event for event in events if event["uid"] not in existing_matching]
-        new_count = len(new_events)
 
         # Determine all uids present in DB (used to compute removals)
         existing_all = self.repository.existing_all_uids()
@@ -201,43 +328,71 @@ class EventService:
         if not existing_matching and (fetched_uids & existing_all):
             existing_matching = fetched_uids & existing_all
             new_events = [event for event in events if event["uid"] not in existing_matching]
-            new_count = len(new_events)
 
         # Detect and apply updates for events that still exist but changed
-        updated_events = detect_and_apply_updates(events, existing_matching, self.repository)
-        updated_count = len(updated_events)
+        if getattr(self.config, "CHANGE_DETECTION_ENGINE", "standard") == "vectorized":
+            detect = vectorized.detect_and_apply_updates
+        else:
+            detect = detect_and_apply_updates
+        updated_events = detect(events, existing_matching, self.repository)
 
         # Find and remove events that existed previously but are no longer fetched
         removed_events = fetch_removed_events(existing_all, fetched_uids, self.repository)
-        removed_count = len(removed_events)
 
-        # persist new events and send a single summary email for added/removed/updated
+        # persist new events
         if new_events:
             self.store_events(new_events)
 
-        # send summary
+        return new_events, removed_events, updated_events
+
+    def fetch_persist_and_send_events(self) -> List[Dict[str, Any]]:
+        """Run the staged fetch/diff/persist/notify pipeline once.
+
+        See `pipeline.run` for the stages. Per-stage timings are logged and
+        kept in `last_run_stats` together with the change counts.
+
+        Returns:
+            The newly added events.
+        """
+        # ensure repository is available for instances created without __init__
         try:
-            self.send_summary_email(new_events, removed_events, updated_events)
-            email_status = "sent"
-        except Exception as e:
-            if self.logger:
-                self.logger.exception("Failed to send summary email: %s", e)
-            email_status = "failed"
+            self._ensure_repository()
+        except Exception:
+            # if repository cannot be ensured, allow original behavior to raise later
+            pass
+
+        start_ts = time.monotonic()
+        if self.logger:
+            self.logger.info("fetch_persist_and_send_events.start", extra={"action": "fetch_start"})
+
+        result = pipeline.run(self)
+        new_count = len(result.added)
+        updated_count = len(result.updated)
+        removed_count = len(result.removed)
 
         duration = time.monotonic() - start_ts
+        # consumed by the adaptive scheduler to pick the next interval
+        self.last_run_stats = {
+            "new_count": new_count,
+            "updated_count": updated_count,
+            "removed_count": removed_count,
+            "cache_hints": getattr(self, "last_cache_hints", {}),
+            "stages": result.stages,
+        }
         # Structured summary log of the run
         if self.logger:
             self.logger.info(
                 "fetch_persist_and_send_events.complete",
                 extra={
                     "duration_seconds": duration,
-                    "fetched_count": fetched_count,
+                    "fetched_count": result.fetched_count,
                     "new_count": new_count,
                     "updated_count": updated_count,
                     "removed_count": removed_count,
-                    "email_status": email_status,
+                    "email_status": result.email_status,
+                    "stages": result.stages,
                 },
             )
 
         # Return list of processed new events for backward compatibility
-        return new_events
+        return result.added
@@ -0,0 +1,116 @@
+"""iCalendar rendering for the `GET /events/calendar.ics` export.
+
+Stored events are rendered as RFC 5545 VEVENT blocks. `CalendarRenderer`
+keeps the block of every uid it rendered together with the event's
+`updated_at` (refreshed by every insert and update), so a new calendar body
+only re-renders the events that changed since the previous one and joins
+the cached blocks for the rest.
+
+Times are written in UTC; naive stored datetimes are taken as UTC, as
+everywhere else in the service.
+"""
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from . import utils
+
+PRODID = "-//flight-controll//calendar export//EN"
+
+CALENDAR_HEADER = f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:{PRODID}\r\nCALSCALE:GREGORIAN\r\n"
+CALENDAR_FOOTER = "END:VCALENDAR\r\n"
+
+_TEXT_ESCAPES = str.maketrans({"\\": "\\\\", ";": "\\;", ",": "\\,", "\n": "\\n", "\r": ""})
+
+
+def _escape(text: Any) -> str:
+    return str(text).translate(_TEXT_ESCAPES)
+
+
+def _fold(line: str) -> str:
+    """Fold a content line into chunks of at most 75 octets (RFC 5545 3.1)."""
+    if len(line) <= 75 and line.isascii():
+        return line + "\r\n"
+    chunks = []
+    chunk = ""
+    size = 0
+    for char in line:
+        width = len(char.encode("utf-8"))
+        # continuation lines start with a space, which counts towards the limit
+        if size + width > (75 if not chunks else 74):
+            chunks.append(chunk)
+            chunk, size = "", 0
+        chunk += char
+        size += width
+    chunks.append(chunk)
+    return "\r\n ".join(chunks) + "\r\n"
+
+
+def _format_dt(value: Any) -> Optional[str]:
+    dt = utils.parse_dt(value)
+    if dt is None:
+        return None
+    return dt.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _dtstamp(doc: Dict[str, Any]) -> str:
+    stamp = doc.get("last_modified")
+    if isinstance(stamp, str) and stamp.endswith("Z"):
+        return stamp
+    return _format_dt(doc.get("updated_at")) or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_vevent(doc: Dict[str, Any]) -> str:
+    """Render one stored event document as a VEVENT block with CRLF line endings."""
+    lines = ["BEGIN:VEVENT", f"UID:{_escape(doc['uid'])}", f"DTSTAMP:{_dtstamp(doc)}"]
+    start = _format_dt(doc.get("start_time"))
+    if start:
+        lines.append(f"DTSTART:{start}")
+    end = _format_dt(doc.get("end_time"))
+    if end:
+        lines.append(f"DTEND:{end}")
+    if doc.get("sequence") is not None:
+        lines.append(f"SEQUENCE:{int(doc['sequence'])}")
+    for name, field in (("SUMMARY", "summary"), ("LOCATION", "location"), ("DESCRIPTION", "description")):
+        if doc.get(field):
+            lines.append(f"{name}:{_escape(doc[field])}")
+    lines.append("END:VEVENT")
+    return "".join(_fold(line) for line in lines)
+
+
+class CalendarRenderer:
+    """Renders VCALENDAR bodies from stored events, caching VEVENT blocks per uid.
+
+    A block is reused while the event's `updated_at` is unchanged. Blocks of
+    uids missing from the latest render are dropped, so the cache holds at
+    most one calendar's worth of events.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fragments: Dict[str, Tuple[Any, str]] = {}
+        self.rendered = 0
+        self.reused = 0
+
+    def render(self, docs: Iterable[Dict[str, Any]]) -> str:
+        with self._lock:
+            previous = self._fragments
+            fragments: Dict[str, Tuple[Any, str]] = {}
+            parts = [CALENDAR_HEADER]
+            for doc in docs:
+                uid = doc["uid"]
+                version = doc.get("updated_at")
+                cached = previous.get(uid)
+                if cached is not None and version is not None and cached[0] == version:
+                    fragment = cached[1]
+                    self.reused += 1
+                else:
+                    fragment = render_vevent(doc)
+                    self.rendered += 1
+                fragments[uid] = (version, fragment)
+                parts.append(fragment)
+            parts.append(CALENDAR_FOOTER)
+            self._fragments = fragments
+            return "".join(parts)
@@ -1,8 +1,15 @@
 import html as html_module
-from typing import Any, Dict, List, Tuple
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+from . import utils
+from .renderer import SECTION_SEPARATOR as _SECTION_SEPARATOR
+from .renderer import CHANGES_ATTACHMENT, changes_csv_gz, render_summary_capped
+from .subscriptions import load_subscriptions, route, select
 
-_SECTION_SEPARATOR = "--------------------------\n"
+logger = logging.getLogger(__name__)
 
 
 def _escape(value: Any) -> str:
@@ -23,88 +30,84 @@ def _render_plain_line(label: str, value: Any) -> str:
     return f"{label}: {value}\n"
 
 
-def _render_html_line(label: str, value: Any) -> str:
-    return f"{label}: {_escape(value)}\n"
+Message = Tuple[str, str, Dict[str, Any]]
 
 
-def _render_raw_html_line(label: str, value: Any) -> str:
-    return f"{label}: {value}\n"
-
-
-def _render_event_block(event: Dict[str, Any], field_map: List[Tuple[str, str, str]]) -> Tuple[str, str]:
-    """Render a single event block for plain text and HTML."""
-    plain_lines: List[str] = []
-    html_lines: List[str] = []
-    for label, primary_key, fallback_key in field_map:
-        value = _format_event_value(event, primary_key, fallback_key)
-        plain_lines.append(_render_plain_line(label, value))
-        html_lines.append(_render_html_line(label, value))
-    plain_lines.append(_SECTION_SEPARATOR)
-    html_lines.append(_SECTION_SEPARATOR)
-    return "".join(plain_lines), "".join(html_lines)
-
-
-def _render_updated_field(
-    updated: Dict[str, Any], label: str, old_key: str, new_key: str, fallback_key: str = None
-) -> Tuple[str, str, str, str]:
-    """Render an updated field pair with optional <strong> wrapping in HTML."""
-    old_value = _format_event_value(updated, old_key, fallback_key)
-    new_value = _format_event_value(updated, new_key, fallback_key)
-    changed = old_value != new_value
-    old_html_value = f"<strong>{_escape(old_value)}</strong>" if changed else _escape(old_value)
-    new_html_value = f"<strong>{_escape(new_value)}</strong>" if changed else _escape(new_value)
-    return (
-        _render_plain_line(f"Old {label}", old_value),
-        _render_plain_line(f"New {label}", new_value),
-        _render_raw_html_line(f"Old {label}", old_html_value),
-        _render_raw_html_line(f"New {label}", new_html_value),
-    )
+def _deliver_all(email_sender_cls, config, jobs: List[Tuple[str, Message]]) -> None:
+    """Send ``(recipient, (subject, body, kwargs))`` jobs, concurrently when there are several.
 
+    Each worker builds its own sender, so with the app's pooled transport the
+    sends share up to `SMTP_POOL_SIZE` authenticated sessions; the worker
+    count is capped at that size so no worker sits waiting on the pool. Every
+    job is attempted; the first failure is re-raised once all have finished.
+    A sender returning False counts as a failure, as in `MailQueue`.
+    """
 
-def _render_updated_event(updated: Dict[str, Any]) -> Tuple[str, str]:
-    plain_lines: List[str] = []
-    html_lines: List[str] = []
-    summary = _format_event_value(updated, "summary")
-    plain_lines.append(_render_plain_line("Summary", summary))
-    html_lines.append(_render_html_line("Summary", summary))
+    def deliver(job: Tuple[str, Message]) -> None:
+        recipient, (subject, body, kwargs) = job
+        email_sender = email_sender_cls(
+            config.SMTP_SERVER, config.SMTP_PORT, config.SMTP_USERNAME, config.SMTP_PASSWORD
+        )
+        # MailService logs and returns False instead of raising
+        if email_sender.send_email(recipient, subject, body, **kwargs) is False:
+            raise RuntimeError(f"email to {recipient} was not sent")
 
-    old_start_plain, new_start_plain, old_start_html, new_start_html = _render_updated_field(
-        updated, "Start", "old_start", "new_start"
-    )
-    old_end_plain, new_end_plain, old_end_html, new_end_html = _render_updated_field(
-        updated, "End", "old_end", "new_end"
-    )
-    old_desc_plain, new_desc_plain, old_desc_html, new_desc_html = _render_updated_field(
-        updated, "Description", "old_description", "new_description", "description"
-    )
-    old_loc_plain, new_loc_plain, old_loc_html, new_loc_html = _render_updated_field(
-        updated, "Location", "old_location", "new_location", "location"
+    if len(jobs) == 1:
+        deliver(jobs[0])
+        return
+    workers = max(
+        1, min(len(jobs), getattr(config, "MAIL_FANOUT_WORKERS", 4), getattr(config, "SMTP_POOL_SIZE", 1))
     )
-
-    plain_lines.extend([
-        old_start_plain,
-        old_end_plain,
-        old_desc_plain,
-        old_loc_plain,
-        new_start_plain,
-        new_end_plain,
-        new_desc_plain,
-        new_loc_plain,
-    ])
-    html_lines.extend([
-        old_start_html,
-        old_end_html,
-        old_desc_html,
-        old_loc_html,
-        new_start_html,
-        new_end_html,
-        new_desc_html,
-        new_loc_html,
-    ])
-
-    plain_lines.append(_SECTION_SEPARATOR)
-    html_lines.append(_SECTION_SEPARATOR)
-    return "".join(plain_lines), "".join(html_lines)
+    errors: List[BaseException] = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mail-fanout") as pool:
+        for job, future in [(job, pool.submit(deliver, job)) for job in jobs]:
+            error = future.exception()
+            if error is not None:
+                logger.error("Failed to send email to %s: %s", job[0], error)
+                errors.append(error)
+    if errors:
+        raise errors[0]
+
+
+def _fan_out(
+    email_sender_cls,
+    config,
+    added: List[Dict[str, Any]],
+    removed: List[Dict[str, Any]],
+    updated: List[Dict[str, Any]],
+    build: Callable[[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]], Message],
+    send_id: Optional[str] = None,
+) -> None:
+    """Route a change set to the subscribers, render each variant once and send.
+
+    `send_id` identifies this logical send; it is passed to the sender (only
+    when set) so a durable outbox can de-duplicate per send and recipient.
+    """
+    variants = route(load_subscriptions(config), added, removed, updated)
+    jobs: List[Tuple[str, Message]] = []
+    for (added_idx, removed_idx, updated_idx), recipients in variants.items():
+        message = build(select(added, added_idx), select(removed, removed_idx), select(updated, updated_idx))
+        if send_id:
+            subject, body, kwargs = message
+            message = (subject, body, {**kwargs, "send_id": send_id})
+        jobs.extend((recipient, message) for recipient in recipients)
+    if jobs:
+        _deliver_all(email_sender_cls, config, jobs)
+
+
+def _build_summary(
+    config,
+    added: List[Dict[str, Any]],
+    removed: List[Dict[str, Any]],
+    updated: List[Dict[str, Any]],
+) -> Message:
+    subject = f"Events update: {len(added)} added, {len(removed)} removed, {len(updated)} updated"
+    budget = getattr(config, "SUMMARY_BODY_BUDGET_CHARS", 0)
+    body, html_body, omitted = render_summary_capped(added, removed, updated, budget)
+    if not omitted:
+        return subject, body, {"html_body": html_body}
+    attachment = (CHANGES_ATTACHMENT, changes_csv_gz(added, removed, updated), "application/gzip")
+    return subject, body, {"html_body": html_body, "attachments": [attachment]}
 
 
 def send_summary(
@@ -113,58 +116,121 @@ def send_summary(
     added: List[Dict[str, Any]],
     removed: List[Dict[str, Any]],
     updated: List[Dict[str, Any]],
+    send_id: Optional[str] = None,
 ):
-    """Send one summary email for added, removed, and updated events."""
+    """Send one summary email for added, removed, and updated events.
+
+    Both bodies are produced in a single pass by the `renderer` module. When
+    they would exceed `SUMMARY_BODY_BUDGET_CHARS`, the bodies are truncated
+    with per-section counts and the full change set is attached as a
+    gzip-compressed CSV.
+
+    With `RECIPIENT_SUBSCRIPTIONS`, each subscriber receives only the changes
+    their filters select; see the `subscriptions` module.
+    """
     if not added and not removed and not updated:
         return
 
-    email_sender = email_sender_cls(
-        config.SMTP_SERVER, config.SMTP_PORT, config.SMTP_USERNAME, config.SMTP_PASSWORD
+    _fan_out(
+        email_sender_cls,
+        config,
+        added,
+        removed,
+        updated,
+        lambda a, r, u: _build_summary(config, a, r, u),
+        send_id,
     )
-    subject = f"Events update: {len(added)} added, {len(removed)} removed, {len(updated)} updated"
-    body = ["Events Update:\n\n"]
-    body_html = ["<html><body><pre style='font-family: sans-serif;'>Events Update:\n\n"]
-
-    added_fields = [
-        ("Summary", "summary", None),
-        ("Start Time", "dtstart", "start_time"),
-        ("End Time", "dtend", "end_time"),
-        ("Description", "description", None),
-        ("Location", "location", None),
-    ]
-    removed_fields = [
-        ("Summary", "summary", None),
-        ("Start Time", "start_time", None),
-        ("End Time", "end_time", None),
-        ("Description", "description", None),
-        ("Location", "location", None),
-    ]
 
-    if added:
-        body.append("Added Events:\n\n")
-        body_html.append("Added Events:\n\n")
-        for event in added:
-            text_block, html_block = _render_event_block(event, added_fields)
-            body.append(text_block)
-            body_html.append(html_block)
-
-    if removed:
-        body.append("Removed Events:\n\n")
-        body_html.append("Removed Events:\n\n")
-        for event in removed:
-            text_block, html_block = _render_event_block(event, removed_fields)
-            body.append(text_block)
-            body_html.append(html_block)
-
-    if updated:
-        body.append("Updated Events:\n\n")
-        body_html.append("Updated Events:\n\n")
-        for event in updated:
-            text_block, html_block = _render_updated_event(event)
-            body.append(text_block)
-            body_html.append(html_block)
-
-    body_html.append("</pre></body></html>")
-    email_sender.send_email(
-        config.RECIPIENT_EMAIL, subject, "".join(body), html_body="".join(body_html)
+
+def _starts_within(value: Any, now: datetime, horizon: timedelta) -> bool:
+    dt = utils.parse_dt(value)
+    return dt is not None and now <= dt <= now + horizon
+
+
+def is_urgent_removal(removed: Dict[str, Any], now: datetime, horizon: timedelta) -> bool:
+    """Return True if a removed event was due to start within `horizon`."""
+    return _starts_within(removed.get("start_time") or removed.get("dtstart"), now, horizon)
+
+
+def is_urgent_update(updated: Dict[str, Any], now: datetime, horizon: timedelta) -> bool:
+    """Return True if an updated event starts, or used to start, within `horizon`.
+
+    Both start times count: an event pulled forward into the horizon and one
+    moved out of it are equally surprising to someone planning on the old time.
+    """
+    return _starts_within(updated.get("new_start"), now, horizon) or _starts_within(
+        updated.get("old_start"), now, horizon
     )
+
+
+def split_by_priority(
+    removed: List[Dict[str, Any]],
+    updated: List[Dict[str, Any]],
+    horizon_hours: float,
+    now: Optional[datetime] = None,
+) -> Tuple[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]], Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+    """Split removed and updated records into near-term and regular changes.
+
+    Returns:
+        ``((urgent_removed, urgent_updated), (regular_removed, regular_updated))``.
+    """
+    now = now or datetime.now(timezone.utc)
+    horizon = timedelta(hours=horizon_hours)
+    urgent_removed: List[Dict[str, Any]] = []
+    regular_removed: List[Dict[str, Any]] = []
+    for event in removed:
+        (urgent_removed if is_urgent_removal(event, now, horizon) else regular_removed).append(event)
+    urgent_updated: List[Dict[str, Any]] = []
+    regular_updated: List[Dict[str, Any]] = []
+    for event in updated:
+        (urgent_updated if is_urgent_update(event, now, horizon) else regular_updated).append(event)
+    return (urgent_removed, urgent_updated), (regular_removed, regular_updated)
+
+
+def _build_urgent(removed: List[Dict[str, Any]], updated: List[Dict[str, Any]]) -> Message:
+    count = len(removed) + len(updated)
+    subject = f"Urgent: {count} upcoming event{'s' if count != 1 else ''} changed"
+    body: List[str] = []
+    for event in removed:
+        body.append(f"CANCELLED {_format_event_value(event, 'summary')}\n")
+        body.append(_render_plain_line("Start", _format_event_value(event, "start_time", "dtstart")))
+        body.append(_SECTION_SEPARATOR)
+    changed_labels = [
+        ("start", "Start", "old_start", "new_start"),
+        ("end", "End", "old_end", "new_end"),
+        ("location", "Location", "old_location", "new_location"),
+        ("description", "Description", "old_description", "new_description"),
+    ]
+    for event in updated:
+        body.append(f"CHANGED {_format_event_value(event, 'summary')}\n")
+        mask = event.get("changed_fields")
+        for field, label, old_key, new_key in changed_labels:
+            old_value = _format_event_value(event, old_key)
+            new_value = _format_event_value(event, new_key)
+            changed = field in mask if mask is not None else old_value != new_value
+            if changed:
+                body.append(_render_plain_line(label, f"{old_value} -> {new_value}"))
+        body.append(_SECTION_SEPARATOR)
+
+    plain = "".join(body)
+    html_body = f"<html><body><pre style='font-family: sans-serif;'>{_escape(plain)}</pre></body></html>"
+    return subject, plain, {"html_body": html_body}
+
+
+def send_urgent(
+    email_sender_cls,
+    config,
+    removed: List[Dict[str, Any]],
+    updated: List[Dict[str, Any]],
+    send_id: Optional[str] = None,
+):
+    """Send one compact email for near-term removed and updated events.
+
+    Only the summary, start time and the fields that actually changed are
+    listed, so the message reads well on a phone notification. Routed to
+    subscribers like `send_summary`.
+    """
+    if not removed and not updated:
+        return
+
+    _fan_out(email_sender_cls, config, [], removed, updated, lambda a, r, u: _build_urgent(r, u), send_id)
@@ -0,0 +1,256 @@
+"""Staged fetch → diff → persist → notify pipeline.
+
+`EventService.fetch_persist_and_send_events` is a thin wrapper around `run`.
+A run is split into stages connected by bounded queues so their I/O overlaps:
+
+- ``fetch``: downloads the feed and parses each VEVENT as soon as it has
+  arrived (`WebcalFetcher.iter_events`), filtering and hashing every event.
+- ``snapshot``: with the streaming engine, reads the stored snapshot in uid
+  order while the download is still running.
+- ``diff``: detects added, removed and updated events once the feed is in.
+- ``persist``: with the streaming engine, applies write batches on its own
+  thread while the diff advances. The other engines write inline as part of
+  ``diff``.
+- ``notify``: renders and sends (or buffers) the summary.
+
+Every stage records its time and item count in `PipelineResult.stages`.
+Notify only starts once every write is confirmed, so a failed write raises
+before any summary is sent and the changes are reported by the next run.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import streaming_diff
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+DEFAULT_QUEUE_DEPTH = 8
+
+StageTimings = Dict[str, Dict[str, float]]
+
+
+@dataclass
+class PipelineResult:
+    """Outcome of one run: the fetched count, the changes and per-stage timings."""
+
+    fetched_count: int
+    added: List[Dict[str, Any]]
+    removed: List[Dict[str, Any]]
+    updated: List[Dict[str, Any]]
+    email_status: str
+    stages: StageTimings = field(default_factory=dict)
+
+
+class _Feeder:
+    """Runs a producer on its own thread and hands its items over in batches.
+
+    The queue holds at most `depth` batches of `batch_size` items, so a fast
+    producer blocks instead of buffering without bound. Iterating the feeder
+    yields the items in order and re-raises the producer's exception.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        produce: Callable[[], Iterable[Any]],
+        timings: StageTimings,
+        batch_size: int = streaming_diff.DEFAULT_BATCH_SIZE,
+        depth: int = DEFAULT_QUEUE_DEPTH,
+    ):
+        self.name = name
+        self._produce = produce
+        self._timings = timings
+        self._batch_size = max(1, batch_size)
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, depth))
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name=f"pipeline-{name}", daemon=True)
+        self._thread.start()
+
+    def _put(self, item: Any) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.05)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self) -> None:
+        started = time.monotonic()
+        items = 0
+        source: Any = None
+        try:
+            source = iter(self._produce())
+            batch: List[Any] = []
+            for item in source:
+                batch.append(item)
+                items += 1
+                if len(batch) >= self._batch_size:
+                    if not self._put(batch):
+                        return
+                    batch = []
+            if batch:
+                self._put(batch)
+        except BaseException as e:
+            self._error = e
+        finally:
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+            self._timings[self.name] = {"seconds": time.monotonic() - started, "items": items}
+            self._put(_END)
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            batch = self._queue.get()
+            if batch is _END:
+                if self._error is not None:
+                    raise self._error
+                return
+            yield from batch
+
+    def close(self) -> None:
+        """Stop the producer early (if still running) and wait for its thread."""
+        self._stop.set()
+        self._thread.join()
+
+
+class _Persister:
+    """Applies flushed write batches on a background thread.
+
+    `apply` matches `streaming_diff.ApplyFn` and only blocks while the queue
+    is full. Once a batch fails, later batches are discarded and the error is
+    raised from the next `apply` call or from `finish`.
+    """
+
+    def __init__(self, timings: StageTimings, depth: int = DEFAULT_QUEUE_DEPTH):
+        self._timings = timings
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, depth))
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="pipeline-persist", daemon=True)
+        self._thread.start()
+
+    def apply(self, repo: Any, inserts: List[Any], updates: List[Any], deletes: List[Any]) -> None:
+        if self._error is not None:
+            raise self._error
+        self._queue.put((repo, inserts, updates, deletes))
+
+    def _run(self) -> None:
+        busy = 0.0
+        items = 0
+        while True:
+            batch = self._queue.get()
+            if batch is _END:
+                break
+            if self._error is not None:
+                continue
+            started = time.monotonic()
+            try:
+                streaming_diff.apply_writes(*batch)
+                items += sum(len(part) for part in batch[1:])
+            except BaseException as e:
+                self._error = e
+            busy += time.monotonic() - started
+        self._timings["persist"] = {"seconds": busy, "items": items}
+
+    def finish(self) -> None:
+        """Wait until every queued batch is written; re-raise the first write error."""
+        self._queue.put(_END)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+
+def _timed(timings: StageTimings, name: str, fn: Callable[[], Any], items: Callable[[Any], int]) -> Any:
+    started = time.monotonic()
+    result = fn()
+    timings[name] = {"seconds": time.monotonic() - started, "items": items(result)}
+    return result
+
+
+def _diff_streaming(
+    service: Any, fetched: List[Dict[str, Any]], snapshot: _Feeder, persister: _Persister, batch_size: int
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    changes: Dict[str, List[Dict[str, Any]]] = {
+        streaming_diff.ADDED: [],
+        streaming_diff.REMOVED: [],
+        streaming_diff.UPDATED: [],
+    }
+    for kind, record in streaming_diff.stream_diff(
+        fetched, service.repository, batch_size, stored=snapshot, apply=persister.apply
+    ):
+        changes[kind].append(record)
+    return changes[streaming_diff.ADDED], changes[streaming_diff.REMOVED], changes[streaming_diff.UPDATED]
+
+
+def run(service: Any) -> PipelineResult:
+    """Fetch, diff, persist and notify for `service` with overlapping stages.
+
+    Args:
+        service: an `EventService`; its `iter_fetched_events`, repository,
+            `_detect_changes` and `_notify` provide the stage bodies.
+
+    Raises:
+        Exception: a fetch, snapshot, diff or write failure. Notification
+            failures are logged and reported as ``email_status="failed"``.
+    """
+    config = service.config
+    streaming = getattr(config, "CHANGE_DETECTION_ENGINE", "standard") == "streaming"
+    batch_size = getattr(config, "DIFF_BATCH_SIZE", streaming_diff.DEFAULT_BATCH_SIZE)
+    depth = getattr(config, "PIPELINE_QUEUE_DEPTH", DEFAULT_QUEUE_DEPTH)
+    timings: StageTimings = {}
+
+    fetch = _Feeder("fetch", service.iter_fetched_events, timings, batch_size, depth)
+    snapshot = (
+        _Feeder("snapshot", lambda: service.repository.iter_docs_sorted_by_uid(batch_size), timings, batch_size, depth)
+        if streaming
+        else None
+    )
+    persister = _Persister(timings, depth) if streaming else None
+    persisted = False
+    try:
+        fetched = list(fetch)
+        if streaming:
+            added, removed, updated = _timed(
+                timings,
+                "diff",
+                lambda: _diff_streaming(service, fetched, snapshot, persister, batch_size),
+                lambda changes: sum(map(len, changes)),
+            )
+        else:
+            added, removed, updated = _timed(
+                timings, "diff", lambda: service._detect_changes(fetched), lambda changes: sum(map(len, changes))
+            )
+        if persister is not None:
+            # never mail changes that were not stored
+            persisted = True
+            persister.finish()
+
+        started = time.monotonic()
+        try:
+            email_status = service._notify(added, removed, updated)
+        except Exception as e:
+            (getattr(service, "logger", None) or logger).exception("Failed to send summary email: %s", e)
+            email_status = "failed"
+        timings["notify"] = {"seconds": time.monotonic() - started, "items": len(added) + len(removed) + len(updated)}
+    finally:
+        fetch.close()
+        if snapshot is not None:
+            snapshot.close()
+        if persister is not None and not persisted:
+            # the run already failed; don't let a write error replace that error
+            try:
+                persister.finish()
+            except Exception:
+                logger.exception("pipeline.persist_failed_after_error")
+
+    return PipelineResult(len(fetched), added, removed, updated, email_status, timings)
@@ -0,0 +1,251 @@
+"""One-pass renderer for summary email bodies.
+
+Event blocks are rendered from format templates compiled once at import time
+and written straight into plain-text and HTML buffers. The added/removed
+blocks contain only fixed labels and values, so each HTML block is the plain
+block escaped in a single call instead of escaping every value separately.
+
+With a size budget the bodies are truncated after the event that crosses it,
+and the full change set travels as the `CHANGES_ATTACHMENT` built by
+`changes_csv_gz`.
+"""
+from __future__ import annotations
+
+import csv
+import gzip
+import html as html_module
+import io
+from typing import Any, Dict, List, Optional, Tuple
+
+SECTION_SEPARATOR = "--------------------------\n"
+
+PLAIN_HEADER = "Events Update:\n\n"
+HTML_HEADER = "<html><body><pre style='font-family: sans-serif;'>Events Update:\n\n"
+HTML_FOOTER = "</pre></body></html>"
+
+CHANGES_ATTACHMENT = "changes.csv.gz"
+
+_escape = html_module.escape
+
+_ADDED_BLOCK = (
+    "Summary: {0}\nStart Time: {1}\nEnd Time: {2}\nDescription: {3}\nLocation: {4}\n"
+    + SECTION_SEPARATOR
+).format
+_UPDATED_BLOCK = (
+    "Summary: {0}\n"
+    "Old Start: {1}\nOld End: {2}\nOld Description: {3}\nOld Location: {4}\n"
+    "New Start: {5}\nNew End: {6}\nNew Description: {7}\nNew Location: {8}\n"
+    + SECTION_SEPARATOR
+).format
+
+# (mask field, old key, new key, fallback key) in block order
+_UPDATED_FIELDS = (
+    ("start", "old_start", "new_start", None),
+    ("end", "old_end", "new_end", None),
+    ("description", "old_description", "new_description", "description"),
+    ("location", "old_location", "new_location", "location"),
+)
+
+
+def _value(event: Dict[str, Any], primary: str, fallback: Optional[str] = None) -> str:
+    value = event.get(primary)
+    if value is None and fallback is not None:
+        value = event.get(fallback)
+    return str(value) if value is not None else "N/A"
+
+
+class SummaryRenderer:
+    """Accumulates the plain-text and HTML summary bodies in one pass."""
+
+    def __init__(self) -> None:
+        self._plain = io.StringIO()
+        self._html = io.StringIO()
+        self._plain.write(PLAIN_HEADER)
+        self._html.write(HTML_HEADER)
+
+    @property
+    def size(self) -> int:
+        """Characters written so far across both bodies."""
+        return self._plain.tell() + self._html.tell()
+
+    def write(self, plain: str, html_text: Optional[str] = None) -> None:
+        """Write a fragment; the HTML side defaults to the escaped plain text."""
+        self._plain.write(plain)
+        self._html.write(_escape(plain) if html_text is None else html_text)
+
+    def heading(self, title: str) -> None:
+        self.write(f"{title}:\n\n")
+
+    def added(self, event: Dict[str, Any]) -> None:
+        self.write(
+            _ADDED_BLOCK(
+                _value(event, "summary"),
+                _value(event, "dtstart", "start_time"),
+                _value(event, "dtend", "end_time"),
+                _value(event, "description"),
+                _value(event, "location"),
+            )
+        )
+
+    def removed(self, event: Dict[str, Any]) -> None:
+        self.write(
+            _ADDED_BLOCK(
+                _value(event, "summary"),
+                _value(event, "start_time"),
+                _value(event, "end_time"),
+                _value(event, "description"),
+                _value(event, "location"),
+            )
+        )
+
+    def updated(self, event: Dict[str, Any]) -> None:
+        """Render an update; changed values are wrapped in <strong> in HTML.
+
+        Uses the record's `changed_fields` mask from change detection when
+        present and only falls back to comparing the rendered values without it.
+        """
+        mask = event.get("changed_fields")
+        olds: List[str] = []
+        news: List[str] = []
+        html_olds: List[str] = []
+        html_news: List[str] = []
+        for field, old_key, new_key, fallback in _UPDATED_FIELDS:
+            old = _value(event, old_key, fallback)
+            new = _value(event, new_key, fallback)
+            changed = field in mask if mask is not None else old != new
+            olds.append(old)
+            news.append(new)
+            if changed:
+                html_olds.append(f"<strong>{_escape(old)}</strong>")
+                html_news.append(f"<strong>{_escape(new)}</strong>")
+            else:
+                html_olds.append(_escape(old))
+                html_news.append(_escape(new))
+        summary = _value(event, "summary")
+        self.write(
+            _UPDATED_BLOCK(summary, *olds, *news),
+            _UPDATED_BLOCK(_escape(summary), *html_olds, *html_news),
+        )
+
+    def getvalue(self) -> Tuple[str, str]:
+        """Return the finished ``(plain, html)`` bodies."""
+        return self._plain.getvalue(), self._html.getvalue() + HTML_FOOTER
+
+
+def _render(
+    added: List[Dict[str, Any]],
+    removed: List[Dict[str, Any]],
+    updated: List[Dict[str, Any]],
+    budget: int = 0,
+) -> Tuple[str, str, Dict[str, int]]:
+    renderer = SummaryRenderer()
+    omitted = {"added": 0, "removed": 0, "updated": 0}
+    over_budget = False
+    for key, title, events, render in (
+        ("added", "Added Events", added, renderer.added),
+        ("removed", "Removed Events", removed, renderer.removed),
+        ("updated", "Updated Events", updated, renderer.updated),
+    ):
+        if not events:
+            continue
+        if over_budget or (budget and renderer.size >= budget):
+            over_budget = True
+            omitted[key] = len(events)
+            continue
+        renderer.heading(title)
+        for i, event in enumerate(events):
+            if budget and renderer.size >= budget:
+                over_budget = True
+                omitted[key] = len(events) - i
+                break
+            render(event)
+    if over_budget:
+        renderer.write(
+            f"... {sum(omitted.values())} more changes not shown "
+            f"({omitted['added']} added, {omitted['removed']} removed, {omitted['updated']} updated).\n"
+            f"The full change set is attached as {CHANGES_ATTACHMENT}.\n"
+        )
+    plain, html_text = renderer.getvalue()
+    return plain, html_text, omitted
+
+
+def render_summary(
+    added: List[Dict[str, Any]],
+    removed: List[Dict[str, Any]],
+    updated: List[Dict[str, Any]],
+) -> Tuple[str, str]:
+    """Render the ``(plain, html)`` summary bodies for a change set."""
+    plain, html_text, _ = _render(added, removed, updated)
+    return plain, html_text
+
+
+def render_summary_capped(
+    added: List[Dict[str, Any]],
+    removed: List[Dict[str, Any]],
+    updated: List[Dict[str, Any]],
+    budget: int,
+) -> Tuple[str, str, int]:
+    """Render the summary bodies, stopping once they reach `budget` characters.
+
+    Events are rendered in order until the combined size of both bodies
+    reaches the budget; the rest are replaced by a note with per-section
+    counts that points to the `CHANGES_ATTACHMENT`. A budget of 0 renders
+    everything.
+
+    Returns:
+        ``(plain, html, omitted)`` where ``omitted`` is the number of changes
+        left out of the bodies.
+    """
+    plain, html_text, omitted = _render(added, removed, updated, budget)
+    return plain, html_text, sum(omitted.values())
+
+
+_CSV_COLUMNS = (
+    "change",
+    "uid",
+    "summary",
+    "start",
+    "end",
+    "location",
+    "description",
+    "old_start",
+    "old_end",
+    "old_location",
+    "old_description",
+)
+
+
+def changes_csv_gz(
+    added: List[Dict[str, Any]],
+    removed: List[Dict[str, Any]],
+    updated: List[Dict[str, Any]],
+) -> bytes:
+    """Return the full change set as a gzip-compressed CSV, one row per change.
+
+    Updated rows carry the new values in the main columns and the previous
+    ones in the ``old_*`` columns.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(_CSV_COLUMNS)
+    for event in added:
+        writer.writerow((
+            "added", event.get("uid"), event.get("summary"),
+            event.get("dtstart") or event.get("start_time"), event.get("dtend") or event.get("end_time"),
+            event.get("location"), event.get("description"), None, None, None, None,
+        ))
+    for event in removed:
+        writer.writerow((
+            "removed", event.get("uid"), event.get("summary"),
+            event.get("start_time"), event.get("end_time"),
+            event.get("location"), event.get("description"), None, None, None, None,
+        ))
+    for event in updated:
+        writer.writerow((
+            "updated", event.get("uid"), event.get("summary"),
+            event.get("new_start"), event.get("new_end"),
+            event.get("new_location"), event.get("new_description"),
+            event.get("old_start"), event.get("old_end"),
+            event.get("old_location"), event.get("old_description"),
+        ))
+    return gzip.compress(buffer.getvalue().encode("utf-8"))
@@ -6,7 +6,21 @@ operations for events.
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Set, Optional
+from typing import List, Dict, Any, Iterator, Set, Optional, Tuple
+
+
+# fields returned by the read API; everything else stays internal
+EVENT_FIELDS = (
+    "uid",
+    "summary",
+    "start_time",
+    "end_time",
+    "location",
+    "description",
+    "sequence",
+    "last_modified",
+    "updated_at",
+)
 
 
 class EventRepository:
@@ -71,30 +85,193 @@ class EventRepository:
         now = datetime.now(timezone.utc).isoformat()
         for event_data in events:
             if not self.collection.find_one({"uid": event_data["uid"]}):
-                doc = {
-                    "uid": event_data["uid"],
-                    "summary": event_data.get("summary"),
-                    "start_time": event_data.get("dtstart"),
-                    "end_time": event_data.get("dtend"),
-                    "description": event_data.get("description"),
-                    "location": event_data.get("location"),
-                    "created_at": now,
-                    "updated_at": now,
-                }
-                self.collection.insert_one(doc)
+                self.collection.insert_one(_to_document(event_data, now))
+
+    def insert_new_events(self, events: List[Dict[str, Any]]) -> None:
+        """Insert event dicts already known to be absent from the collection.
+
+        Unlike `insert_events` this does not look up each uid first, and it
+        uses a single `insert_many` round trip when the collection supports it.
+        """
+        if not events:
+            return
+        now = datetime.now(timezone.utc).isoformat()
+        docs = [_to_document(event_data, now) for event_data in events]
+        if hasattr(self.collection, "insert_many"):
+            self.collection.insert_many(docs, ordered=False)
+            return
+        for doc in docs:
+            self.collection.insert_one(doc)
+
+    def iter_docs_sorted_by_uid(self, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Stream every stored document in ascending `uid` order.
+
+        Served from the unique `uid` index so the cursor never has to be
+        materialized in memory. Fake collections without cursor sorting are
+        sorted in Python instead.
+        """
+        cursor = self.collection.find({})
+        if not isinstance(cursor, (list, tuple)) and hasattr(cursor, "sort"):
+            cursor = cursor.sort("uid", 1)
+            if hasattr(cursor, "batch_size"):
+                cursor = cursor.batch_size(batch_size)
+            return iter(cursor)
+        docs = list(cursor)
+        # Lightweight fakes may only return uid placeholders (or nothing) for an
+        # unfiltered find; prefer their full `docs` list when exposed.
+        if hasattr(self.collection, "docs") and all("summary" not in d for d in docs):
+            docs = list(getattr(self.collection, "docs", []))
+        return iter(sorted(docs, key=lambda d: d["uid"]))
+
+    def bulk_update(self, updates: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Apply several `$set` updates keyed by uid in one round trip.
+
+        Falls back to one `update_one` per entry when the collection does not
+        implement `bulk_write`.
+        """
+        if not updates:
+            return
+        if hasattr(self.collection, "bulk_write"):
+            try:
+                from pymongo import UpdateOne
+            except Exception:
+                UpdateOne = None  # type: ignore
+            if UpdateOne is not None:
+                self.collection.bulk_write(
+                    [UpdateOne({"uid": uid}, {"$set": payload}) for uid, payload in updates],
+                    ordered=False,
+                )
+                return
+        for uid, payload in updates:
+            self.update_one(uid, payload)
+
+    def query_events(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        locations: Optional[List[str]] = None,
+        after: Optional[Tuple[Any, str]] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """Return one page of stored events ordered by ``(start_time, uid)``.
+
+        Served from the ``(start_time, uid)`` index: the time range bounds the
+        index scan and `after` continues strictly past the last row of the
+        previous page (keyset pagination), so deep pages cost the same as the
+        first one. Only `EVENT_FIELDS` are returned.
+
+        Args:
+            start: inclusive lower bound on `start_time`.
+            end: exclusive upper bound on `start_time`.
+            locations: keep only events at one of these exact locations.
+            after: ``(start_time, uid)`` of the last event already returned.
+            limit: maximum number of events to return.
+        """
+        query, projection = _event_query(start, end, locations, after)
+        cursor = self.collection.find(query, projection).sort(_EVENT_ORDER).limit(limit)
+        return list(cursor)
+
+    def iter_events(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        locations: Optional[List[str]] = None,
+        after: Optional[Tuple[Any, str]] = None,
+        batch_size: int = 500,
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream every stored event matching the filters of `query_events`.
+
+        Same order, filters and projection, but unpaged: documents are pulled
+        from the cursor in batches of `batch_size` as the caller consumes them.
+        """
+        query, projection = _event_query(start, end, locations, after)
+        return iter(self.collection.find(query, projection).sort(_EVENT_ORDER).batch_size(batch_size))
+
+    def state_version(self) -> str:
+        """Return a marker that changes whenever events are inserted, updated or removed.
+
+        Combines the document count (changed by inserts and removals) with the
+        newest `updated_at` (refreshed by every insert and update); both come
+        from collection metadata or the `updated_at` index.
+        """
+        count = self.collection.estimated_document_count()
+        latest = list(self.collection.find({}, {"_id": 0, "updated_at": 1}).sort("updated_at", -1).limit(1))
+        return f"{count}:{latest[0].get('updated_at', '') if latest else ''}"
+
+
+_EVENT_ORDER = [("start_time", 1), ("uid", 1)]
+
+
+def _event_query(
+    start: Optional[datetime],
+    end: Optional[datetime],
+    locations: Optional[List[str]],
+    after: Optional[Tuple[Any, str]],
+) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """Build the filter and projection shared by `query_events` and `iter_events`."""
+    clauses: List[Dict[str, Any]] = []
+    time_range: Dict[str, Any] = {}
+    if start is not None:
+        time_range["$gte"] = start
+    if end is not None:
+        time_range["$lt"] = end
+    if time_range:
+        clauses.append({"start_time": time_range})
+    if locations:
+        clauses.append({"location": {"$in": list(locations)}})
+    if after is not None:
+        clauses.append(_after_clause(*after))
+    query = clauses[0] if len(clauses) == 1 else ({"$and": clauses} if clauses else {})
+    return query, {"_id": 0, **{name: 1 for name in EVENT_FIELDS}}
+
+
+def _after_clause(after_start: Any, after_uid: str) -> Dict[str, Any]:
+    """Keyset predicate for rows strictly after ``(after_start, after_uid)``.
+
+    `start_time` is null for all-day events and a raw string when the feed
+    value did not parse, and MongoDB sorts those brackets before dates
+    (null < string < date). ``$gt`` never crosses a type bracket, so the
+    later brackets are matched by type explicitly.
+    """
+    same_start = {"start_time": after_start, "uid": {"$gt": after_uid}}
+    if after_start is None:
+        return {"$or": [same_start, {"start_time": {"$type": ["string", "date"]}}]}
+    if isinstance(after_start, str):
+        return {"$or": [{"start_time": {"$gt": after_start}}, same_start, {"start_time": {"$type": "date"}}]}
+    return {"$or": [{"start_time": {"$gt": after_start}}, same_start]}
+
+
+def _to_document(event_data: Dict[str, Any], now: str) -> Dict[str, Any]:
+    """Build the stored document for a fetched event dict."""
+    return {
+        "uid": event_data["uid"],
+        "summary": event_data.get("summary"),
+        "start_time": event_data.get("dtstart"),
+        "end_time": event_data.get("dtend"),
+        "description": event_data.get("description"),
+        "description_hash": event_data.get("description_hash"),
+        "location": event_data.get("location"),
+        "sequence": event_data.get("sequence"),
+        "last_modified": event_data.get("last_modified"),
+        "dtstamp": event_data.get("dtstamp"),
+        "created_at": now,
+        "updated_at": now,
+    }
 
 
 def create_indexes(events_collection: object) -> None:
     """Create recommended indexes for the events collection.
 
-    Creates a unique index on `uid` and a non-unique index on `start_time`
-    to support efficient queries for deletions and searches.
+    Creates a unique index on `uid`, a compound ``(start_time, uid)`` index
+    serving time-range queries and keyset pagination, and an `updated_at`
+    index for `EventRepository.state_version`.
     """
     try:
         # create_index is a pymongo Collection method; this will be a no-op for
         # fake collections used in tests that don't implement it.
         events_collection.create_index([("uid", 1)], unique=True)
-        events_collection.create_index([("start_time", 1)])
+        events_collection.create_index([("start_time", 1), ("uid", 1)])
+        events_collection.create_index([("updated_at", 1)])
     except Exception:
         # Ignore if the collection doesn't support index creation (e.g., fakes)
         return
@@ -0,0 +1,167 @@
+"""Sorted-merge diff engine for very large calendars.
+
+Both the fetched events and the stored snapshot are walked in ascending `uid`
+order and merge-joined, so the stored side is never materialized in memory.
+Changes are emitted as a generator of ``(kind, record)`` pairs while the
+corresponding writes are buffered and flushed in batches as the merge
+advances.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import repository
+from .change_detector import build_update, is_removable
+
+logger = logging.getLogger(__name__)
+
+ADDED = "added"
+REMOVED = "removed"
+UPDATED = "updated"
+
+DEFAULT_BATCH_SIZE = 500
+
+# applies one flushed batch: (repo, inserts, updates, deletes)
+ApplyFn = Callable[
+    [repository.EventRepository, List[Dict[str, Any]], List[Tuple[str, Dict[str, Any]]], List[str]], None
+]
+
+
+def merge_join(
+    fetched: Iterable[Dict[str, Any]], stored: Iterable[Dict[str, Any]]
+) -> Iterator[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+    """Merge-join two uid-sorted streams.
+
+    Args:
+        fetched: fetched event dicts sorted by `uid`.
+        stored: stored documents sorted by `uid`.
+
+    Yields:
+        ``(event, None)`` for uids only in the feed, ``(None, doc)`` for uids
+        only in the store and ``(event, doc)`` for uids present in both.
+        Repeated uids in the feed (e.g. recurrence overrides) are only matched
+        once; later duplicates are skipped.
+    """
+    fetched_it = iter(fetched)
+    stored_it = iter(stored)
+    ev = next(fetched_it, None)
+    doc = next(stored_it, None)
+    last_uid: Optional[str] = None
+
+    while ev is not None or doc is not None:
+        if ev is not None and ev["uid"] == last_uid:
+            ev = next(fetched_it, None)
+            continue
+        if doc is None or (ev is not None and ev["uid"] < doc["uid"]):
+            last_uid = ev["uid"]
+            yield ev, None
+            ev = next(fetched_it, None)
+        elif ev is None or doc["uid"] < ev["uid"]:
+            yield None, doc
+            doc = next(stored_it, None)
+        else:
+            last_uid = ev["uid"]
+            yield ev, doc
+            ev = next(fetched_it, None)
+            doc = next(stored_it, None)
+
+
+def apply_writes(
+    repo: repository.EventRepository,
+    inserts: List[Dict[str, Any]],
+    updates: List[Tuple[str, Dict[str, Any]]],
+    deletes: List[str],
+) -> None:
+    """Write one batch of inserts, updates and deletes through `repo`."""
+    if inserts:
+        repo.insert_new_events(inserts)
+    if updates:
+        repo.bulk_update(updates)
+    if deletes:
+        repo.delete_by_uids(deletes)
+
+
+class _BatchWriter:
+    """Buffers inserts, updates and deletes and flushes them every `batch_size`."""
+
+    def __init__(self, repo: repository.EventRepository, batch_size: int, apply: ApplyFn = apply_writes):
+        self.repo = repo
+        self.batch_size = max(1, batch_size)
+        self.apply = apply
+        self.inserts: List[Dict[str, Any]] = []
+        self.updates: List[Tuple[str, Dict[str, Any]]] = []
+        self.deletes: List[str] = []
+
+    def insert(self, event: Dict[str, Any]) -> None:
+        self.inserts.append(event)
+        self._maybe_flush()
+
+    def update(self, uid: str, set_payload: Dict[str, Any]) -> None:
+        self.updates.append((uid, set_payload))
+        self._maybe_flush()
+
+    def delete(self, uid: str) -> None:
+        self.deletes.append(uid)
+        self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        if len(self.inserts) + len(self.updates) + len(self.deletes) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.inserts or self.updates or self.deletes:
+            batch = (self.inserts, self.updates, self.deletes)
+            self.inserts, self.updates, self.deletes = [], [], []
+            self.apply(self.repo, *batch)
+
+
+def stream_diff(
+    events: Iterable[Dict[str, Any]],
+    repo: repository.EventRepository,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    stored: Optional[Iterable[Dict[str, Any]]] = None,
+    apply: ApplyFn = apply_writes,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Diff fetched events against the stored snapshot and apply the changes.
+
+    Args:
+        events: fetched event dicts in any order; they are sorted by uid here.
+        repo: repository providing the uid-sorted stored snapshot and writes.
+        batch_size: number of pending writes that triggers a flush.
+        stored: uid-sorted stored documents when already being read
+            elsewhere; defaults to `repo.iter_docs_sorted_by_uid`.
+        apply: called with each flushed batch; defaults to writing it
+            synchronously through `repo`.
+
+    Yields:
+        ``(kind, record)`` pairs where ``kind`` is one of ``"added"``,
+        ``"removed"`` or ``"updated"``. Added records are the fetched event,
+        removed records the stored document and updated records the same
+        payload `detect_and_apply_updates` returns. Pending writes are flushed
+        when the generator is exhausted or closed.
+    """
+    writer = _BatchWriter(repo, batch_size, apply)
+    fetched_sorted = sorted(events, key=lambda e: e["uid"])
+    if stored is None:
+        stored = repo.iter_docs_sorted_by_uid(batch_size)
+    try:
+        for ev, doc in merge_join(fetched_sorted, stored):
+            if doc is None:
+                writer.insert(ev)
+                yield ADDED, ev
+            elif ev is None:
+                if is_removable(doc):
+                    writer.delete(doc["uid"])
+                    yield REMOVED, doc
+            else:
+                change = build_update(ev, doc)
+                if change is None:
+                    continue
+                set_payload, record = change
+                if set_payload:
+                    writer.update(ev["uid"], set_payload)
+                if record is not None:
+                    yield UPDATED, record
+    finally:
+        writer.flush()
@@ -0,0 +1,164 @@
+"""Recipient subscriptions and per-recipient routing of change sets.
+
+Subscriptions come from the `RECIPIENT_SUBSCRIPTIONS` setting, a JSON list
+such as::
+
+    [
+        {"email": "ops@example.com"},
+        {"email": "arn@example.com", "locations": ["ARN"], "horizon_hours": 48},
+        {"email": "night@example.com", "summary_pattern": "(?i)night"}
+    ]
+
+Without it, `RECIPIENT_EMAIL` receives everything. `route` evaluates every
+filter in one pass over the change set and groups recipients whose filters
+select the same changes, so each distinct variant is rendered once.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, FrozenSet, List, Optional, Pattern, Tuple
+
+from . import utils
+
+logger = logging.getLogger(__name__)
+
+# indices into the (added, removed, updated) lists selected for one variant
+Selection = Tuple[Tuple[int, ...], Tuple[int, ...], Tuple[int, ...]]
+
+
+@dataclass(frozen=True)
+class Subscription:
+    """One recipient and the filters deciding which changes they receive.
+
+    An empty filter matches everything. ``locations`` match case-insensitively
+    against the event location (either side of an update), ``summary_pattern``
+    is a regular expression searched in the summary and ``horizon_hours``
+    keeps only events starting within that many hours from now.
+    """
+
+    email: str
+    locations: FrozenSet[str] = field(default_factory=frozenset)
+    summary_pattern: Optional[str] = None
+    horizon_hours: Optional[float] = None
+
+    @property
+    def filter_key(self) -> Tuple[Any, ...]:
+        return (self.locations, self.summary_pattern, self.horizon_hours)
+
+
+def load_subscriptions(config: Any) -> List[Subscription]:
+    """Return the configured subscriptions, defaulting to `RECIPIENT_EMAIL`.
+
+    Raises:
+        ValueError: `RECIPIENT_SUBSCRIPTIONS` is not a JSON list of objects
+            with an ``email`` key.
+    """
+    raw = getattr(config, "RECIPIENT_SUBSCRIPTIONS", None)
+    if not raw:
+        return [Subscription(config.RECIPIENT_EMAIL)]
+    try:
+        entries = json.loads(raw) if isinstance(raw, str) else raw
+        return [
+            Subscription(
+                email=entry["email"],
+                locations=frozenset(loc.strip().lower() for loc in entry.get("locations") or []),
+                summary_pattern=entry.get("summary_pattern"),
+                horizon_hours=entry.get("horizon_hours"),
+            )
+            for entry in entries
+        ]
+    except (TypeError, KeyError, AttributeError, ValueError) as e:
+        raise ValueError(f"Invalid RECIPIENT_SUBSCRIPTIONS: {e}") from e
+
+
+def _starts(kind: str, record: Dict[str, Any]) -> List[Any]:
+    if kind == "updated":
+        return [record.get("new_start"), record.get("old_start")]
+    return [record.get("dtstart") or record.get("start_time")]
+
+
+def _locations(kind: str, record: Dict[str, Any]) -> List[str]:
+    if kind == "updated":
+        values = [record.get("new_location"), record.get("old_location")]
+    else:
+        values = [record.get("location")]
+    return [v.strip().lower() for v in values if v]
+
+
+class _Filter:
+    """A subscription filter with its pattern compiled and horizon resolved."""
+
+    def __init__(self, subscription: Subscription, now: datetime):
+        self.locations = subscription.locations
+        self.pattern: Optional[Pattern[str]] = (
+            re.compile(subscription.summary_pattern) if subscription.summary_pattern else None
+        )
+        self.until = (
+            now + timedelta(hours=subscription.horizon_hours)
+            if subscription.horizon_hours is not None
+            else None
+        )
+        self.now = now
+
+    def matches(self, kind: str, record: Dict[str, Any]) -> bool:
+        if self.locations and not self.locations.intersection(_locations(kind, record)):
+            return False
+        if self.pattern is not None and not self.pattern.search(record.get("summary") or ""):
+            return False
+        if self.until is not None:
+            starts = [utils.parse_dt(v) for v in _starts(kind, record)]
+            if not any(dt is not None and self.now <= dt <= self.until for dt in starts):
+                return False
+        return True
+
+
+def route(
+    subscriptions: List[Subscription],
+    added: List[Dict[str, Any]],
+    removed: List[Dict[str, Any]],
+    updated: List[Dict[str, Any]],
+    now: Optional[datetime] = None,
+) -> Dict[Selection, List[str]]:
+    """Group recipients by the changes their filters select.
+
+    Identical filters are evaluated once, and every change is visited once
+    with all distinct filters applied to it.
+
+    Returns:
+        A mapping from a selection (indices of the chosen added, removed and
+        updated records) to the recipients of that variant. Recipients whose
+        filters select nothing are left out.
+    """
+    now = now or datetime.now(timezone.utc)
+    by_filter: Dict[Tuple[Any, ...], List[str]] = {}
+    filters: Dict[Tuple[Any, ...], _Filter] = {}
+    for sub in subscriptions:
+        by_filter.setdefault(sub.filter_key, []).append(sub.email)
+        if sub.filter_key not in filters:
+            filters[sub.filter_key] = _Filter(sub, now)
+
+    keys = list(filters)
+    picks: Dict[Tuple[Any, ...], Tuple[List[int], List[int], List[int]]] = {k: ([], [], []) for k in keys}
+    for slot, (kind, records) in enumerate((("added", added), ("removed", removed), ("updated", updated))):
+        for i, record in enumerate(records):
+            for key in keys:
+                if filters[key].matches(kind, record):
+                    picks[key][slot].append(i)
+
+    variants: Dict[Selection, List[str]] = {}
+    for key in keys:
+        selection = tuple(tuple(indices) for indices in picks[key])
+        if any(selection):
+            variants.setdefault(selection, []).extend(by_filter[key])  # type: ignore[arg-type]
+    return variants
+
+
+def select(records: List[Dict[str, Any]], indices: Tuple[int, ...]) -> List[Dict[str, Any]]:
+    """Return the records at `indices`, reusing the list when all are selected."""
+    if len(indices) == len(records):
+        return records
+    return [records[i] for i in indices]
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import Optional
+import atexit
+import functools
+from typing import Callable, Optional
 from flask import Flask
 import logging
 
@@ -31,6 +33,8 @@ def init_extensions(app: Flask) -> None:
         logger.info("No app_config on app; skipping extension initialization")
         return
 
+    init_mail(app)
+
     host = getattr(cfg, "MONGO_HOST", None)
     db_name = getattr(cfg, "MONGO_DB", None)
     coll_name = getattr(cfg, "MONGO_COLLECTION", None)
@@ -51,16 +55,40 @@ def init_extensions(app: Flask) -> None:
         client = MongoClient(mongo_uri)
         db = client[db_name]
         events_collection = db[coll_name]
+        digest_collection = db[f"{coll_name}_digest"]
+        locks_collection = db[f"{coll_name}_locks"]
+        jobs_collection = db[f"{coll_name}_jobs"]
         # attempt to create recommended indexes for the events collection
         try:
             from .event import repository as event_repository
             event_repository.create_indexes(events_collection)
+            digest_collection.create_index("uid", unique=True)
+            jobs_collection.create_index([("status", 1), ("finished_at", -1)])
         except Exception:
             logger.exception("Failed to create indexes on events collection; continuing")
         # attach to app.extensions for consumption by services and blueprints
         app.extensions = getattr(app, "extensions", {})
         app.extensions["mongo_client"] = client
+        app.extensions["mongo_db"] = db
         app.extensions["events_collection"] = events_collection
+        app.extensions["digest_collection"] = digest_collection
+        app.extensions["locks_collection"] = locks_collection
+        # async trigger-check job states, readable by every web worker (see rest/jobs.py)
+        app.extensions["jobs_collection"] = jobs_collection
+
+        # serialises each feed's check across the scheduler process and the
+        # web workers (see scheduler/leader.py)
+        from .scheduler.leader import CheckLock
+
+        def make_check_lock(job_id: str) -> CheckLock:
+            return CheckLock(
+                locks_collection,
+                f"{job_id}:run",
+                ttl_seconds=getattr(cfg, "CHECK_LOCK_SECONDS", 60),
+                max_clock_skew=getattr(cfg, "LEADER_MAX_CLOCK_SKEW_SECONDS", 5),
+            )
+
+        app.extensions["make_check_lock"] = make_check_lock
         # provide a factory to create configured EventService instances so
         # callers (scheduler, blueprints) don't construct Mongo clients directly
         try:
@@ -71,16 +99,20 @@ def init_extensions(app: Flask) -> None:
             def make_event_service(
                 cfg=None,
                 fetcher_cls: type = WebcalFetcher,
-                email_sender_cls: type = MailService,
+                email_sender_cls: Optional[Callable] = None,
                 events_collection_override: Optional[object] = None,
             ) -> EventService:
                 config_obj = cfg or getattr(app, "app_config")
                 coll = events_collection_override or events_collection
+                # each feed buffers its digest next to its own events collection
+                digest = db[f"{coll.name}_digest"] if events_collection_override is not None else digest_collection
+                sender_cls = email_sender_cls or app.extensions.get("email_sender_cls", MailService)
                 return EventService(
                     config=config_obj,
                     fetcher_cls=fetcher_cls,
-                    email_sender_cls=email_sender_cls,
+                    email_sender_cls=sender_cls,
                     events_collection=coll,
+                    digest_collection=digest,
                 )
 
             app.extensions["make_event_service"] = make_event_service
@@ -90,3 +122,86 @@ def init_extensions(app: Flask) -> None:
         logger.info("Mongo client and events collection attached to app.extensions")
     except Exception:
         logger.exception("Failed to initialize Mongo client; continuing without DB")
+
+
+def init_mail(app: Flask) -> None:
+    """Create the app-owned SMTP transport and the email sender factory.
+
+    Attaches `app.extensions['smtp_transport']` (a pooled `SMTPTransport`) and
+    `app.extensions['email_sender_cls']`, a `MailService` factory bound to that
+    transport so every summary email reuses the same authenticated sessions.
+    With `MAIL_QUEUE_ENABLED`, the factory enqueues onto a background
+    `MailQueue` (also attached as `app.extensions['mail_queue']`) instead of
+    sending inline. With `MAIL_OUTBOX_DIR`, every message is first spooled to
+    a durable `Outbox` (`app.extensions['mail_outbox']`) and delivered by
+    draining it; `app.extensions['drain_outbox']` retries due messages and is
+    run periodically by the scheduler. Nothing is attached when SMTP is not
+    configured.
+
+    Args:
+        app: the Flask application instance
+    """
+    from .mail.sender import MailService
+    from .mail.transport import SMTPTransport
+
+    cfg = app.app_config
+    server = getattr(cfg, "SMTP_SERVER", None)
+    if not server:
+        logger.info("SMTP_SERVER not configured; skipping mail transport init")
+        return
+
+    transport = SMTPTransport(
+        server,
+        getattr(cfg, "SMTP_PORT", 587),
+        getattr(cfg, "SMTP_USERNAME", None),
+        getattr(cfg, "SMTP_PASSWORD", None),
+        pool_size=getattr(cfg, "SMTP_POOL_SIZE", 1),
+        use_tls=getattr(cfg, "SMTP_USE_TLS", True),
+        health_check_interval=getattr(cfg, "SMTP_HEALTH_CHECK_SECONDS", 30),
+    )
+    atexit.register(transport.close)
+    app.extensions = getattr(app, "extensions", {})
+    app.extensions["smtp_transport"] = transport
+    app.extensions["email_sender_cls"] = functools.partial(MailService, transport=transport)
+
+    outbox = None
+    outbox_dir = getattr(cfg, "MAIL_OUTBOX_DIR", None)
+    if outbox_dir:
+        from .mail.outbox import Outbox
+
+        outbox = Outbox(
+            outbox_dir,
+            base_delay=getattr(cfg, "MAIL_OUTBOX_BASE_DELAY_SECONDS", 30),
+            max_delay=getattr(cfg, "MAIL_OUTBOX_MAX_DELAY_SECONDS", 3600),
+            max_attempts=getattr(cfg, "MAIL_OUTBOX_MAX_ATTEMPTS", 10),
+        )
+        app.extensions["mail_outbox"] = outbox
+
+    if getattr(cfg, "MAIL_QUEUE_ENABLED", False) or outbox is not None:
+        sender = MailService(
+            server,
+            getattr(cfg, "SMTP_PORT", 587),
+            getattr(cfg, "SMTP_USERNAME", None),
+            getattr(cfg, "SMTP_PASSWORD", None),
+            # the outbox owns retries across ticks; one attempt per drain
+            max_retries=1 if outbox is not None else 3,
+            transport=transport,
+        )
+    if outbox is not None:
+        app.extensions["drain_outbox"] = functools.partial(outbox.drain, sender)
+        app.extensions["email_sender_cls"] = outbox.sender_cls(sender)
+
+    if getattr(cfg, "MAIL_QUEUE_ENABLED", False):
+        from .mail.outbound import MailQueue
+
+        mail_queue = MailQueue(
+            sender,
+            maxsize=getattr(cfg, "MAIL_QUEUE_MAXSIZE", 100),
+            enqueue_timeout=getattr(cfg, "MAIL_QUEUE_ENQUEUE_TIMEOUT_SECONDS", 0.0),
+            outbox=outbox,
+        )
+        mail_queue.start()
+        # registered after transport.close so it runs first (atexit is LIFO)
+        atexit.register(mail_queue.shutdown, getattr(cfg, "MAIL_QUEUE_SHUTDOWN_TIMEOUT_SECONDS", 30))
+        app.extensions["mail_queue"] = mail_queue
+        app.extensions["email_sender_cls"] = mail_queue.sender_cls()
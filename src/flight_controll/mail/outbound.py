@@ -0,0 +1,218 @@
+"""Asynchronous outbound mail queue.
+
+`MailQueue` decouples rendering from delivery: the pipeline enqueues the
+rendered message and returns immediately while a background worker thread
+hands it to the wrapped sender. The queue is bounded, exposes depth and
+latency statistics and can be flushed on shutdown.
+
+When an `Outbox` is attached, messages are spooled to disk synchronously on
+enqueue and the worker only drains the outbox, so nothing is lost if the
+process dies with messages still queued in memory.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class MailQueueFull(Exception):
+    """Raised when a message cannot be enqueued because the queue is full."""
+
+
+class MailQueue:
+    """Bounded queue of rendered messages drained by one worker thread.
+
+    Args:
+        sender: object with a `send_email(recipient, subject, body, html_body=None)`
+            method, typically a `MailService` bound to the shared transport.
+            A delivery counts as failed when it raises or returns False.
+        maxsize: maximum number of pending messages.
+        enqueue_timeout: seconds to wait for a free slot before raising
+            `MailQueueFull`; 0 fails immediately.
+        outbox: optional durable `Outbox`; see the module docstring.
+    """
+
+    def __init__(
+        self,
+        sender: Any,
+        maxsize: int = 100,
+        enqueue_timeout: float = 0.0,
+        outbox: Optional[Any] = None,
+    ):
+        self.sender = sender
+        self.enqueue_timeout = enqueue_timeout
+        self.outbox = outbox
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self._sent = 0
+        self._failed = 0
+        self._last_latency: Optional[float] = None
+        self._total_latency = 0.0
+
+    def start(self) -> None:
+        """Start the worker thread (idempotent)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="mail-queue", daemon=True)
+        self._thread.start()
+
+    def enqueue(
+        self,
+        recipient: str,
+        subject: str,
+        body: str,
+        html_body: Optional[str] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Queue a rendered message for delivery.
+
+        Raises:
+            MailQueueFull: the queue stayed full for `enqueue_timeout` seconds.
+        """
+        item = {
+            "recipient": recipient,
+            "subject": subject,
+            "body": body,
+            "html_body": html_body,
+            **kwargs,
+        }
+        if self.outbox is not None:
+            # durable first; the queued item is only a wake-up for the worker,
+            # so a full queue already has a drain pending and is not an error
+            self.outbox.put(
+                recipient,
+                subject,
+                body,
+                html_body,
+                attachments=kwargs.get("attachments"),
+                send_id=kwargs.get("send_id"),
+            )
+            try:
+                self._queue.put_nowait((time.monotonic(), None))
+            except queue.Full:
+                pass
+            return
+        try:
+            if self.enqueue_timeout > 0:
+                self._queue.put((time.monotonic(), item), timeout=self.enqueue_timeout)
+            else:
+                self._queue.put_nowait((time.monotonic(), item))
+        except queue.Full:
+            raise MailQueueFull(f"mail queue full ({self._queue.maxsize} pending)") from None
+        logger.info("mail_queue.enqueued", extra={"queue_depth": self._queue.qsize()})
+
+    def _run(self) -> None:
+        while True:
+            entry = self._queue.get()
+            try:
+                if entry is _STOP:
+                    return
+                enqueued_at, item = entry
+                self._deliver(enqueued_at, item)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, enqueued_at: float, item: Optional[Dict[str, Any]]) -> None:
+        started = time.monotonic()
+        try:
+            if item is None:
+                self.outbox.drain(self.sender)
+                ok = True
+            else:
+                # MailService logs and returns False instead of raising
+                ok = self.sender.send_email(**item) is not False
+                if not ok:
+                    logger.error("mail_queue.failed to deliver queued email to %s", item["recipient"])
+        except Exception:
+            logger.exception("mail_queue.failed to deliver queued email")
+            ok = False
+        finished = time.monotonic()
+        latency = finished - enqueued_at
+        with self._stats_lock:
+            if ok:
+                self._sent += 1
+            else:
+                self._failed += 1
+            self._last_latency = latency
+            self._total_latency += latency
+        logger.info(
+            "mail_queue.delivered",
+            extra={
+                "queue_depth": self._queue.qsize(),
+                "send_seconds": finished - started,
+                "send_latency_seconds": latency,
+                "status": "sent" if ok else "failed",
+            },
+        )
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued message has been handled.
+
+        Returns:
+            True if the queue drained, False if `timeout` elapsed first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def shutdown(self, timeout: Optional[float] = 30.0) -> None:
+        """Flush pending messages and stop the worker; used as the shutdown hook."""
+        if self._thread is None:
+            return
+        if not self.flush(timeout):
+            logger.error(
+                "mail_queue.shutdown timed out with %d messages pending", self._queue.qsize()
+            )
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, delivery counters and send latency."""
+        with self._stats_lock:
+            handled = self._sent + self._failed
+            return {
+                "queue_depth": self._queue.qsize(),
+                "sent": self._sent,
+                "failed": self._failed,
+                "last_latency_seconds": self._last_latency,
+                "avg_latency_seconds": self._total_latency / handled if handled else None,
+            }
+
+    def sender_cls(self) -> Callable[..., "QueuedSender"]:
+        """Return an `email_sender_cls`-compatible factory that enqueues."""
+
+        def factory(*args: Any, **kwargs: Any) -> QueuedSender:
+            return QueuedSender(self)
+
+        return factory
+
+
+class QueuedSender:
+    """`send_email`-compatible adapter that enqueues instead of sending."""
+
+    def __init__(self, mail_queue: MailQueue):
+        self.mail_queue = mail_queue
+
+    def send_email(
+        self,
+        recipient: str,
+        subject: str,
+        body: str,
+        html_body: Optional[str] = None,
+        **kwargs: Any,
+    ) -> None:
+        self.mail_queue.enqueue(recipient, subject, body, html_body=html_body, **kwargs)
@@ -0,0 +1,304 @@
+"""Durable on-disk email outbox.
+
+Every rendered message is written to a spool directory before any delivery is
+attempted, so a change summary survives SMTP outages and process restarts.
+Delivery is retried across ticks with exponential backoff and jitter, up to a
+bounded number of attempts.
+
+Spool layout (one JSON file per message, named by its idempotency key)::
+
+    <spool_dir>/pending/   waiting for (re)delivery
+    <spool_dir>/inflight/  claimed by a drainer (claims are atomic renames)
+    <spool_dir>/sent/      delivered; kept for de-duplication, then pruned
+    <spool_dir>/dead/      gave up after `max_attempts`
+
+The idempotency key identifies the logical send: the caller's send id (one
+per notification run and kind) plus the recipient. It is also used as the
+`Message-ID` header. Spooling the same send again is a no-op while its key is
+pending or sent, and a message re-sent after a crash between send and ack
+carries the same `Message-ID`, which receiving mail systems de-duplicate.
+Identical content from different runs (an event moved away and back) is
+delivered each time. Messages spooled without a send id get a unique key.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+INFLIGHT = "inflight"
+SENT = "sent"
+DEAD = "dead"
+
+
+def idempotency_key(recipient: str, send_id: str) -> str:
+    """Return a stable key for one logical send of a message to `recipient`."""
+    digest = hashlib.sha256()
+    for part in (send_id, recipient):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()[:32]
+
+
+class Outbox:
+    """File-backed spool with exponential-backoff redelivery.
+
+    Args:
+        spool_dir: directory holding the spool; created if missing.
+        base_delay: seconds before the first retry.
+        max_delay: cap on the retry delay.
+        max_attempts: attempts before a message is moved to `dead/`.
+        inflight_timeout: seconds after which an unacknowledged claim is
+            considered abandoned (crashed drainer) and requeued.
+        sent_retention: seconds to keep delivered messages for de-duplication.
+        clock: wall-clock function, injectable for tests.
+        rng: random function in [0, 1) used for jitter, injectable for tests.
+    """
+
+    def __init__(
+        self,
+        spool_dir: str,
+        base_delay: float = 30.0,
+        max_delay: float = 3600.0,
+        max_attempts: int = 10,
+        inflight_timeout: float = 600.0,
+        sent_retention: float = 24 * 3600.0,
+        clock: Callable[[], float] = time.time,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.spool_dir = spool_dir
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.inflight_timeout = inflight_timeout
+        self.sent_retention = sent_retention
+        self.clock = clock
+        self.rng = rng
+        for state in (PENDING, INFLIGHT, SENT, DEAD):
+            os.makedirs(os.path.join(spool_dir, state), exist_ok=True)
+
+    def _path(self, state: str, key: str) -> str:
+        return os.path.join(self.spool_dir, state, f"{key}.json")
+
+    def _write(self, state: str, record: Dict[str, Any]) -> None:
+        path = self._path(state, record["key"])
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(record, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+
+    def _read(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            logger.exception("outbox: unreadable spool file %s", path)
+            return None
+
+    def _keys(self, state: str) -> List[str]:
+        directory = os.path.join(self.spool_dir, state)
+        return [name[:-5] for name in os.listdir(directory) if name.endswith(".json")]
+
+    def put(
+        self,
+        recipient: str,
+        subject: str,
+        body: str,
+        html_body: Optional[str] = None,
+        key: Optional[str] = None,
+        attachments: Optional[List[Tuple[str, bytes, str]]] = None,
+        send_id: Optional[str] = None,
+    ) -> str:
+        """Durably spool a message for delivery.
+
+        Attachments are stored base64-encoded in the spool record.
+
+        Args:
+            send_id: identifies the logical send (e.g. notification run and
+                kind); the key is derived from it and the recipient. Without
+                it (and without `key`) the message gets a unique key.
+
+        Returns:
+            The message's idempotency key. Spooling a message whose key is
+            already pending, in flight or sent does nothing.
+        """
+        if key is None:
+            key = idempotency_key(recipient, send_id) if send_id else uuid.uuid4().hex
+        if any(os.path.exists(self._path(state, key)) for state in (PENDING, INFLIGHT, SENT)):
+            logger.info("outbox: message %s already spooled; skipping", key)
+            return key
+        now = self.clock()
+        self._write(
+            PENDING,
+            {
+                "key": key,
+                "recipient": recipient,
+                "subject": subject,
+                "body": body,
+                "html_body": html_body,
+                "attachments": [
+                    [filename, base64.b64encode(content).decode("ascii"), content_type]
+                    for filename, content, content_type in attachments or []
+                ],
+                "attempts": 0,
+                "created_at": now,
+                "next_attempt_at": now,
+                "last_error": None,
+            },
+        )
+        return key
+
+    def _claim(self, key: str) -> Optional[Dict[str, Any]]:
+        """Atomically move a pending record to inflight; None if another drainer won."""
+        inflight = self._path(INFLIGHT, key)
+        try:
+            os.replace(self._path(PENDING, key), inflight)
+        except FileNotFoundError:
+            return None
+        # mark the claim time so abandoned claims can be recovered
+        os.utime(inflight, (self.clock(), self.clock()))
+        return self._read(inflight)
+
+    def _requeue_abandoned(self, now: float) -> None:
+        for key in self._keys(INFLIGHT):
+            path = self._path(INFLIGHT, key)
+            try:
+                claimed_at = os.path.getmtime(path)
+            except FileNotFoundError:
+                continue
+            if now - claimed_at >= self.inflight_timeout:
+                logger.warning("outbox: requeueing abandoned in-flight message %s", key)
+                try:
+                    os.replace(path, self._path(PENDING, key))
+                except FileNotFoundError:
+                    continue
+
+    def _prune_sent(self, now: float) -> None:
+        for key in self._keys(SENT):
+            path = self._path(SENT, key)
+            try:
+                if now - os.path.getmtime(path) >= self.sent_retention:
+                    os.remove(path)
+            except FileNotFoundError:
+                continue
+
+    def backoff(self, attempts: int) -> float:
+        """Return the jittered delay before retry number `attempts`."""
+        delay = min(self.max_delay, self.base_delay * (2 ** max(0, attempts - 1)))
+        return delay * (0.5 + self.rng())
+
+    def pending_count(self) -> int:
+        return len(self._keys(PENDING)) + len(self._keys(INFLIGHT))
+
+    def drain(self, sender: Any) -> int:
+        """Attempt delivery of every due message.
+
+        Args:
+            sender: object whose `send_email(recipient, subject, body,
+                html_body=..., message_id=...)` returns True on success.
+
+        Returns:
+            Number of messages delivered in this pass.
+        """
+        now = self.clock()
+        self._requeue_abandoned(now)
+        self._prune_sent(now)
+        delivered = 0
+        for key in sorted(self._keys(PENDING)):
+            record = self._read(self._path(PENDING, key))
+            if record is None or record.get("next_attempt_at", 0) > now:
+                continue
+            record = self._claim(key)
+            if record is None:
+                continue
+            if self._deliver(sender, record):
+                delivered += 1
+        return delivered
+
+    def _deliver(self, sender: Any, record: Dict[str, Any]) -> bool:
+        key = record["key"]
+        kwargs: Dict[str, Any] = {}
+        if record.get("attachments"):
+            kwargs["attachments"] = [
+                (filename, base64.b64decode(data), content_type)
+                for filename, data, content_type in record["attachments"]
+            ]
+        try:
+            ok = bool(
+                sender.send_email(
+                    record["recipient"],
+                    record["subject"],
+                    record["body"],
+                    html_body=record.get("html_body"),
+                    message_id=f"<{key}@flight-controll>",
+                    **kwargs,
+                )
+            )
+            error = None if ok else "sender reported failure"
+        except Exception as e:
+            logger.exception("outbox: delivery of %s raised", key)
+            ok, error = False, str(e)
+
+        if ok:
+            os.replace(self._path(INFLIGHT, key), self._path(SENT, key))
+            os.utime(self._path(SENT, key), (self.clock(), self.clock()))
+            logger.info("outbox: delivered %s", key, extra={"attempts": record["attempts"] + 1})
+            return True
+
+        record["attempts"] += 1
+        record["last_error"] = error
+        if record["attempts"] >= self.max_attempts:
+            self._write(DEAD, record)
+            os.remove(self._path(INFLIGHT, key))
+            logger.error("outbox: giving up on %s after %d attempts", key, record["attempts"])
+            return False
+        delay = self.backoff(record["attempts"])
+        record["next_attempt_at"] = self.clock() + delay
+        self._write(PENDING, record)
+        os.remove(self._path(INFLIGHT, key))
+        logger.warning(
+            "outbox: delivery of %s failed; retrying in %.0fs",
+            key,
+            delay,
+            extra={"attempts": record["attempts"]},
+        )
+        return False
+
+    def sender_cls(self, delivery: Any) -> Callable[..., "OutboxSender"]:
+        """Return an `email_sender_cls`-compatible factory that spools first."""
+
+        def factory(*args: Any, **kwargs: Any) -> OutboxSender:
+            return OutboxSender(self, delivery)
+
+        return factory
+
+
+class OutboxSender:
+    """`send_email`-compatible adapter: spool the message, then drain due mail."""
+
+    def __init__(self, outbox: Outbox, delivery: Any):
+        self.outbox = outbox
+        self.delivery = delivery
+
+    def send_email(
+        self,
+        recipient: str,
+        subject: str,
+        body: str,
+        html_body: Optional[str] = None,
+        attachments: Optional[List[Tuple[str, bytes, str]]] = None,
+        send_id: Optional[str] = None,
+    ) -> None:
+        self.outbox.put(recipient, subject, body, html_body, attachments=attachments, send_id=send_id)
+        self.outbox.drain(self.delivery)
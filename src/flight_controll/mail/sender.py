@@ -1,11 +1,50 @@
 import logging
 import smtplib
-from typing import Optional
+from typing import List, Optional, Tuple
+from email.mime.application import MIMEApplication
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+from .outbox import idempotency_key
+from .transport import SMTPTransport
+
 logger = logging.getLogger(__name__)
 
+# (filename, content, MIME type), e.g. ("changes.csv.gz", b"...", "application/gzip")
+Attachment = Tuple[str, bytes, str]
+
+
+def build_message(
+    sender: str,
+    recipient: str,
+    subject: str,
+    body: str,
+    html_body: Optional[str] = None,
+    message_id: Optional[str] = None,
+    attachments: Optional[List[Attachment]] = None,
+) -> MIMEMultipart:
+    """Build the MIME message: plain-text body, optional HTML alternative and attachments."""
+    msg = MIMEMultipart()
+    msg["From"] = sender
+    msg["To"] = recipient
+    msg["Subject"] = subject
+    if message_id:
+        msg["Message-ID"] = message_id
+
+    if html_body is None:
+        msg.attach(MIMEText(body, "plain"))
+    else:
+        alternative = MIMEMultipart("alternative")
+        alternative.attach(MIMEText(body, "plain"))
+        alternative.attach(MIMEText(html_body, "html"))
+        msg.attach(alternative)
+
+    for filename, content, content_type in attachments or []:
+        part = MIMEApplication(content, _subtype=content_type.split("/", 1)[-1])
+        part.add_header("Content-Disposition", "attachment", filename=filename)
+        msg.attach(part)
+    return msg
+
 
 class EmailSender:
     """Sends email via SMTP. Accepts an optional `smtp_class` parameter for easier
@@ -35,19 +74,12 @@ class EmailSender:
         subject: str,
         body: str,
         html_body: Optional[str] = None,
-    ) -> None:
-        msg = MIMEMultipart()
-        msg["From"] = self.username
-        msg["To"] = recipient
-        msg["Subject"] = subject
-
-        if html_body is None:
-            msg.attach(MIMEText(body, "plain"))
-        else:
-            alternative = MIMEMultipart("alternative")
-            alternative.attach(MIMEText(body, "plain"))
-            alternative.attach(MIMEText(html_body, "html"))
-            msg.attach(alternative)
+        attachments: Optional[List[Attachment]] = None,
+        send_id: Optional[str] = None,
+    ) -> bool:
+        """Send one message over a fresh connection; returns False (logged) on failure."""
+        # `send_id` is accepted for interface compatibility; this sender does not de-duplicate
+        msg = build_message(self.username, recipient, subject, body, html_body, attachments=attachments)
 
         try:
             smtp_cls = self.smtp_class or smtplib.SMTP
@@ -59,8 +91,10 @@ class EmailSender:
                     server.login(self.username, self.password)
                 server.send_message(msg)
             logger.info("Email sent to %s", recipient)
+            return True
         except Exception as e:
             logger.exception("Failed to send email to %s: %s", recipient, e)
+            return False
 
 
 class MailService:
@@ -69,6 +103,9 @@ class MailService:
     Maintains the same constructor signature as `EmailSender` for backward
     compatibility so it can be passed as `email_sender_cls` to services and
     blueprints. It attempts a small number of retries and logs failures.
+
+    When a shared `SMTPTransport` is given, messages go over its pooled,
+    already-authenticated sessions instead of a fresh connection per attempt.
     """
 
     def __init__(
@@ -80,6 +117,7 @@ class MailService:
         smtp_class: Optional[type] = None,
         timeout: int = 10,
         max_retries: int = 3,
+        transport: Optional[SMTPTransport] = None,
     ):
         self.smtp_server = smtp_server
         self.smtp_port = smtp_port
@@ -88,6 +126,7 @@ class MailService:
         self.smtp_class = smtp_class
         self.timeout = timeout
         self.max_retries = max_retries
+        self.transport = transport
         self.logger = logging.getLogger(__name__)
 
     def send_email(
@@ -96,7 +135,10 @@ class MailService:
         subject: str,
         body: str,
         html_body: Optional[str] = None,
-    ) -> None:
+        message_id: Optional[str] = None,
+        attachments: Optional[List[Attachment]] = None,
+        send_id: Optional[str] = None,
+    ) -> bool:
         """Send an email with retry/backoff. Raises nothing; exceptions are logged.
 
         Args:
@@ -104,32 +146,30 @@ class MailService:
             subject: email subject
             body: plain-text body
             html_body: optional HTML body
+            message_id: optional Message-ID header (used by the outbox as the
+                idempotency key)
+            attachments: optional ``(filename, content, mime_type)`` tuples
+            send_id: optional id of the logical send; without `message_id`
+                it yields the same Message-ID the outbox would use
+
+        Returns:
+            True if the message was handed to the relay, False if every
+            attempt failed.
         """
+        if message_id is None and send_id:
+            message_id = f"<{idempotency_key(recipient, send_id)}@flight-controll>"
+        # the MIME message is built once and reused across attempts
+        msg = build_message(self.username, recipient, subject, body, html_body, message_id, attachments)
         attempt = 0
         last_exc = None
         while attempt < self.max_retries:
             try:
-                smtp_cls = self.smtp_class or smtplib.SMTP
-                # pass timeout to SMTP constructor where supported
-                with smtp_cls(self.smtp_server, self.smtp_port, self.timeout) as server:
-                    if hasattr(server, "starttls"):
-                        server.starttls()
-                    if hasattr(server, "login"):
-                        server.login(self.username, self.password)
-                    msg = MIMEMultipart()
-                    msg["From"] = self.username
-                    msg["To"] = recipient
-                    msg["Subject"] = subject
-                    if html_body is None:
-                        msg.attach(MIMEText(body, "plain"))
-                    else:
-                        alternative = MIMEMultipart("alternative")
-                        alternative.attach(MIMEText(body, "plain"))
-                        alternative.attach(MIMEText(html_body, "html"))
-                        msg.attach(alternative)
-                    server.send_message(msg)
+                if self.transport is not None:
+                    self.transport.send_message(msg)
+                else:
+                    self._send_once(msg)
                 self.logger.info("Email sent to %s", recipient)
-                return
+                return True
             except Exception as e:
                 last_exc = e
                 self.logger.exception(
@@ -138,3 +178,15 @@ class MailService:
                 attempt += 1
         # all attempts failed
         self.logger.error("All %d attempts failed to send email to %s: %s", self.max_retries, recipient, last_exc)
+        return False
+
+    def _send_once(self, msg: MIMEMultipart) -> None:
+        """Send over a dedicated connection (used when no transport is shared)."""
+        smtp_cls = self.smtp_class or smtplib.SMTP
+        # pass timeout to SMTP constructor where supported
+        with smtp_cls(self.smtp_server, self.smtp_port, self.timeout) as server:
+            if hasattr(server, "starttls"):
+                server.starttls()
+            if hasattr(server, "login"):
+                server.login(self.username, self.password)
+            server.send_message(msg)
@@ -0,0 +1,161 @@
+"""Persistent, pooled SMTP transport.
+
+`SMTPTransport` keeps authenticated SMTP sessions open between messages so a
+multi-message run pays for connect, STARTTLS and LOGIN once. Idle sessions are
+health-checked with NOOP before reuse and replaced lazily when the relay has
+dropped them.
+"""
+from __future__ import annotations
+
+import logging
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from email.message import Message
+from typing import Any, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPTransport:
+    """A small pool of reusable, authenticated SMTP sessions.
+
+    Args:
+        smtp_server: SMTP relay host.
+        smtp_port: SMTP relay port.
+        username: login user; login is skipped when username or password is empty.
+        password: login password.
+        smtp_class: SMTP client class, defaults to `smtplib.SMTP` (resolved at
+            connect time so tests can patch it).
+        timeout: socket timeout passed to the SMTP client.
+        pool_size: maximum number of concurrent sessions.
+        use_tls: whether to issue STARTTLS after connecting.
+        health_check_interval: idle seconds after which a session is probed
+            with NOOP before reuse.
+    """
+
+    def __init__(
+        self,
+        smtp_server: str,
+        smtp_port: int,
+        username: Optional[str],
+        password: Optional[str],
+        smtp_class: Optional[type] = None,
+        timeout: int = 10,
+        pool_size: int = 1,
+        use_tls: bool = True,
+        health_check_interval: float = 30.0,
+    ):
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.username = username
+        self.password = password
+        self.smtp_class = smtp_class
+        self.timeout = timeout
+        self.pool_size = max(1, pool_size)
+        self.use_tls = use_tls
+        self.health_check_interval = health_check_interval
+        # guards `_idle` and `_open`; notified whenever a session or a slot frees up
+        self._cond = threading.Condition()
+        self._idle: List[Tuple[Any, float]] = []
+        self._open = 0
+        self.connects = 0
+
+    def _connect(self) -> Any:
+        smtp_cls = self.smtp_class or smtplib.SMTP
+        server = smtp_cls(self.smtp_server, self.smtp_port, timeout=self.timeout)
+        # only call starttls/login if provided by the smtp client
+        if self.use_tls and hasattr(server, "starttls"):
+            server.starttls()
+        if self.username and self.password and hasattr(server, "login"):
+            server.login(self.username, self.password)
+        with self._cond:
+            self.connects += 1
+        logger.info("Opened SMTP session to %s:%s", self.smtp_server, self.smtp_port)
+        return server
+
+    @staticmethod
+    def _is_alive(server: Any) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+
+    @staticmethod
+    def _discard(server: Any) -> None:
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _acquire(self) -> Any:
+        while True:
+            with self._cond:
+                # wait for an idle session or a free slot; broken sessions free slots too
+                while not self._idle and self._open >= self.pool_size:
+                    self._cond.wait()
+                if self._idle:
+                    server, idle_since = self._idle.pop()
+                else:
+                    self._open += 1
+                    server = None
+            if server is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    self._free_slot()
+                    raise
+            if time.monotonic() - idle_since < self.health_check_interval:
+                return server
+            if self._is_alive(server):
+                return server
+            logger.info("Idle SMTP session failed NOOP health check; reconnecting")
+            self._release(server, broken=True)
+
+    def _free_slot(self) -> None:
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def _release(self, server: Any, broken: bool = False) -> None:
+        if broken:
+            self._discard(server)
+            self._free_slot()
+            return
+        with self._cond:
+            self._idle.append((server, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def session(self) -> Iterator[Any]:
+        """Check out a live session; it is returned to the pool afterwards.
+
+        A session that raised while in use is closed instead of being reused.
+        """
+        server = self._acquire()
+        try:
+            yield server
+        except Exception:
+            self._release(server, broken=True)
+            raise
+        self._release(server)
+
+    def send_message(self, msg: Message) -> None:
+        """Send a prepared message over a pooled session.
+
+        Raises:
+            Exception: whatever the SMTP client raised; the session is dropped.
+        """
+        with self.session() as server:
+            server.send_message(msg)
+
+    def close(self) -> None:
+        """Close every idle session (sessions in use are closed on release)."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._release(server, broken=True)
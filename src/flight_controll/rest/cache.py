@@ -0,0 +1,109 @@
+"""In-memory cache for rendered API responses.
+
+`POST /events/fetch` downloads and parses the feed and queries Mongo on every
+call. `ResponseCache` keeps rendered bodies keyed by
+``(feed name, feed validator, stored-state version)``, with the feed name as
+the freshness scope, so the work is redone only when the feed or the stored
+events actually changed:
+
+- within `fresh_seconds` of the last validation the latest body for the
+  feed is returned straight from memory;
+- after that the feed is revalidated with a conditional request and the
+  state version re-read, and the body is reused if both still match.
+
+Entries expire after `ttl_seconds` and the least recently used entry is
+evicted beyond `max_entries`.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class ResponseCache:
+    """Thread-safe TTL + LRU cache with per-scope freshness tracking.
+
+    Args:
+        ttl_seconds: lifetime of an entry after it was stored.
+        max_entries: maximum number of entries kept.
+        fresh_seconds: how long after a validation `fresh` may answer
+            without revalidating; 0 always revalidates.
+        clock: monotonic clock, injectable for tests.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 300.0,
+        max_entries: int = 32,
+        fresh_seconds: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.fresh_seconds = fresh_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        # scope -> (key of the latest validated entry, validated at)
+        self._latest: Dict[Hashable, Tuple[Hashable, float]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: Hashable, now: float) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if now - stored_at >= self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for `key`, or None when missing or expired."""
+        with self._lock:
+            value = self._lookup(key, self.clock())
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (self.clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def validated(self, scope: Hashable, key: Hashable) -> None:
+        """Record that `key` is the current entry for `scope` as of now."""
+        with self._lock:
+            self._latest[scope] = (key, self.clock())
+
+    def latest_key(self, scope: Hashable) -> Optional[Hashable]:
+        """Return the key last validated for `scope`, if any."""
+        with self._lock:
+            latest = self._latest.get(scope)
+            return latest[0] if latest else None
+
+    def fresh(self, scope: Hashable) -> Optional[Any]:
+        """Return the latest value for `scope` if it was validated within `fresh_seconds`."""
+        with self._lock:
+            latest = self._latest.get(scope)
+            now = self.clock()
+            if latest is None or now - latest[1] >= self.fresh_seconds:
+                return None
+            value = self._lookup(latest[0], now)
+            if value is not None:
+                self.hits += 1
+            return value
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. after this process changed the stored events."""
+        with self._lock:
+            self._entries.clear()
+            self._latest.clear()
@@ -1,11 +1,120 @@
-from flask import Blueprint, current_app, jsonify
-from ..event.event_service import EventService
+import base64
+import gzip
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context, url_for
+from ..event import utils
+from ..event.event_service import EXCLUDED_LOCATIONS, EventService
+from ..event.ics import CalendarRenderer
+from ..event.repository import EventRepository
+from ..scheduler.feeds import Feed, FeedConfig, collection_name, load_feeds, select_feed
+from ..scheduler.leader import CheckLockTimeout
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NDJSON_MIMETYPE = "application/x-ndjson"
+# attached to fetched events for change detection; not part of the API
+INTERNAL_FIELDS = ("description_hash",)
+
+
+class BadQuery(ValueError):
+    """Raised for malformed query parameters; answered with 400."""
+
+
+def _encode_cursor(doc: Dict[str, Any]) -> str:
+    start = doc.get("start_time")
+    value = {"t": start.isoformat()} if isinstance(start, datetime) else start
+    raw = json.dumps([value, doc["uid"]], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[Any, str]:
+    try:
+        value, uid = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["t"])
+        return value, str(uid)
+    except (ValueError, TypeError, KeyError) as e:
+        raise BadQuery(f"invalid cursor: {cursor}") from e
+
+
+def _parse_time(name: str) -> Optional[datetime]:
+    raw = request.args.get(name)
+    if not raw:
+        return None
+    value = utils.parse_dt(raw)
+    if value is None:
+        raise BadQuery(f"invalid {name!r}: expected an ISO 8601 timestamp")
+    return value
+
+
+def _parse_limit() -> int:
+    raw = request.args.get("limit")
+    if raw is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise BadQuery(f"invalid 'limit': {raw}") from None
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise BadQuery(f"'limit' must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
+def _public(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Return `event` without its `INTERNAL_FIELDS`."""
+    return {k: v for k, v in event.items() if k not in INTERNAL_FIELDS}
+
+
+def _wants_ndjson() -> bool:
+    """True for ``?stream=1`` or an Accept header preferring NDJSON over JSON."""
+    if request.args.get("stream", "").lower() in ("1", "true", "yes"):
+        return True
+    # JSON listed first so ``*/*`` and missing Accept headers keep the JSON body
+    return request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def _ndjson_response(items: Iterable[Any]) -> Response:
+    """Stream `items` as newline-delimited JSON, one object per line, as they are produced.
+
+    The status line is sent before the first item, so an error while producing
+    cuts the stream short instead of turning into an error response.
+    """
+    def generate():
+        dumps = current_app.json.dumps
+        for item in items:
+            yield dumps(item) + "\n"
+
+    return Response(stream_with_context(generate()), status=200, mimetype=NDJSON_MIMETYPE)
 
 
 def create_event_api_blueprint() -> Blueprint:
     event_api = Blueprint("event_api", __name__)
 
-    def get_event_service() -> EventService:
+    @event_api.errorhandler(BadQuery)
+    def bad_query(e: BadQuery) -> tuple:
+        return jsonify({"error": str(e)}), 400
+
+    def current_feed() -> Feed:
+        """The feed named by ``?feed=``, or the default (or only) configured feed."""
+        try:
+            return select_feed(load_feeds(current_app.app_config), request.args.get("feed"))
+        except LookupError as e:
+            raise BadQuery(str(e)) from None
+
+    def feed_events_collection(feed: Feed) -> Optional[Any]:
+        """The collection `feed` is stored in, as chosen by the scheduler (see scheduler/feeds.py)."""
+        if feed.uses_default_collection:
+            return current_app.extensions.get("events_collection")
+        db = current_app.extensions.get("mongo_db")
+        return db[collection_name(feed, current_app.app_config.MONGO_COLLECTION)] if db is not None else None
+
+    def get_event_service(feed: Feed) -> EventService:
+        config = FeedConfig(current_app.app_config, feed)
+        own_collection = None if feed.uses_default_collection else feed_events_collection(feed)
         # Prefer factory from app.extensions to ensure consistent wiring.
         make_event_service = None
         try:
@@ -14,36 +123,237 @@ def create_event_api_blueprint() -> Blueprint:
             make_event_service = None
 
         if make_event_service:
-            return make_event_service(cfg=current_app.app_config)
+            if own_collection is not None:
+                return make_event_service(cfg=config, events_collection_override=own_collection)
+            return make_event_service(cfg=config)
 
-        config = current_app.app_config
         # fallback: prefer app-provided events collection when present
-        events_collection = None
+        events_collection = own_collection
+        if events_collection is None:
+            try:
+                events_collection = current_app.extensions.get("events_collection")
+            except Exception:
+                events_collection = None
+        kwargs = {"config": config, "events_collection": events_collection}
+        email_sender_cls = current_app.extensions.get("email_sender_cls")
+        if email_sender_cls is not None:
+            kwargs["email_sender_cls"] = email_sender_cls
+        return EventService(**kwargs)
+
+    @event_api.route("", methods=["GET"])
+    def list_events() -> Any:
+        """Stored events, filtered by ``from``/``to``/``location`` and paged by ``cursor``.
+
+        Answers 304 when the client's ETag still matches the query and the
+        collection's state version, without running the query. In NDJSON mode
+        every matching event after ``cursor`` is streamed and ``limit`` is
+        ignored.
+        """
+        events_collection = feed_events_collection(current_feed())
+        if events_collection is None:
+            return jsonify({"error": "event store not configured"}), 503
+        repo = EventRepository(events_collection)
         try:
-            events_collection = current_app.extensions.get("events_collection")
-        except Exception:
-            events_collection = None
-        return EventService(config=config, events_collection=events_collection)
+            start, end = _parse_time("from"), _parse_time("to")
+            limit = _parse_limit()
+            cursor = request.args.get("cursor")
+            after = _decode_cursor(cursor) if cursor else None
+        except BadQuery as e:
+            return jsonify({"error": str(e)}), 400
+
+        version = repo.state_version()
+        etag = hashlib.sha1(f"{version}|{request.query_string.decode('latin-1')}".encode("utf-8")).hexdigest()
+        ndjson = _wants_ndjson()
+        # the JSON page and the NDJSON stream are different representations
+        etag += "-ndjson" if ndjson else ""
+        if etag in request.if_none_match:
+            resp = Response(status=304)
+        elif ndjson:
+            docs = repo.iter_events(start, end, request.args.getlist("location"), after)
+            resp = _ndjson_response(docs)
+        else:
+            docs = repo.query_events(start, end, request.args.getlist("location"), after, limit)
+            next_cursor = _encode_cursor(docs[-1]) if len(docs) == limit else None
+            resp = jsonify({"events": docs, "next_cursor": next_cursor})
+        resp.set_etag(etag)
+        resp.vary.add("Accept")
+        resp.headers["Cache-Control"] = "no-cache"
+        return resp
+
+    @event_api.route("/calendar.ics", methods=["GET"])
+    def calendar_ics() -> Any:
+        """Upcoming stored events as an iCalendar feed, excluded locations stripped.
+
+        The window starts at the current hour, so the body and its ETag change
+        only when the stored events change or the hour turns. Bodies are
+        cached per ETag and gzip-compressed when the client accepts it; only
+        changed events are re-rendered (see `CalendarRenderer`).
+        """
+        feed = current_feed()
+        events_collection = feed_events_collection(feed)
+        if events_collection is None:
+            return jsonify({"error": "event store not configured"}), 503
+        repo = EventRepository(events_collection)
+        window_start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        gzipped = "gzip" in request.accept_encodings
+        version = repo.state_version()
+        etag = hashlib.sha1(f"{feed.name}|{version}|{window_start.isoformat()}".encode("utf-8")).hexdigest()
+        # each encoding is its own representation
+        etag += "-gzip" if gzipped else ""
+
+        if etag in request.if_none_match:
+            resp = Response(status=304)
+        else:
+            cache = current_app.extensions.get("calendar_cache")
+            body = cache.get(etag) if cache is not None else None
+            if body is None:
+                renderer = current_app.extensions.get("calendar_renderer") or CalendarRenderer()
+                excluded = {loc.lower() for loc in EXCLUDED_LOCATIONS}
+                docs = (
+                    doc
+                    for doc in repo.iter_events(start=window_start)
+                    if (doc.get("location") or "").strip().lower() not in excluded
+                )
+                body = renderer.render(docs).encode("utf-8")
+                if gzipped:
+                    # mtime=0 keeps the compressed bytes stable for the same body
+                    body = gzip.compress(body, mtime=0)
+                if cache is not None:
+                    cache.put(etag, body)
+            resp = Response(body, status=200, mimetype="text/calendar")
+            if gzipped:
+                resp.headers["Content-Encoding"] = "gzip"
+        resp.set_etag(etag)
+        resp.vary.add("Accept-Encoding")
+        resp.headers["Cache-Control"] = "no-cache"
+        return resp
+
+    def run_check_once(feed: Feed) -> tuple:
+        """Run `feed`'s check, joining an in-flight one; returns ``(events, run stats or None)``."""
+        services = []
+
+        def run_check():
+            services.append(get_event_service(feed))
+            make_check_lock = current_app.extensions.get("make_check_lock")
+            if not make_check_lock:
+                return services[0].fetch_persist_and_send_events()
+            # wait for a scheduled tick running in another process, then check again
+            ran, events = make_check_lock(feed.job_id).run(
+                services[0].fetch_persist_and_send_events,
+                wait_seconds=getattr(current_app.app_config, "CHECK_LOCK_WAIT_SECONDS", 60),
+            )
+            if not ran:
+                raise CheckLockTimeout("a check is still running in another process")
+            return events
+
+        # join an in-flight scheduled or manual check instead of starting another
+        single_flight = current_app.extensions.get("single_flight")
+        events = single_flight.run(feed.job_id, run_check) if single_flight else run_check()
+        stats = getattr(services[0], "last_run_stats", None) if services else None
+        return events, stats if isinstance(stats, dict) else None
+
+    def wants_async() -> bool:
+        if request.args.get("async", "").lower() in ("1", "true", "yes"):
+            return True
+        if "respond-async" in request.headers.get("Prefer", "").lower():
+            return True
+        return bool(getattr(current_app.app_config, "TRIGGER_CHECK_ASYNC", False))
 
     @event_api.route("/trigger-check", methods=["POST"])
     def trigger_check() -> tuple:
-        event_service = get_event_service()
-        events = event_service.fetch_persist_and_send_events()
-        return jsonify(events), 200
+        feed = current_feed()
+        job_registry = current_app.extensions.get("job_registry")
+        if job_registry is None or not wants_async():
+            try:
+                events, _ = run_check_once(feed)
+            except CheckLockTimeout as e:
+                return jsonify({"error": str(e)}), 409
+            invalidate_fetch_cache()
+            return jsonify([_public(e) for e in events]), 200
+
+        app = current_app._get_current_object()
+
+        def check_job() -> dict:
+            with app.app_context():
+                events, stats = run_check_once(feed)
+                invalidate_fetch_cache()
+            # counts are unknown when the job joined a check started elsewhere
+            stats = stats or {}
+            return {
+                "added": len(events),
+                "removed": stats.get("removed_count"),
+                "updated": stats.get("updated_count"),
+            }
+
+        job = job_registry.submit(feed.job_id, check_job)
+        location = url_for("event_api.get_job", job_id=job.id)
+        return jsonify(job.to_dict()), 202, {"Location": location}
+
+    @event_api.route("/jobs/<job_id>", methods=["GET"])
+    def get_job(job_id: str) -> tuple:
+        job_registry = current_app.extensions.get("job_registry")
+        job = job_registry.get(job_id) if job_registry is not None else None
+        if job is None:
+            return jsonify({"error": "job not found"}), 404
+        return jsonify(job.to_dict()), 200
+
+    def invalidate_fetch_cache() -> None:
+        cache = current_app.extensions.get("fetch_cache")
+        if cache is not None:
+            cache.clear()
 
     @event_api.route("/fetch-persist", methods=["POST"])
-    def fetch_persist() -> tuple:
-        event_service = get_event_service()
+    def fetch_persist() -> Any:
+        event_service = get_event_service(current_feed())
+        if _wants_ndjson():
+            def stored_events():
+                try:
+                    yield from event_service.iter_new_events(store=True)
+                finally:
+                    invalidate_fetch_cache()
+
+            return _ndjson_response(map(_public, stored_events()))
         events = event_service.fetch_events()
         events = event_service.filter_new_events(events)
         event_service.store_events(events)
-        return jsonify(events), 200
+        invalidate_fetch_cache()
+        return jsonify([_public(e) for e in events]), 200
+
+    def revalidate_fetch(cache: Any, feed: Feed) -> bytes:
+        """Render `/fetch` unless the cached body still matches the feed and stored state."""
+        scope = feed.name
+        event_service = get_event_service(feed)
+        latest = cache.latest_key(scope)
+        events = event_service.fetch_events_if_changed(latest[1] if latest else None)
+        validator = event_service.last_feed_validator
+        key = (scope, validator, event_service.repository.state_version())
+        body = cache.get(key) if validator else None
+        if body is None:
+            if events is None:
+                # the feed is unchanged but the stored events moved on
+                events = event_service.fetch_events_if_changed(None)
+            new_events = event_service.filter_new_events(events)
+            body = current_app.json.dumps([_public(e) for e in new_events]).encode("utf-8")
+            if validator:
+                cache.put(key, body)
+        if validator:
+            cache.validated(scope, key)
+        return body
 
     @event_api.route("/fetch", methods=["POST"])
-    def fetch() -> tuple:
-        event_service = get_event_service()
-        events = event_service.fetch_events()
-        events = event_service.filter_new_events(events)
-        return jsonify(events), 200
+    def fetch() -> Any:
+        feed = current_feed()
+        if _wants_ndjson():
+            return _ndjson_response(map(_public, get_event_service(feed).iter_new_events()))
+        cache = current_app.extensions.get("fetch_cache")
+        if cache is None:
+            event_service = get_event_service(feed)
+            events = event_service.fetch_events()
+            events = event_service.filter_new_events(events)
+            return jsonify([_public(e) for e in events]), 200
+        body = cache.fresh(feed.name)
+        if body is None:
+            body = revalidate_fetch(cache, feed)
+        return Response(body, status=200, mimetype="application/json")
 
     return event_api
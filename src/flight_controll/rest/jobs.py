@@ -0,0 +1,201 @@
+"""Background jobs for long-running API calls.
+
+`POST /events/trigger-check` with ``Prefer: respond-async`` (or
+``?async=true``) submits the check to a `JobRegistry` and answers
+``202 Accepted`` straight away; `GET /events/jobs/<id>` reports the job's
+status, timings and change counts. A submission while a job with the same key
+is still queued or running returns that job instead of starting another.
+Only the most recent finished jobs are kept.
+
+Given a Mongo collection, the registry also writes every job's state there,
+so a status poll answered by another web worker still finds the job. Jobs
+run (and are de-duplicated by key) in the worker that accepted them.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    # pymongo returns naive UTC datetimes unless the client is tz-aware
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class Job:
+    """State of one submitted job; `result` is the dict returned by its function."""
+
+    def __init__(self, key: str):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = QUEUED
+        self.submitted_at = datetime.now(timezone.utc)
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.duration_seconds: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+    @classmethod
+    def from_document(cls, doc: Dict[str, Any]) -> "Job":
+        """Rebuild a job from its stored document (see `JobRegistry`)."""
+        job = cls(doc["key"])
+        job.id = doc["_id"]
+        job.status = doc["status"]
+        job.submitted_at = _aware(doc.get("submitted_at"))
+        job.started_at = _aware(doc.get("started_at"))
+        job.finished_at = _aware(doc.get("finished_at"))
+        job.duration_seconds = doc.get("duration_seconds")
+        job.result = doc.get("result")
+        job.error = doc.get("error")
+        return job
+
+    def to_document(self) -> Dict[str, Any]:
+        return {
+            "_id": self.id,
+            "key": self.key,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_seconds": self.duration_seconds,
+            "result": self.result,
+            "error": self.error,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "key": self.key,
+            "status": self.status,
+            "submitted_at": _iso(self.submitted_at),
+            "started_at": _iso(self.started_at),
+            "finished_at": _iso(self.finished_at),
+            "duration_seconds": self.duration_seconds,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobRegistry:
+    """Runs submitted functions on a thread pool and tracks their state.
+
+    Args:
+        max_workers: size of the background executor.
+        history: number of finished jobs kept for status polling.
+        collection: optional pymongo Collection-like object shared by the web
+            workers; holds one document per job, keyed by job id.
+    """
+
+    def __init__(self, max_workers: int = 2, history: int = 100, collection: Optional[object] = None):
+        self.history = history
+        self.collection = collection
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api-job")
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    def submit(self, key: str, fn: Callable[[], Dict[str, Any]]) -> Job:
+        """Queue `fn`, or return the queued/running job with the same key."""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.key == key and job.active:
+                    return job
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._prune()
+        self._save(job)
+        self._executor.submit(self._run, job, fn)
+        logger.info("api_job.submitted", extra={"job_id": job.id, "key": key})
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return the job, looking in the shared collection for other workers' jobs."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None or self.collection is None:
+            return job
+        try:
+            doc = self.collection.find_one({"_id": job_id})
+        except Exception:
+            logger.exception("api_job.load_failed", extra={"job_id": job_id})
+            return None
+        return Job.from_document(doc) if doc else None
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[: max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def _save(self, job: Job) -> None:
+        """Write the job's state to the shared collection, if any; errors are logged."""
+        if self.collection is None:
+            return
+        try:
+            self.collection.replace_one({"_id": job.id}, job.to_document(), upsert=True)
+        except Exception:
+            logger.exception("api_job.save_failed", extra={"job_id": job.id, "key": job.key})
+
+    def _prune_stored(self) -> None:
+        """Drop all but the `history` most recently finished jobs from the shared collection."""
+        if self.collection is None:
+            return
+        try:
+            stale = (
+                self.collection.find({"status": {"$in": [SUCCEEDED, FAILED]}}, {"_id": 1})
+                .sort("finished_at", -1)
+                .skip(self.history)
+            )
+            job_ids = [doc["_id"] for doc in stale]
+            if job_ids:
+                self.collection.delete_many({"_id": {"$in": job_ids}})
+        except Exception:
+            logger.exception("api_job.prune_failed")
+
+    def _run(self, job: Job, fn: Callable[[], Dict[str, Any]]) -> None:
+        job.started_at = datetime.now(timezone.utc)
+        job.status = RUNNING
+        self._save(job)
+        started = time.monotonic()
+        try:
+            job.result = fn()
+            status = SUCCEEDED
+        except Exception as e:
+            logger.exception("api_job.failed", extra={"job_id": job.id, "key": job.key})
+            job.error = str(e) or type(e).__name__
+            status = FAILED
+        job.duration_seconds = time.monotonic() - started
+        job.finished_at = datetime.now(timezone.utc)
+        # set last so pollers never see a finished job without its timings
+        job.status = status
+        self._save(job)
+        self._prune_stored()
+        logger.info(
+            "api_job.finished",
+            extra={"job_id": job.id, "key": job.key, "status": job.status, "duration_seconds": job.duration_seconds},
+        )
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
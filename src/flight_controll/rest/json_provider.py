@@ -0,0 +1,103 @@
+"""Application JSON provider backed by orjson.
+
+Event payloads are lists of dicts full of datetimes, which Flask's default
+provider sends through a Python-level ``default`` hook one value at a time.
+`FastJSONProvider` encodes them with orjson instead, and datetimes natively:
+
+- datetimes are ISO-8601 strings; naive ones are taken as UTC (the
+  convention of the fetcher and of pymongo) and get a ``+00:00`` offset,
+  aware ones keep their offset;
+- dates are ``YYYY-MM-DD``;
+- `Event` models are encoded as their `to_dict`.
+
+orjson is optional: without it, and for values orjson rejects (non-string
+keys, integers beyond 64 bits), the stdlib encoder produces the same
+output. Unlike the default provider, non-ASCII text is emitted as UTF-8
+rather than ``\\u`` escapes.
+"""
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, timezone
+from typing import Any, Optional
+
+from flask.json.provider import DefaultJSONProvider
+
+from ..models.event import Event
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None  # type: ignore
+
+
+def orjson_available() -> bool:
+    return orjson is not None
+
+
+def _default(o: Any) -> Any:
+    if isinstance(o, Event):
+        return o.to_dict()
+    if isinstance(o, datetime):
+        return (o if o.tzinfo is not None else o.replace(tzinfo=timezone.utc)).isoformat()
+    if isinstance(o, date):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """`DefaultJSONProvider` with orjson encoding and ISO-8601 datetimes.
+
+    Keeps the default provider's `sort_keys` and `compact` behaviour; keyword
+    arguments orjson has no equivalent for fall back to the stdlib encoder.
+    """
+
+    ensure_ascii = False
+
+    def _orjson_options(self, indent: Optional[int] = None) -> int:
+        # dataclasses go through `_default` so their keys are sorted like dicts
+        options = orjson.OPT_NAIVE_UTC | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def _encode(self, obj: Any, **kwargs: Any) -> Optional[bytes]:
+        """orjson-encode `obj`, or return None when the stdlib encoder must handle it."""
+        if orjson is None:
+            return None
+        indent = kwargs.pop("indent", None)
+        kwargs.pop("separators", None)
+        if kwargs or indent not in (None, 2):
+            return None
+        try:
+            return orjson.dumps(obj, default=_default, option=self._orjson_options(indent))
+        except TypeError:
+            return None
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        encoded = self._encode(obj, **kwargs)
+        if encoded is not None:
+            return encoded.decode("utf-8")
+        kwargs.setdefault("default", _default)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any) -> Any:
+        obj = self._prepare_response_obj(args, kwargs)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            dump_args = {"indent": 2}
+        else:
+            dump_args = {"separators": (",", ":")}
+        # skips the bytes -> str -> bytes round trip of the default implementation
+        body = self._encode(obj, **dump_args)
+        if body is None:
+            body = self.dumps(obj, **dump_args).encode("utf-8")
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
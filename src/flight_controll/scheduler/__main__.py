@@ -0,0 +1,5 @@
+"""Run the scheduler as its own process: ``python -m flight_controll.scheduler``."""
+from ..serving import run_scheduler
+
+if __name__ == "__main__":
+    run_scheduler()
@@ -0,0 +1,70 @@
+"""Adaptive polling interval for the webcal check.
+
+`AdaptiveInterval` picks the delay before the next tick from what the last
+tick saw: it drops to the minimum after a tick that found changes, backs off
+exponentially while the feed stays unchanged, and never polls sooner than
+the provider asked for via `Cache-Control: max-age` or `Retry-After`. The
+result is always clamped to the configured bounds.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Tuple
+
+REASON_CHANGES = "changes"
+REASON_UNCHANGED = "unchanged"
+REASON_ERROR = "error"
+REASON_MAX_AGE = "cache-control max-age"
+REASON_RETRY_AFTER = "retry-after"
+
+
+class AdaptiveInterval:
+    """Stateful interval chooser.
+
+    Args:
+        min_seconds: shortest allowed interval.
+        max_seconds: longest allowed interval.
+        initial_seconds: interval before the first tick, typically the
+            fixed `WEBCAL_SCHEDULER_DELAY_MINUTES`.
+        backoff_factor: multiplier applied after each unchanged tick.
+    """
+
+    def __init__(
+        self,
+        min_seconds: float,
+        max_seconds: float,
+        initial_seconds: Optional[float] = None,
+        backoff_factor: float = 2.0,
+    ):
+        self.min_seconds = min_seconds
+        self.max_seconds = max(min_seconds, max_seconds)
+        self.backoff_factor = backoff_factor
+        self.current = self._clamp(initial_seconds if initial_seconds is not None else min_seconds)
+
+    def _clamp(self, seconds: float) -> float:
+        return min(self.max_seconds, max(self.min_seconds, seconds))
+
+    def next_interval(
+        self, changes: Optional[int], cache_hints: Optional[Dict[str, Any]] = None
+    ) -> Tuple[float, str]:
+        """Return ``(seconds, reason)`` for the next tick and remember it.
+
+        Args:
+            changes: number of changes the tick found, or None if it failed.
+            cache_hints: ``max_age``/``retry_after`` seconds from the fetcher.
+        """
+        if changes:
+            interval, reason = self.min_seconds, REASON_CHANGES
+        else:
+            interval = self.current * self.backoff_factor
+            reason = REASON_UNCHANGED if changes is not None else REASON_ERROR
+
+        hints = cache_hints or {}
+        max_age = hints.get("max_age")
+        if max_age is not None and max_age > interval:
+            interval, reason = max_age, REASON_MAX_AGE
+        retry_after = hints.get("retry_after")
+        if retry_after is not None and retry_after > interval:
+            interval, reason = retry_after, REASON_RETRY_AFTER
+
+        self.current = self._clamp(interval)
+        return self.current, reason
@@ -0,0 +1,148 @@
+"""Calendar feeds polled by the scheduler.
+
+Feeds come from the `WEBCAL_FEEDS` setting, a JSON list such as::
+
+    [
+        {"name": "crew", "url": "https://example.com/crew.ics"},
+        {"name": "training", "url": "https://example.com/training.ics", "interval_minutes": 60}
+    ]
+
+Without it the single `WEB_CAL_URL` is polled as the ``default`` feed every
+`WEBCAL_SCHEDULER_DELAY_MINUTES`. Each feed gets its own scheduler job,
+started at a deterministic offset into its interval so that feeds sharing an
+interval do not all fire on the same boundary. Every feed other than
+``default`` is stored in its own ``<MONGO_COLLECTION>_<name>`` collection
+(or the ``collection`` given in its entry), because removals are detected
+against everything stored for the feed. Feed names ``digest`` and ``locks``
+are reserved, since ``<MONGO_COLLECTION>_digest`` and ``<MONGO_COLLECTION>_locks``
+hold the digest buffer and the scheduler locks.
+
+The HTTP endpoints pick a feed with ``?feed=<name>``; without it they use
+the ``default`` feed, or the only feed when just one is configured.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from .single_flight import CHECK_KEY
+
+DEFAULT_FEED = "default"
+
+# suffixes of the collections the service keeps next to MONGO_COLLECTION
+RESERVED_FEED_NAMES = ("digest", "locks", "jobs")
+
+
+@dataclass(frozen=True)
+class Feed:
+    """One calendar feed and how often to poll it."""
+
+    name: str
+    url: str
+    interval_seconds: float
+    collection: Optional[str] = None
+
+    @property
+    def job_id(self) -> str:
+        """Scheduler job id; the default feed keeps the historical ``webcal-check``."""
+        return CHECK_KEY if self.name == DEFAULT_FEED else f"{CHECK_KEY}:{self.name}"
+
+    @property
+    def uses_default_collection(self) -> bool:
+        """True when the feed is stored in `MONGO_COLLECTION` itself."""
+        return self.name == DEFAULT_FEED and not self.collection
+
+
+def load_feeds(config: Any) -> List[Feed]:
+    """Return the configured feeds, defaulting to `WEB_CAL_URL`.
+
+    Raises:
+        ValueError: `WEBCAL_FEEDS` is not a JSON list of objects with unique
+            ``name`` and a ``url``, uses a reserved name, or maps two feeds
+            (or a feed and a service collection) onto the same collection.
+    """
+    default_interval = getattr(config, "WEBCAL_SCHEDULER_DELAY_MINUTES", 15) * 60
+    raw = getattr(config, "WEBCAL_FEEDS", None)
+    if not raw:
+        return [Feed(DEFAULT_FEED, getattr(config, "WEB_CAL_URL", None), default_interval)]
+    try:
+        entries = json.loads(raw) if isinstance(raw, str) else raw
+        feeds = [
+            Feed(
+                name=str(entry["name"]),
+                url=entry["url"],
+                interval_seconds=float(entry["interval_minutes"]) * 60
+                if entry.get("interval_minutes")
+                else default_interval,
+                collection=entry.get("collection"),
+            )
+            for entry in entries
+        ]
+    except (TypeError, KeyError, AttributeError, ValueError) as e:
+        raise ValueError(f"Invalid WEBCAL_FEEDS: {e}") from e
+    names = [feed.name for feed in feeds]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Invalid WEBCAL_FEEDS: duplicate feed names in {names}")
+    reserved = [name for name in names if name in RESERVED_FEED_NAMES]
+    if reserved:
+        raise ValueError(f"Invalid WEBCAL_FEEDS: feed names {reserved} are reserved")
+    base = getattr(config, "MONGO_COLLECTION", None)
+    if base:
+        collections = [collection_name(feed, base) for feed in feeds]
+        # every feed keeps its digest buffer in <collection>_digest
+        taken = {f"{base}_{suffix}" for suffix in RESERVED_FEED_NAMES} | {f"{c}_digest" for c in collections}
+        if len(set(collections)) != len(collections) or taken.intersection(collections):
+            raise ValueError(f"Invalid WEBCAL_FEEDS: feeds must use distinct, unreserved collections: {collections}")
+    return feeds
+
+
+def select_feed(feeds: List[Feed], name: Optional[str] = None) -> Feed:
+    """Return the feed called `name`, or the default (or only) feed when `name` is empty.
+
+    Raises:
+        LookupError: no feed is called `name`, or several feeds are configured
+            without a ``default`` one and `name` is empty.
+    """
+    names = [feed.name for feed in feeds]
+    if name:
+        for feed in feeds:
+            if feed.name == name:
+                return feed
+        raise LookupError(f"unknown feed {name!r}; configured feeds: {names}")
+    for feed in feeds:
+        if feed.name == DEFAULT_FEED:
+            return feed
+    if len(feeds) == 1:
+        return feeds[0]
+    raise LookupError(f"several feeds are configured; pass ?feed=<name> with one of {names}")
+
+
+def collection_name(feed: Feed, base: str) -> str:
+    """Return the events collection name for `feed` given `MONGO_COLLECTION`."""
+    if feed.collection:
+        return feed.collection
+    return base if feed.name == DEFAULT_FEED else f"{base}_{feed.name}"
+
+
+def jitter_offset(name: str, interval_seconds: float) -> float:
+    """Deterministic start offset in ``[0, interval_seconds)`` derived from the feed name.
+
+    Stable across restarts and replicas, so a feed keeps its slot in the
+    interval and distinct feeds spread roughly uniformly over it.
+    """
+    digest = hashlib.sha256(name.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64 * interval_seconds
+
+
+class FeedConfig:
+    """Read-only view of the app config with one feed's URL substituted."""
+
+    def __init__(self, base: Any, feed: Feed):
+        self._base = base
+        self.WEB_CAL_URL = feed.url
+        self.FEED_NAME = feed.name
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._base, name)
@@ -0,0 +1,203 @@
+"""Lease-based leader election across replicas.
+
+Every replica runs the scheduler, but only the holder of the lease runs
+scheduled ticks. The lease is a single lock document in the
+``<collection>_locks`` Mongo collection::
+
+    {"_id": "webcal-check", "owner": "<host>:<pid>:<nonce>", "expires_at": <epoch seconds>}
+
+A replica acquires the lease when it is free, expired or already its own,
+with one atomic `find_one_and_update`. Holders renew it on a heartbeat well
+inside the TTL, so if the leader dies another replica takes over within
+`ttl + max_clock_skew` seconds.
+
+Expiry times are written with the acquiring replica's clock. To tolerate
+skew between replicas, a contender only takes over once the lease has been
+expired for `max_clock_skew` seconds, and a holder stops acting as leader
+`max_clock_skew` seconds before its own expiry. Two replicas can therefore
+not both believe they lead unless their clocks differ by more than twice
+the allowed skew.
+
+`CheckLock` reuses the same lease for a different purpose: it serialises
+the check run itself across processes. The scheduler process and every web
+worker take the ``<job id>:run`` lock around `fetch_persist_and_send_events`,
+so a manual trigger never runs concurrently with a scheduled tick.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Callable, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "webcal-check"
+
+
+def default_owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaderLease:
+    """A renewable, expiring lease stored as a Mongo document.
+
+    Args:
+        collection: pymongo Collection-like object holding lock documents.
+        name: lock document id.
+        owner: unique id of this replica; generated when omitted.
+        ttl_seconds: lease lifetime after each acquire/renew.
+        max_clock_skew: tolerated clock difference between replicas, in seconds.
+        clock: wall-clock function returning epoch seconds, injectable for tests.
+    """
+
+    def __init__(
+        self,
+        collection: object,
+        name: str = LEASE_NAME,
+        owner: Optional[str] = None,
+        ttl_seconds: float = 60.0,
+        max_clock_skew: float = 5.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.collection = collection
+        self.name = name
+        self.owner = owner or default_owner_id()
+        self.ttl_seconds = ttl_seconds
+        self.max_clock_skew = max_clock_skew
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._expires_at: Optional[float] = None
+
+    @property
+    def heartbeat_seconds(self) -> float:
+        """Renewal period: a third of the usable lease lifetime."""
+        return max(1.0, (self.ttl_seconds - self.max_clock_skew) / 3)
+
+    def try_acquire(self) -> bool:
+        """Acquire or renew the lease; return True if this replica now holds it."""
+        now = self.clock()
+        try:
+            doc = self.collection.find_one_and_update(
+                {
+                    "_id": self.name,
+                    "$or": [
+                        {"owner": self.owner},
+                        {"expires_at": {"$lt": now - self.max_clock_skew}},
+                    ],
+                },
+                {"$set": {"owner": self.owner, "expires_at": now + self.ttl_seconds, "renewed_at": now}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # the lock document exists and is held by a live replica
+            doc = None
+        except Exception:
+            logger.exception("leader_lease: failed to acquire %s", self.name)
+            doc = None
+
+        with self._lock:
+            was_leader = self._expires_at is not None
+            held = bool(doc) and doc.get("owner") == self.owner
+            self._expires_at = now + self.ttl_seconds if held else None
+        if held != was_leader:
+            logger.info(
+                "leader_lease.acquired" if held else "leader_lease.lost",
+                extra={"lease": self.name, "owner": self.owner},
+            )
+        return held
+
+    def is_leader(self) -> bool:
+        """Return True while this replica holds an unexpired lease (minus skew)."""
+        with self._lock:
+            return self._expires_at is not None and self.clock() < self._expires_at - self.max_clock_skew
+
+    def release(self) -> None:
+        """Give the lease up so another replica can take over immediately."""
+        with self._lock:
+            self._expires_at = None
+        try:
+            self.collection.delete_one({"_id": self.name, "owner": self.owner})
+        except Exception:
+            logger.exception("leader_lease: failed to release %s", self.name)
+
+
+class CheckLockTimeout(RuntimeError):
+    """Raised when a check could not take the cross-process run lock in time."""
+
+
+class CheckLock:
+    """Cross-process mutex around one check run, stored as a `LeaderLease`.
+
+    Each run takes a fresh lease and renews it on a heartbeat thread while
+    the run lasts, so a run longer than `ttl_seconds` keeps the lock and a
+    crashed holder frees it within `ttl_seconds + max_clock_skew`.
+
+    Args:
+        collection: pymongo Collection-like object holding lock documents.
+        name: lock document id, e.g. ``webcal-check:run``.
+        ttl_seconds: lease lifetime after each acquire/renew.
+        max_clock_skew: tolerated clock difference between processes, in seconds.
+        poll_seconds: retry period while waiting for the lock.
+        clock: wall-clock function returning epoch seconds, injectable for tests.
+    """
+
+    def __init__(
+        self,
+        collection: object,
+        name: str,
+        ttl_seconds: float = 60.0,
+        max_clock_skew: float = 5.0,
+        poll_seconds: float = 1.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.collection = collection
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_clock_skew = max_clock_skew
+        self.poll_seconds = poll_seconds
+        self.clock = clock
+
+    def run(self, fn: Callable[[], Any], wait_seconds: float = 0.0) -> Tuple[bool, Any]:
+        """Run `fn` while holding the lock, waiting up to `wait_seconds` for it.
+
+        Returns:
+            ``(True, result)`` when `fn` ran, ``(False, None)`` when another
+            process held the lock for the whole wait.
+        """
+        lease = LeaderLease(
+            self.collection,
+            self.name,
+            ttl_seconds=self.ttl_seconds,
+            max_clock_skew=self.max_clock_skew,
+            clock=self.clock,
+        )
+        deadline = time.monotonic() + wait_seconds
+        while not lease.try_acquire():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False, None
+            time.sleep(min(self.poll_seconds, remaining))
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._renew, args=(lease, stop), name=f"{self.name}-heartbeat", daemon=True)
+        heartbeat.start()
+        try:
+            return True, fn()
+        finally:
+            stop.set()
+            heartbeat.join()
+            lease.release()
+
+    @staticmethod
+    def _renew(lease: LeaderLease, stop: threading.Event) -> None:
+        while not stop.wait(lease.heartbeat_seconds):
+            if not lease.try_acquire():
+                logger.warning("check_lock.lost", extra={"lock": lease.name, "owner": lease.owner})
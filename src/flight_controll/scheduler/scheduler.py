@@ -2,7 +2,15 @@ from flask_apscheduler import APScheduler
 from ..event.event_service import EventService
 from ..webcal.fetcher import WebcalFetcher
 from ..mail.sender import MailService
+from ..event import repository as event_repository
+from .adaptive import AdaptiveInterval
+from .feeds import FeedConfig, collection_name, jitter_offset, load_feeds
+from .leader import CheckLockTimeout, LeaderLease
+from .single_flight import SingleFlight
+from datetime import datetime, timedelta, timezone
+import atexit
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -11,48 +19,226 @@ scheduler = APScheduler()
 
 def init_scheduler(app):
     app.config["SCHEDULER_API_ENABLED"] = True
+    single_flight = app.extensions.setdefault("single_flight", SingleFlight())
+    cfg = app.app_config
 
-    def webcal_check():
-        logger.info("Running scheduled task: webcal_check", extra={"task": "webcal_check", "phase": "start"})
-        # Prefer an injected factory when available so scheduler does not
-        # construct service instances or clients directly.
-        make_event_service = None
+    feeds = load_feeds(cfg)
+    # a worker per feed plus the housekeeping jobs, so a slow feed never
+    # holds up another feed's tick
+    app.config.setdefault(
+        "SCHEDULER_EXECUTORS", {"default": {"type": "threadpool", "max_workers": max(10, len(feeds) + 2)}}
+    )
+    adaptive_mode = getattr(cfg, "WEBCAL_SCHEDULER_MODE", "fixed") == "adaptive"
+    feed_state = app.extensions.setdefault("feed_state", {})
+    adaptive_intervals = app.extensions.setdefault("adaptive_intervals", {})
+
+    lease = None
+    if getattr(cfg, "LEADER_ELECTION_ENABLED", False):
+        locks_collection = app.extensions.get("locks_collection")
+        if locks_collection is None:
+            logger.warning("LEADER_ELECTION_ENABLED but no locks collection; every replica will run webcal_check")
+        else:
+            lease = LeaderLease(
+                locks_collection,
+                ttl_seconds=getattr(cfg, "LEADER_LEASE_SECONDS", 30),
+                max_clock_skew=getattr(cfg, "LEADER_MAX_CLOCK_SKEW_SECONDS", 5),
+            )
+            app.extensions["leader_lease"] = lease
+
+    def feed_collection(feed):
+        """Return the feed's own events collection, or None to use the default one."""
+        db = app.extensions.get("mongo_db")
+        if db is None or feed.uses_default_collection:
+            return None
+        name = collection_name(feed, cfg.MONGO_COLLECTION)
+        collection = db[name]
+        event_repository.create_indexes(collection)
         try:
-            make_event_service = app.extensions.get("make_event_service")
+            db[f"{name}_digest"].create_index("uid", unique=True)
         except Exception:
-            make_event_service = None
+            logger.exception("Failed to create digest index for feed %s; continuing", feed.name)
+        return collection
 
-        if make_event_service:
-            event_service = make_event_service(cfg=app.app_config)
-        else:
-            # fallback: construct EventService directly
-            events_collection = None
+    def make_job(feed):
+        feed_cfg = FeedConfig(cfg, feed)
+        events_collection = feed_collection(feed)
+        make_check_lock = app.extensions.get("make_check_lock")
+        check_lock = make_check_lock(feed.job_id) if make_check_lock else None
+        state = feed_state[feed.name] = {
+            "job_id": feed.job_id,
+            "interval_seconds": feed.interval_seconds,
+            "last_started_at": None,
+            "last_finished_at": None,
+            "last_status": None,
+            "last_new_events": None,
+            "last_duration_seconds": None,
+        }
+        log_extra = {"task": "webcal_check", "feed": feed.name}
+
+        adaptive = None
+        if adaptive_mode:
+            adaptive = AdaptiveInterval(
+                min_seconds=getattr(cfg, "WEBCAL_MIN_INTERVAL_SECONDS", 60),
+                max_seconds=getattr(cfg, "WEBCAL_MAX_INTERVAL_SECONDS", 3600),
+                initial_seconds=feed.interval_seconds,
+                backoff_factor=getattr(cfg, "WEBCAL_BACKOFF_FACTOR", 2.0),
+            )
+            adaptive_intervals[feed.name] = adaptive
+
+        def adapt_interval(event_service, succeeded: bool) -> dict:
+            """Pick and apply the next interval; returns the fields for the tick log."""
+            stats = getattr(event_service, "last_run_stats", None) if succeeded else None
+            if stats:
+                changes = stats["new_count"] + stats["updated_count"] + stats["removed_count"]
+                hints = stats.get("cache_hints")
+            else:
+                changes, hints = None, getattr(event_service, "last_cache_hints", None)
+            interval, reason = adaptive.next_interval(changes, hints)
+            state["interval_seconds"] = interval
+            try:
+                scheduler.scheduler.reschedule_job(feed.job_id, trigger="interval", seconds=interval)
+            except Exception:
+                logger.exception("Failed to reschedule %s to %.0fs", feed.job_id, interval)
+            return {"next_interval_seconds": interval, "interval_reason": reason}
+
+        def build_event_service():
+            # Prefer an injected factory when available so scheduler does not
+            # construct service instances or clients directly.
+            make_event_service = None
             try:
-                events_collection = app.extensions.get("events_collection")
+                make_event_service = app.extensions.get("make_event_service")
             except Exception:
-                events_collection = None
-            event_service = EventService(
-                config=app.app_config,
+                make_event_service = None
+
+            if make_event_service:
+                if events_collection is not None:
+                    return make_event_service(cfg=feed_cfg, events_collection_override=events_collection)
+                return make_event_service(cfg=feed_cfg)
+            # fallback: construct EventService directly
+            collection = events_collection
+            if collection is None:
+                try:
+                    collection = app.extensions.get("events_collection")
+                except Exception:
+                    collection = None
+            return EventService(
+                config=feed_cfg,
                 fetcher_cls=WebcalFetcher,
-                email_sender_cls=MailService,
-                events_collection=events_collection,
-            )
-        try:
-            events = event_service.fetch_persist_and_send_events()
-            new_count = len(events)
-            logger.info(
-                "webcal_check.completed",
-                extra={"task": "webcal_check", "new_events": new_count, "phase": "complete"},
+                email_sender_cls=app.extensions.get("email_sender_cls", MailService),
+                events_collection=collection,
             )
-        except Exception:
-            logger.exception("Error during scheduled task webcal_check:")
-
-    scheduler.task(
-        "interval",
-        id="webcal-check",
-        minutes=app.app_config.WEBCAL_SCHEDULER_DELAY_MINUTES,
-    )(webcal_check)
-    # Expose for testing
-    app.extensions["_webcal_check_func"] = webcal_check
+
+        def run_locked(event_service):
+            """Run the check unless another process (a web worker's manual trigger) is running it.
+
+            Returns the new events, like `fetch_persist_and_send_events`, so
+            manual triggers joining this flight get the same result.
+
+            Raises:
+                CheckLockTimeout: another process holds the check lock.
+            """
+            if check_lock is None:
+                return event_service.fetch_persist_and_send_events()
+            ran, events = check_lock.run(event_service.fetch_persist_and_send_events)
+            if not ran:
+                raise CheckLockTimeout("a check is still running in another process")
+            return events
+
+        def webcal_check():
+            if lease is not None and not lease.try_acquire():
+                logger.info(
+                    "webcal_check.skipped",
+                    extra={**log_extra, "phase": "skipped", "reason": "not leader"},
+                )
+                return
+            logger.info("Running scheduled task: webcal_check", extra={**log_extra, "phase": "start"})
+            event_service = build_event_service()
+            started = time.monotonic()
+            state["last_started_at"] = datetime.now(timezone.utc)
+            try:
+                try:
+                    ran, events = single_flight.run_if_idle(feed.job_id, lambda: run_locked(event_service))
+                except CheckLockTimeout:
+                    logger.info(
+                        "webcal_check.skipped",
+                        extra={**log_extra, "phase": "skipped", "reason": "check running in another process"},
+                    )
+                    return
+                if not ran:
+                    logger.info(
+                        "webcal_check.skipped",
+                        extra={**log_extra, "phase": "skipped", "reason": "check already in flight"},
+                    )
+                    return
+                new_count = len(events)
+                state.update(last_status="ok", last_new_events=new_count)
+                interval_fields = adapt_interval(event_service, succeeded=True) if adaptive else {}
+                logger.info(
+                    "webcal_check.completed",
+                    extra={**log_extra, "new_events": new_count, "phase": "complete", **interval_fields},
+                )
+            except Exception:
+                state["last_status"] = "failed"
+                logger.exception("Error during scheduled task webcal_check for feed %s:", feed.name)
+                if adaptive:
+                    logger.info(
+                        "webcal_check.failed",
+                        extra={**log_extra, "phase": "failed", **adapt_interval(event_service, False)},
+                    )
+            finally:
+                state["last_finished_at"] = datetime.now(timezone.utc)
+                state["last_duration_seconds"] = time.monotonic() - started
+
+        return webcal_check
+
+    now = datetime.now(timezone.utc)
+    for feed in feeds:
+        webcal_check = make_job(feed)
+        # start each feed at its own stable offset into the interval so feeds
+        # sharing an interval are staggered; missed or overlapping ticks
+        # collapse into one run instead of queueing up
+        scheduler.task(
+            "interval",
+            id=feed.job_id,
+            seconds=feed.interval_seconds,
+            start_date=now + timedelta(seconds=jitter_offset(feed.name, feed.interval_seconds)),
+            max_instances=1,
+            coalesce=True,
+        )(webcal_check)
+        # Expose for testing
+        app.extensions.setdefault("webcal_check_funcs", {})[feed.name] = webcal_check
+    app.extensions["_webcal_check_func"] = app.extensions["webcal_check_funcs"][feeds[0].name]
+    if adaptive_mode:
+        app.extensions["adaptive_interval"] = adaptive_intervals[feeds[0].name]
+
+    if lease is not None:
+        # renews the lease while held and lets followers take over within
+        # ttl + skew of the leader going away, well inside one check interval
+        def leader_lease_heartbeat():
+            lease.try_acquire()
+
+        scheduler.task(
+            "interval",
+            id="leader-lease-heartbeat",
+            seconds=lease.heartbeat_seconds,
+            max_instances=1,
+            coalesce=True,
+        )(leader_lease_heartbeat)
+        atexit.register(lease.release)
+
+    drain_outbox = app.extensions.get("drain_outbox")
+    if drain_outbox:
+
+        def mail_outbox_drain():
+            try:
+                drain_outbox()
+            except Exception:
+                logger.exception("Error during scheduled task mail_outbox_drain:")
+
+        scheduler.task(
+            "interval",
+            id="mail-outbox-drain",
+            seconds=getattr(app.app_config, "MAIL_OUTBOX_DRAIN_SECONDS", 60),
+        )(mail_outbox_drain)
     scheduler.init_app(app)
     scheduler.start()
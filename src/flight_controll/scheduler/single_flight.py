@@ -0,0 +1,89 @@
+"""Single-flight coordination for the webcal check.
+
+The scheduled `webcal-check` job and `POST /events/trigger-check` both run
+`fetch_persist_and_send_events`. `SingleFlight` makes sure only one run per
+key executes at a time within the process: callers arriving while a run is
+in flight join it and receive its result (or its exception) instead of
+starting a second fetch, and scheduler ticks that overlap a run are skipped.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHECK_KEY = "webcal-check"
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.joiners = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+
+    def in_flight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._flights
+
+    def _begin(self, key: str) -> Tuple[_Flight, bool]:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.joiners += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    def _execute(self, key: str, flight: _Flight, fn: Callable[[], Any]) -> Any:
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+            if flight.joiners:
+                logger.info("single_flight.shared", extra={"key": key, "joiners": flight.joiners})
+
+    def run(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run `fn`, or wait for the in-flight run with the same key and share its outcome.
+
+        Raises:
+            Exception: whatever the shared run raised.
+        """
+        flight, leader = self._begin(key)
+        if leader:
+            return self._execute(key, flight, fn)
+        logger.info("single_flight.joined", extra={"key": key})
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def run_if_idle(self, key: str, fn: Callable[[], Any]) -> Tuple[bool, Any]:
+        """Run `fn` unless a run with the same key is already in flight.
+
+        Returns:
+            ``(True, result)`` when `fn` ran, ``(False, None)`` when it was
+            skipped because another run was in flight.
+        """
+        with self._lock:
+            if key in self._flights:
+                logger.info("single_flight.skipped", extra={"key": key})
+                return False, None
+            flight = self._flights[key] = _Flight()
+        return True, self._execute(key, flight, fn)
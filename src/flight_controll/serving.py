@@ -0,0 +1,69 @@
+"""Production entry points.
+
+The web tier and the scheduler run as separate processes:
+
+- `create_wsgi_app` builds the WSGI application served by the gunicorn
+  workers (``gunicorn -c gunicorn.conf.py wsgi:app``). It never starts the
+  scheduler, so adding workers does not add scheduled checks. Each worker
+  imports the app after the fork (`preload_app` stays off), so its Mongo
+  client and thread pools are created in the process that uses them.
+- `run_scheduler` runs the scheduler alone in one dedicated process
+  (``python -m flight_controll.scheduler``) until SIGTERM or SIGINT.
+
+`main.py` still runs both in one process on Flask's development server.
+"""
+from __future__ import annotations
+
+import logging
+import signal
+import sys
+import threading
+from typing import Optional
+
+from flask import Flask
+
+from . import create_app
+from .scheduler.scheduler import scheduler
+
+logger = logging.getLogger(__name__)
+
+
+def setup_logging(app: Flask) -> None:
+    """Configure logging for the Flask app and root logger (handler, formatter, level)."""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.INFO)
+    formatter = logging.Formatter(
+        "[%(asctime)s] [%(levelname)s] %(name)s - %(message)s"
+    )
+    handler.setFormatter(formatter)
+
+    app.logger.handlers = []
+    app.logger.addHandler(handler)
+    app.logger.setLevel(logging.INFO)
+
+    root_logger = logging.getLogger()
+    root_logger.handlers = []
+    root_logger.addHandler(handler)
+    root_logger.setLevel(logging.INFO)
+
+
+def create_wsgi_app(config_object: Optional[object] = None) -> Flask:
+    """Build the app for a WSGI worker: the HTTP API only, without the scheduler."""
+    app = create_app(config_object, enable_scheduler=False)
+    setup_logging(app)
+    return app
+
+
+def run_scheduler(config_object: Optional[object] = None, stop: Optional[threading.Event] = None) -> None:
+    """Run the scheduled jobs in this process until `stop` is set or a SIGTERM/SIGINT arrives."""
+    stop = stop or threading.Event()
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stop.set())
+
+    app = create_app(config_object, enable_scheduler=True)
+    setup_logging(app)
+    logger.info("scheduler_process.started")
+    stop.wait()
+    logger.info("scheduler_process.stopping")
+    scheduler.shutdown()
@@ -3,14 +3,66 @@
 This module provides a small parser that extracts VEVENT blocks and returns a
 list of plain dictionaries. It's intentionally lightweight to keep tests fast
 and avoid external heavy dependencies. Returned event dictionaries include the
-keys: `uid`, `dtstart`, `dtend`, `summary`, `location`, `description`.
+keys: `uid`, `dtstart`, `dtend`, `summary`, `location`, `description`, and the
+versioning properties `sequence` (int), `last_modified` and `dtstamp` (raw
+UTC stamps such as ``20250101T120000Z``), each None when absent.
+
+`fetch_events` downloads the whole body before parsing; `iter_events` parses
+each VEVENT as soon as it has arrived, for the staged pipeline, and
+`fetch_events_if_changed` revalidates against the previous response.
+
+After each fetch the fetcher exposes the provider's polling hints from the
+`Cache-Control: max-age` and `Retry-After` response headers as `cache_hints`.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import Iterator, List, Dict, Any, Optional
 
+import codecs
+import hashlib
 import requests
 import re
-from datetime import datetime
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+_MAX_AGE_RE = re.compile(r"(?:^|,)\s*max-age\s*=\s*\"?(\d+)", re.IGNORECASE)
+_VEVENT_BEGIN = "BEGIN:VEVENT"
+_VEVENT_RE = re.compile(r"BEGIN:VEVENT(.*?)END:VEVENT", re.DOTALL)
+
+
+def _header(headers: Any, name: str) -> Optional[str]:
+    try:
+        value = headers.get(name)
+    except Exception:
+        return None
+    return value if isinstance(value, str) else None
+
+
+def parse_cache_hints(headers: Any) -> Dict[str, Optional[float]]:
+    """Extract polling hints from HTTP response headers.
+
+    Returns:
+        A dict with ``max_age`` (seconds from `Cache-Control: max-age`) and
+        ``retry_after`` (seconds from `Retry-After`, given either as seconds
+        or as an HTTP date); each None when absent or unparseable.
+    """
+    hints: Dict[str, Optional[float]] = {"max_age": None, "retry_after": None}
+    cache_control = _header(headers, "Cache-Control")
+    if cache_control:
+        match = _MAX_AGE_RE.search(cache_control)
+        if match:
+            hints["max_age"] = float(match.group(1))
+    retry_after = _header(headers, "Retry-After")
+    if retry_after:
+        retry_after = retry_after.strip()
+        if retry_after.isdigit():
+            hints["retry_after"] = float(retry_after)
+        else:
+            try:
+                when = parsedate_to_datetime(retry_after)
+                hints["retry_after"] = max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    return hints
 
 
 class WebcalFetcher:
@@ -22,6 +74,8 @@ class WebcalFetcher:
 
     def __init__(self, webcal_url: str):
         self.webcal_url = webcal_url
+        self.cache_hints: Dict[str, Optional[float]] = {"max_age": None, "retry_after": None}
+        self.validator: Optional[str] = None
 
     def fetch_events(self) -> List[Dict[str, Any]]:
         """Return a list of event dicts parsed from the remote feed.
@@ -31,57 +85,127 @@ class WebcalFetcher:
         """
         # Fetch the webcal (iCal) data
         response = requests.get(self.webcal_url)
+        # recorded before raise_for_status so a 429/503 Retry-After is kept
+        self.cache_hints = parse_cache_hints(getattr(response, "headers", None))
+        response.raise_for_status()
+        return _parse_ical(response.text)
+
+    def fetch_events_if_changed(self, validator: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """Conditional `fetch_events`: return None while the feed still matches `validator`.
+
+        `validator` is a previous `self.validator`, built from the feed's
+        ETag, else its Last-Modified date, else a hash of the body when the
+        provider sends neither. The first two are sent as `If-None-Match` /
+        `If-Modified-Since` so an unchanged feed costs a 304 and no parsing.
+        After the call `self.validator` identifies the current feed content.
+        """
+        headers = {}
+        if validator and validator.startswith("etag:"):
+            headers["If-None-Match"] = validator[len("etag:"):]
+        elif validator and validator.startswith("last-modified:"):
+            headers["If-Modified-Since"] = validator[len("last-modified:"):]
+        response = requests.get(self.webcal_url, headers=headers)
+        self.cache_hints = parse_cache_hints(getattr(response, "headers", None))
+        if response.status_code == 304 and validator:
+            self.validator = validator
+            return None
         response.raise_for_status()
         ical_data = response.text
+        etag = _header(response.headers, "ETag")
+        last_modified = _header(response.headers, "Last-Modified")
+        if etag:
+            self.validator = f"etag:{etag}"
+        elif last_modified:
+            self.validator = f"last-modified:{last_modified}"
+        else:
+            self.validator = "sha256:" + hashlib.sha256(ical_data.encode("utf-8")).hexdigest()
+        if self.validator == validator:
+            return None
+        return _parse_ical(ical_data)
+
+    def iter_events(self, chunk_size: int = 64 * 1024) -> Iterator[Dict[str, Any]]:
+        """Yield event dicts as the feed body streams in.
+
+        Same events as `fetch_events`, but each VEVENT is parsed as soon as its
+        ``END:VEVENT`` line has been received, so parsing overlaps the
+        download and the full body is never held in memory.
+        """
+        response = requests.get(self.webcal_url, stream=True)
+        self.cache_hints = parse_cache_hints(getattr(response, "headers", None))
+        try:
+            response.raise_for_status()
+            # decoded incrementally; guessing like `response.text` would need the whole body
+            encoding = response.encoding or "utf-8"
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            buffer = ""
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                buffer += decoder.decode(chunk)
+                consumed = 0
+                for match in _VEVENT_RE.finditer(buffer):
+                    consumed = match.end()
+                    event = _parse_vevent(match.group(1))
+                    if event["uid"]:
+                        yield event
+                buffer = buffer[consumed:]
+                if _VEVENT_BEGIN not in buffer:
+                    # nothing open; keep only what could be a split BEGIN marker
+                    buffer = buffer[-len(_VEVENT_BEGIN):]
+            buffer += decoder.decode(b"", final=True)
+            for match in _VEVENT_RE.finditer(buffer):
+                event = _parse_vevent(match.group(1))
+                if event["uid"]:
+                    yield event
+        finally:
+            response.close()
+
+
+def _parse_ical(ical_data: str) -> List[Dict[str, Any]]:
+    return [event for event in map(_parse_vevent, _VEVENT_RE.findall(ical_data)) if event["uid"]]
+
+
+def _parse_vevent(vevent: str) -> Dict[str, Any]:
+    """Parse the text between ``BEGIN:VEVENT`` and ``END:VEVENT`` into an event dict."""
+    event: Dict[str, Optional[Any]] = {}
+    # Extract fields using regex
+    uid = re.search(r"UID:(.+)", vevent)
+    dtstart = re.search(r"DTSTART(?:;TZID=[^:]+)?:([0-9T]+)", vevent)
+    dtend = re.search(r"DTEND(?:;TZID=[^:]+)?:([0-9T]+)", vevent)
+    summary = re.search(r"SUMMARY:(.+)", vevent)
+    location = re.search(r"LOCATION:(.+)", vevent)
+    description = re.search(r"DESCRIPTION:(.+)", vevent, re.DOTALL)
+    sequence = re.search(r"^SEQUENCE:(\d+)", vevent, re.MULTILINE)
+    last_modified = re.search(r"^LAST-MODIFIED:([0-9TZ]+)", vevent, re.MULTILINE)
+    dtstamp = re.search(r"^DTSTAMP:([0-9TZ]+)", vevent, re.MULTILINE)
+
+    event["uid"] = uid.group(1).strip() if uid else None
+    event["dtstart"] = dtstart.group(1).strip() if dtstart else None
+    event["dtend"] = dtend.group(1).strip() if dtend else None
+    event["summary"] = summary.group(1).strip() if summary else None
+    event["location"] = location.group(1).strip() if location else None
+    event["description"] = (
+        description.group(1).strip().replace("\\n", "\n")
+        if description
+        else None
+    )
+    event["sequence"] = int(sequence.group(1)) if sequence else None
+    event["last_modified"] = last_modified.group(1) if last_modified else None
+    event["dtstamp"] = dtstamp.group(1) if dtstamp else None
 
-        # Split into VEVENT blocks
-        events = []
-        vevents = re.findall(r"BEGIN:VEVENT(.*?)END:VEVENT", ical_data, re.DOTALL)
-        for vevent in vevents:
-            event: Dict[str, Optional[Any]] = {}
-            # Extract fields using regex
-            uid = re.search(r"UID:(.+)", vevent)
-            dtstart = re.search(r"DTSTART(?:;TZID=[^:]+)?:([0-9T]+)", vevent)
-            dtend = re.search(r"DTEND(?:;TZID=[^:]+)?:([0-9T]+)", vevent)
-            summary = re.search(r"SUMMARY:(.+)", vevent)
-            location = re.search(r"LOCATION:(.+)", vevent)
-            description = re.search(r"DESCRIPTION:(.+)", vevent, re.DOTALL)
-
-            event["uid"] = uid.group(1).strip() if uid else None
-            event["dtstart"] = dtstart.group(1).strip() if dtstart else None
-            event["dtend"] = dtend.group(1).strip() if dtend else None
-            event["summary"] = summary.group(1).strip() if summary else None
-            event["location"] = location.group(1).strip() if location else None
-            event["description"] = (
-                description.group(1).strip().replace("\\n", "\n")
-                if description
-                else None
-            )
-
-            # Optionally, parse dates to datetime objects
-            if event["dtstart"]:
-                try:
-                    event["dtstart"] = datetime.strptime(
-                        event["dtstart"], "%Y%m%dT%H%M%S"
-                    )
-                except ValueError:
-                    try:
-                        event["dtstart"] = datetime.strptime(
-                            event["dtstart"], "%Y%m%dT%H%M"
-                        )
-                    except ValueError:
-                        event["dtstart"] = event["dtstart"]
-            if event["dtend"]:
-                try:
-                    event["dtend"] = datetime.strptime(event["dtend"], "%Y%m%dT%H%M%S")
-                except ValueError:
-                    try:
-                        event["dtend"] = datetime.strptime(
-                            event["dtend"], "%Y%m%dT%H%M"
-                        )
-                    except ValueError:
-                        event["dtend"] = event["dtend"]
-
-            if event["uid"]:
-                events.append(event)
-        return events
+    # Optionally, parse dates to datetime objects
+    if event["dtstart"]:
+        try:
+            event["dtstart"] = datetime.strptime(event["dtstart"], "%Y%m%dT%H%M%S")
+        except ValueError:
+            try:
+                event["dtstart"] = datetime.strptime(event["dtstart"], "%Y%m%dT%H%M")
+            except ValueError:
+                event["dtstart"] = event["dtstart"]
+    if event["dtend"]:
+        try:
+            event["dtend"] = datetime.strptime(event["dtend"], "%Y%m%dT%H%M%S")
+        except ValueError:
+            try:
+                event["dtend"] = datetime.strptime(event["dtend"], "%Y%m%dT%H%M")
+            except ValueError:
+                event["dtend"] = event["dtend"]
+    return event
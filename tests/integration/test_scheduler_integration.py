@@ -1,3 +1,5 @@
+from datetime import datetime, timezone
+
 from flight_controll.event.event_service import EventService
 
 
@@ -79,7 +81,7 @@ class FakeEmailSender:
     def __init__(self, smtp_server, smtp_port, username, password):
         pass
 
-    def send_email(self, recipient, subject, body, html_body=None):
+    def send_email(self, recipient, subject, body, html_body=None, send_id=None):
         self.sent.append({
             "recipient": recipient,
             "subject": subject,
@@ -333,9 +335,33 @@ def test_scheduler_reports_updated_event(app):
     assert events == []
 
     # DB should have been updated by update_one (allow timezone suffix)
-    assert es.events_collection.docs[0]["start_time"].startswith("2099-02-02T10:00:00")
+    assert es.events_collection.docs[0]["start_time"] == datetime(2099, 2, 2, 10, tzinfo=timezone.utc)
 
     # and an email should have been sent about the update
     assert len(FakeEmailSender.sent) == 1
     sent = FakeEmailSender.sent[0]
     assert "Updated Events" in sent["body"]
+
+
+def test_scheduler_streaming_engine_persists_and_emails(app):
+    """The streaming (sorted-merge) engine stores new events and sends one summary."""
+
+    class StreamingConfig(type(app.app_config)):
+        WEB_CAL_URL = "http://test.local/calendar.ics"
+        CHANGE_DETECTION_ENGINE = "streaming"
+        DIFF_BATCH_SIZE = 2
+
+    es = object.__new__(EventService)
+    es.logger = None
+    es.config = StreamingConfig()
+    es.email_sender_cls = FakeEmailSender
+    es.fetcher_cls = MultiEventFetcher
+    es.events_collection = FakeCollection()
+
+    FakeEmailSender.sent.clear()
+
+    events = es.fetch_persist_and_send_events()
+
+    assert sorted(e["uid"] for e in events) == ["uid-1", "uid-2", "uid-3"]
+    assert len(es.events_collection.docs) == 3
+    assert len(FakeEmailSender.sent) == 1
@@ -0,0 +1,30 @@
+from flight_controll.scheduler.adaptive import AdaptiveInterval
+
+
+def make_interval():
+    return AdaptiveInterval(min_seconds=60, max_seconds=3600, initial_seconds=900, backoff_factor=2)
+
+
+def test_changes_drop_to_minimum_and_quiet_ticks_back_off_to_maximum():
+    adaptive = make_interval()
+
+    assert adaptive.next_interval(3) == (60, "changes")
+    assert adaptive.next_interval(0) == (120, "unchanged")
+    assert adaptive.next_interval(0) == (240, "unchanged")
+    for _ in range(10):
+        adaptive.next_interval(0)
+    assert adaptive.current == 3600
+    assert adaptive.next_interval(1) == (60, "changes")
+
+
+def test_failed_tick_backs_off():
+    adaptive = make_interval()
+    assert adaptive.next_interval(None) == (1800, "error")
+
+
+def test_provider_hints_set_a_floor_within_bounds():
+    adaptive = make_interval()
+
+    assert adaptive.next_interval(2, {"max_age": 300, "retry_after": None}) == (300, "cache-control max-age")
+    assert adaptive.next_interval(2, {"max_age": 30}) == (60, "changes")
+    assert adaptive.next_interval(None, {"retry_after": 7200}) == (3600, "retry-after")
@@ -0,0 +1,59 @@
+from flight_controll.rest.cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_returns_value_until_ttl_expires():
+    clock = FakeClock()
+    cache = ResponseCache(ttl_seconds=10, clock=clock)
+    cache.put("k", b"body")
+
+    clock.now = 9.9
+    assert cache.get("k") == b"body"
+    clock.now = 10
+    assert cache.get("k") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(ttl_seconds=60, max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_fresh_serves_latest_validated_entry_within_window():
+    clock = FakeClock()
+    cache = ResponseCache(ttl_seconds=60, fresh_seconds=5, clock=clock)
+    assert cache.fresh("feed") is None
+
+    cache.put(("feed", "v1", "s1"), b"one")
+    cache.validated("feed", ("feed", "v1", "s1"))
+    clock.now = 4
+    assert cache.fresh("feed") == b"one"
+    clock.now = 5
+    assert cache.fresh("feed") is None
+    assert cache.latest_key("feed") == ("feed", "v1", "s1")
+
+
+def test_clear_drops_entries_and_validations():
+    cache = ResponseCache(ttl_seconds=60, fresh_seconds=5)
+    cache.put("k", 1)
+    cache.validated("feed", "k")
+
+    cache.clear()
+
+    assert cache.get("k") is None
+    assert cache.fresh("feed") is None
+    assert cache.latest_key("feed") is None
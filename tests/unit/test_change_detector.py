@@ -2,7 +2,9 @@ import pytest
 from unittest.mock import MagicMock
 from datetime import datetime, timedelta, timezone
 
+from flight_controll.event import change_detector
 from flight_controll.event.change_detector import (
+    description_hash,
     normalize_dtstamp,
     event_changed,
     detect_and_apply_updates,
@@ -98,6 +100,7 @@ def test_detect_and_apply_updates_skips_dtstamp_only_description_change():
         "start_time": "2099-01-01T10:00:00",
         "end_time": "2099-01-01T11:00:00",
         "description": "Same description",
+        "description_hash": description_hash("Same description"),
         "location": "Room A",
     }
     repo.find_docs_by_uids.return_value = [stored_doc]
@@ -120,6 +123,33 @@ def test_detect_and_apply_updates_skips_dtstamp_only_description_change():
     repo.update_one.assert_not_called()
 
 
+def test_unchanged_legacy_document_gets_its_description_hash_backfilled():
+    repo = MagicMock()
+    stored_doc = {
+        "uid": "u5",
+        "summary": "Event",
+        "start_time": "2099-01-01T10:00:00",
+        "end_time": "2099-01-01T11:00:00",
+        "description": "Same description",
+        "location": "Room A",
+    }
+    repo.find_docs_by_uids.return_value = [stored_doc]
+    events = [
+        {
+            "uid": "u5",
+            "summary": "Event",
+            "dtstart": "2099-01-01T10:00:00",
+            "dtend": "2099-01-01T11:00:00",
+            "description": "Same description\nDTSTAMP:20250101T120000Z",
+            "location": "Room A",
+        }
+    ]
+
+    assert detect_and_apply_updates(events, {"u5"}, repo) == []
+    # no updated_at: the backfill is not a visible change
+    repo.update_one.assert_called_once_with("u5", {"description_hash": description_hash("Same description")})
+
+
 def test_fetch_removed_events_deletes_future_documents_and_returns_them():
     repo = MagicMock()
     future_start = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
@@ -158,3 +188,137 @@ def test_fetch_removed_events_ignores_past_documents():
 
     assert results == []
     repo.delete_by_uids.assert_not_called()
+
+
+def test_detect_and_apply_updates_writes_only_changed_fields_and_updated_at():
+    repo = MagicMock()
+    stored_doc = {
+        "uid": "u3",
+        "summary": "Event",
+        "start_time": "2099-01-01T10:00:00",
+        "end_time": "2099-01-01T11:00:00",
+        "description": "Long unchanged description",
+        "description_hash": description_hash("Long unchanged description"),
+        "location": "Room A",
+    }
+    repo.find_docs_by_uids.return_value = [stored_doc]
+
+    events = [
+        {
+            "uid": "u3",
+            "summary": "Event",
+            "dtstart": "2099-01-01T12:00:00",
+            "dtend": "2099-01-01T11:00:00",
+            "description": "Long unchanged description\nDTSTAMP:20250101T120000Z",
+            "location": "Room B",
+        }
+    ]
+
+    results = detect_and_apply_updates(events, {"u3"}, repo)
+
+    uid, payload = repo.update_one.call_args[0]
+    assert uid == "u3"
+    assert set(payload) == {"start_time", "location", "updated_at"}
+    assert payload["location"] == "Room B"
+    assert results[0]["changed_fields"] == ["start", "location"]
+
+
+def test_description_hash_ignores_dtstamp_and_is_memoized(monkeypatch):
+    assert description_hash("Agenda\nDTSTAMP:20250101T120000Z") == description_hash("Agenda")
+    assert description_hash(None) == description_hash("")
+
+    text = "Memoized description\nDTSTAMP:20250101T120000Z"
+    description_hash(text)
+    calls = []
+    monkeypatch.setattr(
+        change_detector, "normalize_dtstamp", lambda t: calls.append(t) or t
+    )
+    description_hash(text)
+    assert calls == []
+
+
+def test_detect_and_apply_updates_compares_precomputed_hashes_and_backfills():
+    repo = MagicMock()
+    stored_doc = {
+        "uid": "u4",
+        "summary": "Event",
+        "start_time": "2099-01-01T10:00:00",
+        "end_time": "2099-01-01T11:00:00",
+        "description": "Old text",
+        "location": "Room A",
+    }
+    repo.find_docs_by_uids.return_value = [stored_doc]
+    events = [
+        {
+            "uid": "u4",
+            "summary": "Event",
+            "dtstart": "2099-01-01T10:00:00",
+            "dtend": "2099-01-01T11:00:00",
+            "description": "New text",
+            "description_hash": description_hash("New text"),
+            "location": "Room A",
+        }
+    ]
+
+    results = detect_and_apply_updates(events, {"u4"}, repo)
+
+    assert results[0]["changed_fields"] == ["description"]
+    _, payload = repo.update_one.call_args[0]
+    assert payload["description_hash"] == description_hash("New text")
+
+
+def _versioned_pair(stored_version, fetched_version, fetched_desc):
+    stored_doc = {
+        "uid": "v1",
+        "summary": "Event",
+        "start_time": "2099-01-01T10:00:00",
+        "end_time": "2099-01-01T11:00:00",
+        "description": "Text",
+        "description_hash": description_hash("Text"),
+        "location": "Room A",
+        "sequence": stored_version[0],
+        "last_modified": stored_version[1],
+    }
+    event = {
+        "uid": "v1",
+        "summary": "Event",
+        "dtstart": "2099-01-01T10:00:00",
+        "dtend": "2099-01-01T11:00:00",
+        "description": fetched_desc,
+        "location": "Room A",
+        "sequence": fetched_version[0],
+        "last_modified": fetched_version[1],
+    }
+    return stored_doc, event
+
+
+def test_build_update_skips_comparison_when_version_pair_unchanged():
+    stored_doc, event = _versioned_pair((2, "20250101T000000Z"), (2, "20250101T000000Z"), "Other")
+
+    assert change_detector.build_update(event, stored_doc) is None
+
+
+def test_build_update_refreshes_version_markers_without_reporting():
+    stored_doc, event = _versioned_pair((2, "20250101T000000Z"), (3, "20250102T000000Z"), "Text")
+
+    set_payload, record = change_detector.build_update(event, stored_doc)
+
+    assert record is None
+    assert set_payload["sequence"] == 3
+    assert set_payload["last_modified"] == "20250102T000000Z"
+
+
+def test_build_update_compares_fields_for_constant_sequence_without_last_modified():
+    stored_doc, event = _versioned_pair((0, None), (0, None), "Other")
+
+    set_payload, record = change_detector.build_update(event, stored_doc)
+
+    assert record["changed_fields"] == ["description"]
+
+
+def test_build_update_falls_back_to_full_comparison_without_versions():
+    stored_doc, event = _versioned_pair((None, None), (None, None), "Other")
+
+    set_payload, record = change_detector.build_update(event, stored_doc)
+
+    assert record["changed_fields"] == ["description"]
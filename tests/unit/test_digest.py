@@ -0,0 +1,275 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from flight_controll.event.digest import DigestBuffer, coalesce
+from flight_controll.event.event_service import EventService
+from flight_controll.extensions import init_extensions
+from flight_controll.scheduler.feeds import Feed, FeedConfig
+
+
+class FakeDigestCollection:
+    def __init__(self, name="events_digest"):
+        self.name = name
+        self.docs = {}
+
+    def create_index(self, *args, **kwargs):
+        pass
+
+    def find_one(self, query):
+        return self.docs.get(query["uid"])
+
+    def find(self, query):
+        return list(self.docs.values())
+
+    def replace_one(self, query, doc, upsert=False):
+        self.docs[query["uid"]] = doc
+
+    def delete_one(self, query):
+        self.docs.pop(query["uid"], None)
+
+    def delete_many(self, query):
+        for uid in query["uid"]["$in"]:
+            self.docs.pop(uid, None)
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def added(uid, start="2026-03-01T10:00:00", location="Room A"):
+    return {
+        "uid": uid,
+        "summary": f"Event {uid}",
+        "dtstart": start,
+        "dtend": "2026-03-01T11:00:00",
+        "description": "Desc",
+        "location": location,
+    }
+
+
+def removed(uid, start="2026-03-01T10:00:00", location="Room A"):
+    return {
+        "uid": uid,
+        "summary": f"Event {uid}",
+        "start_time": start,
+        "end_time": "2026-03-01T11:00:00",
+        "description": "Desc",
+        "location": location,
+    }
+
+
+def updated(uid, old_location, new_location):
+    return {
+        "uid": uid,
+        "summary": f"Event {uid}",
+        "old_start": "2026-03-01T10:00:00+00:00",
+        "new_start": "2026-03-01T10:00:00+00:00",
+        "old_end": "2026-03-01T11:00:00+00:00",
+        "new_end": "2026-03-01T11:00:00+00:00",
+        "old_description": "Desc",
+        "new_description": "Desc",
+        "old_location": old_location,
+        "new_location": new_location,
+        "changed_fields": ["location"],
+    }
+
+
+def test_added_then_removed_cancels_out():
+    assert coalesce(("added", added("a")), "removed", removed("a")) is None
+
+
+def test_added_then_updated_stays_added_with_latest_values():
+    kind, record = coalesce(("added", added("a")), "updated", updated("a", "Room A", "Room B"))
+    assert kind == "added"
+    assert record["location"] == "Room B"
+
+
+def test_multiple_updates_keep_first_old_and_last_new():
+    first = ("updated", updated("a", "Room A", "Room B"))
+    kind, record = coalesce(first, "updated", updated("a", "Room B", "Room C"))
+    assert kind == "updated"
+    assert (record["old_location"], record["new_location"]) == ("Room A", "Room C")
+    assert record["changed_fields"] == ["location"]
+
+
+def test_updates_back_to_the_original_cancel_out():
+    first = ("updated", updated("a", "Room A", "Room B"))
+    assert coalesce(first, "updated", updated("a", "Room B", "Room A")) is None
+
+
+def test_removed_then_added_becomes_update_or_nothing():
+    assert coalesce(("removed", removed("a")), "added", added("a")) is None
+    kind, record = coalesce(("removed", removed("a")), "added", added("a", start="2026-03-01T12:00:00"))
+    assert kind == "updated"
+    assert record["changed_fields"] == ["start"]
+
+
+def test_buffer_is_due_after_window_from_first_change():
+    clock = FakeClock()
+    buffer = DigestBuffer(FakeDigestCollection(), clock=clock)
+    assert not buffer.is_due(3600)
+
+    buffer.add([added("a")], [], [])
+    clock.now += 1800
+    buffer.add([], [], [updated("a", "Room A", "Room B")])
+    buffer.add([added("b")], [], [])
+    assert not buffer.is_due(3600)
+
+    clock.now += 1800
+    assert buffer.is_due(3600)
+    new, gone, changed, uids = buffer.pending()
+    assert [e["uid"] for e in new] == ["a", "b"]
+    assert new[0]["location"] == "Room B"
+    assert gone == [] and changed == []
+
+    buffer.clear(uids)
+    assert not buffer.is_due(0)
+
+
+class DigestConfig:
+    SMTP_SERVER = "smtp.example.com"
+    SMTP_PORT = 587
+    SMTP_USERNAME = "u"
+    SMTP_PASSWORD = "p"
+    RECIPIENT_EMAIL = "r@example.com"
+    DIGEST_WINDOW_MINUTES = 60
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        collection = self[name] = FakeDigestCollection(name)
+        return collection
+
+
+def test_each_feed_buffers_its_own_digest():
+    config = DigestConfig()
+    config.MONGO_HOST, config.MONGO_DB, config.MONGO_COLLECTION = "localhost", "flights", "events"
+    app = SimpleNamespace(app_config=config, extensions={})
+    db = FakeDatabase()
+    with patch("pymongo.MongoClient", return_value={"flights": db}):
+        init_extensions(app)
+    make_event_service = app.extensions["make_event_service"]
+    crew = make_event_service(
+        cfg=FeedConfig(config, Feed("crew", "https://example.com/crew.ics", 60)),
+        events_collection_override=db["events_crew"],
+    )
+    default = make_event_service(cfg=config)
+
+    crew.digest_buffer.add([added("a")], [], [])
+    default.digest_buffer.add([added("b")], [], [])
+
+    assert crew.digest_buffer.pending()[3] == ["a"]
+    assert default.digest_buffer.pending()[3] == ["b"]
+    assert list(db["events_crew_digest"].docs) == ["a"]
+    assert list(db["events_digest"].docs) == ["b"]
+
+
+def test_event_service_buffers_until_window_elapses():
+    es = EventService(
+        config=DigestConfig(),
+        email_sender_cls=MagicMock(),
+        fetcher_cls=MagicMock,
+        events_collection=MagicMock(),
+        digest_collection=FakeDigestCollection(),
+    )
+    clock = FakeClock()
+    es.digest_buffer.clock = clock
+    es.send_summary_email = MagicMock()
+
+    assert es._notify([added("a")], [], []) == "buffered"
+    clock.now += 3600
+    assert es._notify([], [], []) == "sent"
+    es.send_summary_email.assert_called_once()
+    assert [e["uid"] for e in es.send_summary_email.call_args[0][0]] == ["a"]
+    assert es._notify([], [], []) == "sent"
+    assert es.send_summary_email.call_count == 1
+
+
+def test_near_term_changes_bypass_the_digest():
+    config = DigestConfig()
+    config.PRIORITY_HORIZON_HOURS = 6
+    sender_cls = MagicMock()
+    es = EventService(
+        config=config,
+        email_sender_cls=sender_cls,
+        fetcher_cls=MagicMock,
+        events_collection=MagicMock(),
+        digest_collection=FakeDigestCollection(),
+    )
+    soon = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+
+    assert es._notify([added("a")], [removed("b", start=soon), removed("c")], []) == "buffered"
+
+    subject = sender_cls.return_value.send_email.call_args[0][1]
+    assert subject == "Urgent: 1 upcoming event changed"
+    new, gone, changed, uids = es.digest_buffer.pending()
+    assert sorted(uids) == ["a", "c"]
+
+
+def test_failed_urgent_send_falls_back_to_the_digest():
+    config = DigestConfig()
+    config.PRIORITY_HORIZON_HOURS = 6
+    sender_cls = MagicMock()
+    sender_cls.return_value.send_email.side_effect = OSError("relay down")
+    es = EventService(
+        config=config,
+        email_sender_cls=sender_cls,
+        fetcher_cls=MagicMock,
+        events_collection=MagicMock(),
+        digest_collection=FakeDigestCollection(),
+    )
+    soon = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+
+    assert es._notify([added("a")], [removed("b", start=soon)], []) == "buffered"
+
+    new, gone, changed, uids = es.digest_buffer.pending()
+    assert sorted(uids) == ["a", "b"]
+
+
+def test_urgent_send_reported_as_failed_falls_back_to_the_digest():
+    config = DigestConfig()
+    config.PRIORITY_HORIZON_HOURS = 6
+    sender_cls = MagicMock()
+    sender_cls.return_value.send_email.return_value = False
+    es = EventService(
+        config=config,
+        email_sender_cls=sender_cls,
+        fetcher_cls=MagicMock,
+        events_collection=MagicMock(),
+        digest_collection=FakeDigestCollection(),
+    )
+    soon = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+
+    assert es._notify([added("a")], [removed("b", start=soon)], []) == "buffered"
+
+    new, gone, changed, uids = es.digest_buffer.pending()
+    assert sorted(uids) == ["a", "b"]
+
+
+def test_digest_reported_as_failed_stays_buffered():
+    sender_cls = MagicMock()
+    sender_cls.return_value.send_email.return_value = False
+    es = EventService(
+        config=DigestConfig(),
+        email_sender_cls=sender_cls,
+        fetcher_cls=MagicMock,
+        events_collection=MagicMock(),
+        digest_collection=FakeDigestCollection(),
+    )
+    clock = FakeClock()
+    es.digest_buffer.clock = clock
+
+    assert es._notify([added("a")], [], []) == "buffered"
+    clock.now += 3600
+    with pytest.raises(RuntimeError):
+        es._notify([], [], [])
+
+    sender_cls.return_value.send_email.assert_called_once()
+    assert es.digest_buffer.pending()[3] == ["a"]
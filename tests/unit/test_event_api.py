@@ -1,5 +1,17 @@
+import gzip
+import json
+import threading
+import time
+from datetime import timedelta
 from unittest.mock import MagicMock, patch
 
+import pytest
+
+from flight_controll.event.ics import CalendarRenderer
+from flight_controll.rest.cache import ResponseCache
+from flight_controll.scheduler import scheduler as scheduler_module
+from tests.unit.test_repository import T0, QueryableCollection, make_docs, reschedule
+
 
 def make_service_mock(return_events=None):
     inst = MagicMock()
@@ -34,6 +46,32 @@ def test_fetch_persist_endpoint_stores_events(mock_event_service, client):
     inst.store_events.assert_called_once()
 
 
+@patch("flight_controll.rest.event_api.EventService")
+def test_fetch_streams_ndjson_with_stream_param(mock_event_service, client):
+    inst = make_service_mock()
+    inst.iter_new_events.return_value = iter([{"uid": "1"}, {"uid": "2"}])
+    mock_event_service.return_value = inst
+
+    resp = client.post("/events/fetch?stream=1")
+
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/x-ndjson"
+    assert [json.loads(line) for line in resp.get_data(as_text=True).splitlines()] == [{"uid": "1"}, {"uid": "2"}]
+    inst.fetch_events.assert_not_called()
+
+
+@patch("flight_controll.rest.event_api.EventService")
+def test_fetch_persist_streams_ndjson_for_accept_header(mock_event_service, client):
+    inst = make_service_mock()
+    inst.iter_new_events.return_value = iter([{"uid": "1"}])
+    mock_event_service.return_value = inst
+
+    resp = client.post("/events/fetch-persist", headers={"Accept": "application/x-ndjson"})
+
+    assert [json.loads(line) for line in resp.get_data(as_text=True).splitlines()] == [{"uid": "1"}]
+    inst.iter_new_events.assert_called_once_with(store=True)
+
+
 @patch("flight_controll.rest.event_api.EventService")
 def test_trigger_check_calls_fetch_persist_and_send(mock_event_service, client):
     data = [{"uid": "1", "summary": "S"}]
@@ -44,3 +82,332 @@ def test_trigger_check_calls_fetch_persist_and_send(mock_event_service, client):
     assert resp.status_code == 200
     assert resp.get_json() == data
     inst.fetch_persist_and_send_events.assert_called_once()
+
+
+@patch("flight_controll.rest.event_api.EventService")
+def test_trigger_check_runs_under_the_cross_process_lock(mock_event_service, app, client, monkeypatch):
+    inst = make_service_mock(return_events=[{"uid": "1"}])
+    mock_event_service.return_value = inst
+    check_lock = MagicMock()
+    check_lock.run.side_effect = lambda fn, wait_seconds: (True, fn())
+    monkeypatch.setitem(app.extensions, "make_check_lock", lambda job_id: check_lock)
+
+    resp = client.post("/events/trigger-check")
+    assert resp.status_code == 200
+    assert resp.get_json() == [{"uid": "1"}]
+
+    check_lock.run.side_effect = None
+    check_lock.run.return_value = (False, None)
+    resp = client.post("/events/trigger-check")
+    assert resp.status_code == 409
+    assert "another process" in resp.get_json()["error"]
+    inst.fetch_persist_and_send_events.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "path", ["/events/fetch", "/events/fetch-persist", "/events/trigger-check", "/events/fetch?stream=1"]
+)
+@patch("flight_controll.rest.event_api.EventService")
+def test_responses_omit_the_internal_description_hash(mock_event_service, client, path):
+    data = [{"uid": "1", "summary": "S", "description_hash": "abc"}]
+    inst = make_service_mock(return_events=data)
+    inst.iter_new_events.return_value = iter(data)
+    mock_event_service.return_value = inst
+
+    resp = client.post(path)
+
+    assert resp.status_code == 200
+    assert [json.loads(line) for line in resp.get_data(as_text=True).splitlines()] in (
+        [[{"uid": "1", "summary": "S"}]],
+        [{"uid": "1", "summary": "S"}],
+    )
+
+
+class _SchedulerApp:
+    """The scheduler's view of an app that shares the web app's single-flight coordinator."""
+
+    def __init__(self, app, service, check_lock=None):
+        class Cfg:
+            WEBCAL_SCHEDULER_DELAY_MINUTES = 1
+
+        self.app_config = Cfg()
+        self.config = {}
+        self.extensions = {"single_flight": app.extensions["single_flight"], "make_event_service": lambda cfg: service}
+        if check_lock is not None:
+            self.extensions["make_check_lock"] = lambda job_id: check_lock
+
+
+def _start_scheduled_tick(scheduler_app):
+    with patch.object(scheduler_module, "scheduler"):
+        scheduler_module.init_scheduler(scheduler_app)
+    tick = threading.Thread(target=scheduler_app.extensions["_webcal_check_func"])
+    tick.start()
+    return tick
+
+
+@pytest.mark.parametrize("lock_held", [False, True])
+@patch("flight_controll.rest.event_api.EventService")
+def test_trigger_check_joins_an_in_flight_scheduled_run(mock_event_service, app, client, lock_held):
+    own = make_service_mock()
+    mock_event_service.return_value = own
+    started, release = threading.Event(), threading.Event()
+    events = [{"uid": "1"}, {"uid": "2"}]
+
+    def scheduled_check():
+        started.set()
+        release.wait(5)
+        return events
+
+    scheduled = MagicMock()
+    scheduled.fetch_persist_and_send_events.side_effect = scheduled_check
+    check_lock = None
+    if lock_held:
+        # the tick finds the lock held by another process once the trigger has joined
+        check_lock = MagicMock()
+        check_lock.run.side_effect = lambda fn: (started.set(), release.wait(5), (False, None))[-1]
+    tick = _start_scheduled_tick(_SchedulerApp(app, scheduled, check_lock))
+    assert started.wait(5)
+    threading.Timer(0.1, release.set).start()
+
+    resp = client.post("/events/trigger-check")
+    tick.join(5)
+
+    if lock_held:
+        assert resp.status_code == 409
+    else:
+        assert resp.status_code == 200
+        assert resp.get_json() == events
+    own.fetch_persist_and_send_events.assert_not_called()
+
+
+def _poll_job(client, location, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        data = client.get(location).get_json()
+        if data["status"] in ("succeeded", "failed") or time.monotonic() > deadline:
+            return data
+        time.sleep(0.01)
+
+
+@patch("flight_controll.rest.event_api.EventService")
+def test_trigger_check_async_returns_202_and_job_reports_counts(mock_event_service, client):
+    inst = make_service_mock(return_events=[{"uid": "1"}, {"uid": "2"}])
+    inst.last_run_stats = {"new_count": 2, "updated_count": 3, "removed_count": 1}
+    mock_event_service.return_value = inst
+
+    resp = client.post("/events/trigger-check", headers={"Prefer": "respond-async"})
+    assert resp.status_code == 202
+    job_id = resp.get_json()["id"]
+    assert resp.headers["Location"].endswith(f"/events/jobs/{job_id}")
+
+    data = _poll_job(client, resp.headers["Location"])
+    assert data["status"] == "succeeded"
+    assert data["result"] == {"added": 2, "removed": 1, "updated": 3}
+    assert data["duration_seconds"] is not None
+    inst.fetch_persist_and_send_events.assert_called_once()
+
+
+@patch("flight_controll.rest.event_api.EventService")
+def test_trigger_check_async_job_reports_failure(mock_event_service, client):
+    inst = make_service_mock()
+    inst.fetch_persist_and_send_events.side_effect = RuntimeError("feed down")
+    mock_event_service.return_value = inst
+
+    resp = client.post("/events/trigger-check?async=true")
+    assert resp.status_code == 202
+
+    data = _poll_job(client, resp.headers["Location"])
+    assert data["status"] == "failed"
+    assert data["error"] == "feed down"
+
+
+def test_unknown_job_returns_404(client):
+    resp = client.get("/events/jobs/does-not-exist")
+    assert resp.status_code == 404
+
+
+@pytest.fixture
+def stored_events(app, monkeypatch):
+    coll = QueryableCollection(make_docs())
+    monkeypatch.setitem(app.extensions, "events_collection", coll)
+    return coll
+
+
+def test_list_events_pages_with_cursor(client, stored_events):
+    first = client.get("/events?limit=3")
+    assert first.status_code == 200
+    page = first.get_json()
+    assert [e["uid"] for e in page["events"]] == ["e0", "e1", "e2"]
+    assert page["events"][0]["start_time"] == "2030-01-01T00:00:00+00:00"
+
+    second = client.get(f"/events?limit=3&cursor={page['next_cursor']}").get_json()
+    assert [e["uid"] for e in second["events"]] == ["e3"]
+    assert second["next_cursor"] is None
+
+
+def test_list_events_filters_by_range_and_location(client, stored_events):
+    resp = client.get("/events?from=2030-01-01T00:30:00Z&location=ARN")
+
+    assert [e["uid"] for e in resp.get_json()["events"]] == ["e2", "e3"]
+
+
+def test_list_events_returns_304_until_the_collection_changes(client, stored_events):
+    first = client.get("/events?location=ARN")
+    etag = first.headers["ETag"]
+    queries = len(stored_events.queries)
+
+    cached = client.get("/events?location=ARN", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    # only the state-version lookup ran, not the page query
+    assert len(stored_events.queries) == queries + 1
+
+    stored_events.docs.pop()
+    changed = client.get("/events?location=ARN", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_list_events_streams_ndjson_without_paging(client, stored_events):
+    resp = client.get("/events?limit=1", headers={"Accept": "application/x-ndjson"})
+
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert resp.mimetype == "application/x-ndjson"
+    assert [e["uid"] for e in lines] == ["e0", "e1", "e2", "e3"]
+    assert lines[0]["start_time"] == "2030-01-01T00:00:00+00:00"
+    assert resp.headers["ETag"]
+
+
+def test_list_events_encodes_naive_datetimes_as_utc(app, client, monkeypatch):
+    # pymongo returns naive UTC datetimes
+    doc = {"uid": "n1", "start_time": T0.replace(tzinfo=None), "updated_at": "2030-01-01T00:00:00"}
+    monkeypatch.setitem(app.extensions, "events_collection", QueryableCollection([doc]))
+
+    page = client.get("/events").get_json()
+    streamed = json.loads(client.get("/events?stream=1").get_data(as_text=True))
+
+    assert page["events"][0]["start_time"] == "2030-01-01T00:00:00+00:00"
+    assert streamed["start_time"] == "2030-01-01T00:00:00+00:00"
+
+
+def test_list_events_etag_differs_between_json_and_ndjson(client, stored_events):
+    json_resp = client.get("/events")
+    ndjson_headers = {"Accept": "application/x-ndjson"}
+    ndjson_resp = client.get("/events", headers=ndjson_headers)
+
+    assert json_resp.headers["ETag"] != ndjson_resp.headers["ETag"]
+    assert "Accept" in json_resp.headers["Vary"] and "Accept" in ndjson_resp.headers["Vary"]
+    # a JSON validator never revalidates the NDJSON stream
+    resp = client.get("/events", headers={**ndjson_headers, "If-None-Match": json_resp.headers["ETag"]})
+    assert resp.status_code == 200
+    resp = client.get("/events", headers={**ndjson_headers, "If-None-Match": ndjson_resp.headers["ETag"]})
+    assert resp.status_code == 304
+
+
+def test_list_events_keeps_json_for_wildcard_accept(client, stored_events):
+    resp = client.get("/events", headers={"Accept": "*/*"})
+
+    assert resp.mimetype == "application/json"
+
+
+@pytest.fixture
+def calendar_events(app, monkeypatch, stored_events):
+    stored_events.docs.append(
+        {"uid": "private", "start_time": T0, "location": "Privat", "updated_at": "2029-12-01T00:00:00"}
+    )
+    stored_events.docs.append({"uid": "past", "start_time": T0.replace(year=2000), "updated_at": "2029-12-01T00:00:00"})
+    monkeypatch.setitem(app.extensions, "calendar_renderer", CalendarRenderer())
+    monkeypatch.setitem(app.extensions, "calendar_cache", ResponseCache())
+    return stored_events
+
+
+def test_calendar_exports_upcoming_events_without_excluded_locations(client, calendar_events):
+    resp = client.get("/events/calendar.ics")
+
+    body = resp.get_data(as_text=True)
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/calendar"
+    assert [line for line in body.split("\r\n") if line.startswith("UID:")] == [
+        "UID:e0", "UID:e1", "UID:e2", "UID:e3"
+    ]
+
+
+def test_calendar_includes_rescheduled_events(client, calendar_events):
+    reschedule(calendar_events, "e0", T0 + timedelta(days=2))
+
+    body = client.get("/events/calendar.ics").get_data(as_text=True)
+
+    assert [line for line in body.split("\r\n") if line.startswith("UID:")] == [
+        "UID:e1", "UID:e2", "UID:e3", "UID:e0"
+    ]
+    assert "DTSTART:20300103T000000Z" in body
+
+
+def test_calendar_is_gzipped_and_revalidated_by_etag(client, app, calendar_events):
+    headers = {"Accept-Encoding": "gzip"}
+    first = client.get("/events/calendar.ics", headers=headers)
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(first.get_data()).startswith(b"BEGIN:VCALENDAR")
+    assert first.headers["ETag"] != client.get("/events/calendar.ics").headers["ETag"]
+
+    etag = first.headers["ETag"]
+    cached = client.get("/events/calendar.ics", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+
+    calendar_events.docs[0]["updated_at"] = "2030-02-01T00:00:00"
+    changed = client.get("/events/calendar.ics", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    # only the changed event was rendered again
+    assert app.extensions["calendar_renderer"].rendered == 5
+
+
+def test_endpoints_route_by_feed_when_several_feeds_are_configured(app, client, monkeypatch):
+    feeds = [{"name": "crew", "url": "https://example.com/crew.ics"}, {"name": "training", "url": "https://x/t.ics"}]
+    monkeypatch.setattr(app.app_config, "WEBCAL_FEEDS", json.dumps(feeds), raising=False)
+    crew = QueryableCollection(make_docs())
+    monkeypatch.setitem(app.extensions, "mongo_db", {"col_crew": crew, "col_training": QueryableCollection([])})
+    monkeypatch.setitem(app.extensions, "events_collection", QueryableCollection([]))
+
+    resp = client.get("/events")
+    assert resp.status_code == 400
+    assert "?feed=" in resp.get_json()["error"]
+    assert client.post("/events/trigger-check").status_code == 400
+    assert client.get("/events?feed=unknown").status_code == 400
+
+    resp = client.get("/events?feed=crew&limit=1000")
+    assert len(resp.get_json()["events"]) == len(crew.docs)
+    assert client.get("/events?feed=training").get_json()["events"] == []
+
+
+@pytest.mark.parametrize("query", ["from=yesterday", "limit=0", "limit=x", "cursor=%%%"])
+def test_list_events_rejects_bad_parameters(client, stored_events, query):
+    assert client.get(f"/events?{query}").status_code == 400
+
+
+@patch("flight_controll.rest.event_api.EventService")
+def test_fetch_is_served_from_cache_while_feed_and_store_are_unchanged(mock_event_service, client, app, monkeypatch):
+    clock = [0.0]
+    cache = ResponseCache(ttl_seconds=300, fresh_seconds=10, clock=lambda: clock[0])
+    monkeypatch.setitem(app.extensions, "fetch_cache", cache)
+    data = [{"uid": "1", "summary": "S"}]
+    inst = make_service_mock(return_events=data)
+    inst.fetch_events_if_changed.side_effect = lambda validator: None if validator == "etag:v1" else data
+    inst.last_feed_validator = "etag:v1"
+    inst.repository.state_version.return_value = "1:a"
+    mock_event_service.return_value = inst
+
+    assert client.post("/events/fetch").get_json() == data
+    # within the freshness window nothing is fetched or queried
+    assert client.post("/events/fetch").get_json() == data
+    assert inst.fetch_events_if_changed.call_count == 1
+
+    # afterwards the feed is revalidated; a 304 and the same state reuse the body
+    clock[0] = 11
+    assert client.post("/events/fetch").get_json() == data
+    assert inst.fetch_events_if_changed.call_count == 2
+    assert inst.filter_new_events.call_count == 1
+
+    # a changed store re-renders from a full fetch
+    clock[0] = 22
+    inst.repository.state_version.return_value = "2:b"
+    assert client.post("/events/fetch").get_json() == data
+    assert inst.filter_new_events.call_count == 2
@@ -94,6 +94,31 @@ def test_filter_new_events_filters_existing(mock_mongo_client):
     assert out[0]["uid"] == "new"
 
 
+@patch.object(es_module, "MongoClient")
+def test_iter_new_events_filters_and_stores_in_batches(mock_mongo_client):
+    class FiveEventFetcher:
+        def __init__(self, url):
+            pass
+
+        def fetch_events(self):
+            return [{"uid": f"u{i}", "summary": "s", "location": "ARN"} for i in range(5)]
+
+    collection = MagicMock()
+    collection.find.side_effect = lambda query, projection: [
+        {"uid": uid} for uid in query["uid"]["$in"] if uid == "u3"
+    ]
+    es = EventService(
+        config=DummyConfig(), email_sender_cls=MagicMock, fetcher_cls=FiveEventFetcher, events_collection=collection
+    )
+    es.store_events = MagicMock()
+
+    out = list(es.iter_new_events(batch_size=2, store=True))
+
+    assert [e["uid"] for e in out] == ["u0", "u1", "u2", "u4"]
+    assert collection.find.call_count == 3
+    assert [len(c.args[0]) for c in es.store_events.call_args_list] == [2, 1, 1]
+
+
 @patch.object(es_module, "MongoClient")
 def test_fetch_events_filters_privileged_location(mock_mongo_client):
     config = DummyConfig()
@@ -522,6 +547,7 @@ def test_description_only_dtstamp_difference_not_considered_update(mock_mongo_cl
         "start_time": "2099-01-01T10:00:00",
         "end_time": "2099-01-01T11:00:00",
         "description": "Summary of event",
+        "description_hash": es_module.description_hash("Summary of event"),
         "location": "L",
     }
     fetched_event = {
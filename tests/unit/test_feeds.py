@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from flight_controll.scheduler.feeds import (
+    DEFAULT_FEED,
+    Feed,
+    FeedConfig,
+    collection_name,
+    jitter_offset,
+    load_feeds,
+    select_feed,
+)
+
+
+class Cfg:
+    WEB_CAL_URL = "https://example.com/default.ics"
+    WEBCAL_SCHEDULER_DELAY_MINUTES = 15
+
+
+def test_load_feeds_defaults_to_web_cal_url():
+    feeds = load_feeds(Cfg())
+
+    assert feeds == [Feed(DEFAULT_FEED, "https://example.com/default.ics", 900)]
+    assert feeds[0].job_id == "webcal-check"
+
+
+def test_load_feeds_parses_entries_with_interval_override():
+    cfg = Cfg()
+    cfg.WEBCAL_FEEDS = json.dumps(
+        [
+            {"name": "crew", "url": "https://example.com/crew.ics"},
+            {"name": "training", "url": "https://example.com/t.ics", "interval_minutes": 60, "collection": "t"},
+        ]
+    )
+
+    crew, training = load_feeds(cfg)
+
+    assert (crew.name, crew.interval_seconds, crew.job_id) == ("crew", 900, "webcal-check:crew")
+    assert (training.interval_seconds, training.collection) == (3600, "t")
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        "not json",
+        json.dumps([{"url": "https://example.com/a.ics"}]),
+        json.dumps([{"name": "a", "url": "u"}, {"name": "a", "url": "v"}]),
+        json.dumps([{"name": "digest", "url": "u"}]),
+        json.dumps([{"name": "jobs", "url": "u"}]),
+        json.dumps([{"name": "locks", "url": "u"}]),
+    ],
+)
+def test_load_feeds_rejects_invalid_config(raw):
+    cfg = Cfg()
+    cfg.WEBCAL_FEEDS = raw
+
+    with pytest.raises(ValueError):
+        load_feeds(cfg)
+
+
+def test_load_feeds_rejects_collections_shared_with_another_feed_or_the_service():
+    cfg = Cfg()
+    cfg.MONGO_COLLECTION = "events"
+    cfg.WEBCAL_FEEDS = json.dumps([{"name": "crew", "url": "u", "collection": "events_locks"}])
+    with pytest.raises(ValueError, match="collections"):
+        load_feeds(cfg)
+
+    cfg.WEBCAL_FEEDS = json.dumps(
+        [{"name": "crew", "url": "u"}, {"name": "other", "url": "v", "collection": "events_crew"}]
+    )
+    with pytest.raises(ValueError, match="collections"):
+        load_feeds(cfg)
+
+    cfg.WEBCAL_FEEDS = json.dumps([{"name": "crew", "url": "u"}, {"name": "crew_digest", "url": "v"}])
+    with pytest.raises(ValueError, match="collections"):
+        load_feeds(cfg)
+
+
+def test_select_feed_by_name_or_default():
+    default, crew = Feed(DEFAULT_FEED, "u", 60), Feed("crew", "v", 60)
+
+    assert select_feed([default, crew]) is default
+    assert select_feed([default, crew], "crew") is crew
+    assert select_feed([crew]) is crew
+    with pytest.raises(LookupError, match="unknown feed"):
+        select_feed([default, crew], "training")
+    with pytest.raises(LookupError, match=r"\?feed="):
+        select_feed([crew, Feed("training", "w", 60)])
+
+
+def test_collection_name_keeps_default_feed_in_the_main_collection():
+    assert collection_name(Feed(DEFAULT_FEED, "u", 60), "events") == "events"
+    assert collection_name(Feed("crew", "u", 60), "events") == "events_crew"
+    assert collection_name(Feed("crew", "u", 60, collection="other"), "events") == "other"
+
+
+def test_jitter_offset_is_deterministic_and_within_interval():
+    assert jitter_offset("crew", 900) == jitter_offset("crew", 900)
+    offsets = [jitter_offset(f"feed-{i}", 900) for i in range(200)]
+
+    assert all(0 <= o < 900 for o in offsets)
+    # spread over the interval rather than clustered on one boundary
+    quarters = {int(o // 225) for o in offsets}
+    assert quarters == {0, 1, 2, 3}
+
+
+def test_feed_config_overrides_url_only():
+    cfg = FeedConfig(Cfg(), Feed("crew", "https://example.com/crew.ics", 60))
+
+    assert cfg.WEB_CAL_URL == "https://example.com/crew.ics"
+    assert cfg.FEED_NAME == "crew"
+    assert cfg.WEBCAL_SCHEDULER_DELAY_MINUTES == 15
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+
+from flight_controll.event.ics import CalendarRenderer, render_vevent
+
+
+def test_render_vevent_writes_utc_times_and_escapes_text():
+    block = render_vevent(
+        {
+            "uid": "e1",
+            "start_time": datetime(2030, 1, 1, 10, 0),
+            "end_time": datetime(2030, 1, 1, 12, 0, tzinfo=timezone(timedelta(hours=1))),
+            "summary": "Flight; ARN, GOT",
+            "description": "Gate 4\nCrew \\ catering",
+            "sequence": 2,
+            "last_modified": "20291201T080000Z",
+        }
+    )
+
+    assert block.split("\r\n") == [
+        "BEGIN:VEVENT",
+        "UID:e1",
+        "DTSTAMP:20291201T080000Z",
+        "DTSTART:20300101T100000Z",
+        "DTEND:20300101T110000Z",
+        "SEQUENCE:2",
+        "SUMMARY:Flight\\; ARN\\, GOT",
+        "DESCRIPTION:Gate 4\\nCrew \\\\ catering",
+        "END:VEVENT",
+        "",
+    ]
+
+
+def test_long_lines_are_folded_at_75_octets():
+    block = render_vevent({"uid": "e1", "updated_at": "2030-01-01T00:00:00", "description": "å" * 100})
+
+    lines = block.split("\r\n")
+    folded = [line for line in lines if line.startswith("DESCRIPTION:") or line.startswith(" ")]
+    assert len(folded) > 1
+    assert all(len(line.encode("utf-8")) <= 75 for line in lines)
+    assert "".join(line[1:] if line.startswith(" ") else line for line in folded) == "DESCRIPTION:" + "å" * 100
+
+
+def test_renderer_only_rerenders_changed_events():
+    renderer = CalendarRenderer()
+    docs = [{"uid": f"e{i}", "summary": "old", "updated_at": "1"} for i in range(3)]
+    first = renderer.render(docs)
+
+    docs[1] = {"uid": "e1", "summary": "new", "updated_at": "2"}
+    second = renderer.render(docs)
+
+    assert first.startswith("BEGIN:VCALENDAR\r\n") and first.endswith("END:VCALENDAR\r\n")
+    assert second.count("SUMMARY:old") == 2 and "SUMMARY:new" in second
+    assert (renderer.rendered, renderer.reused) == (4, 2)
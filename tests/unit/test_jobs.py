@@ -0,0 +1,144 @@
+import threading
+import time
+
+from flight_controll.rest.jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, JobRegistry
+
+
+def _wait_finished(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while job.active and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not job.active
+
+
+def test_job_runs_in_background_and_records_result_and_timings():
+    registry = JobRegistry(max_workers=1)
+    release = threading.Event()
+
+    job = registry.submit("check", lambda: release.wait(5) and {"added": 1})
+    assert job.status in (QUEUED, RUNNING)
+    release.set()
+    _wait_finished(job)
+
+    data = registry.get(job.id).to_dict()
+    assert data["status"] == SUCCEEDED
+    assert data["result"] == {"added": 1}
+    assert data["started_at"] and data["finished_at"]
+    assert data["duration_seconds"] >= 0
+    registry.shutdown()
+
+
+def test_failed_job_reports_error():
+    registry = JobRegistry(max_workers=1)
+
+    def boom():
+        raise RuntimeError("feed down")
+
+    job = registry.submit("check", boom)
+    _wait_finished(job)
+
+    assert job.status == FAILED
+    assert job.error == "feed down"
+    assert job.result is None
+    registry.shutdown()
+
+
+def test_submit_returns_active_job_with_same_key():
+    registry = JobRegistry(max_workers=2)
+    release = threading.Event()
+
+    first = registry.submit("check", lambda: release.wait(5) and {})
+    second = registry.submit("check", lambda: {})
+    other = registry.submit("other", lambda: {})
+    release.set()
+    _wait_finished(first)
+    _wait_finished(other)
+
+    assert second is first
+    assert other.id != first.id
+    assert registry.submit("check", lambda: {}).id != first.id
+    registry.shutdown()
+
+
+def test_only_recent_finished_jobs_are_kept():
+    registry = JobRegistry(max_workers=1, history=2)
+    jobs = []
+    for i in range(4):
+        jobs.append(registry.submit(f"k{i}", lambda: {}))
+        _wait_finished(jobs[-1])
+    registry.submit("last", lambda: {})
+
+    assert registry.get(jobs[0].id) is None
+    assert registry.get(jobs[1].id) is None
+    assert registry.get(jobs[3].id) is jobs[3]
+    registry.shutdown()
+
+
+class FakeJobCollection:
+    """Shared job store, as the web workers' Mongo collection would be."""
+
+    def __init__(self):
+        self.docs = {}
+
+    def replace_one(self, query, doc, upsert=False):
+        self.docs[query["_id"]] = dict(doc)
+
+    def find_one(self, query):
+        doc = self.docs.get(query["_id"])
+        # Mongo hands back naive UTC datetimes
+        return {k: v.replace(tzinfo=None) if hasattr(v, "tzinfo") else v for k, v in doc.items()} if doc else None
+
+    def find(self, query, projection=None):
+        statuses = query["status"]["$in"]
+        return FakeCursor([doc for doc in list(self.docs.values()) if doc["status"] in statuses])
+
+    def delete_many(self, query):
+        for job_id in query["_id"]["$in"]:
+            del self.docs[job_id]
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        self.docs.sort(key=lambda doc: doc[key], reverse=direction < 0)
+        return self
+
+    def skip(self, n):
+        self.docs = self.docs[n:]
+        return self
+
+    def __iter__(self):
+        return iter(self.docs)
+
+
+def test_job_state_is_readable_from_another_worker():
+    collection = FakeJobCollection()
+    worker = JobRegistry(max_workers=1, collection=collection)
+    other_worker = JobRegistry(max_workers=1, collection=collection)
+    release = threading.Event()
+
+    job = worker.submit("check", lambda: release.wait(5) and {"added": 2})
+    assert other_worker.get(job.id).status in (QUEUED, RUNNING)
+    release.set()
+    worker.shutdown()
+
+    data = other_worker.get(job.id).to_dict()
+    assert data == job.to_dict()
+    assert data["result"] == {"added": 2}
+    assert data["finished_at"].endswith("+00:00")
+    assert other_worker.get("unknown") is None
+    other_worker.shutdown()
+
+
+def test_shared_collection_keeps_only_recent_finished_jobs():
+    collection = FakeJobCollection()
+    registry = JobRegistry(max_workers=1, history=2, collection=collection)
+    jobs = []
+    for i in range(4):
+        jobs.append(registry.submit(f"k{i}", lambda: {}))
+        _wait_finished(jobs[-1])
+    registry.shutdown()
+
+    assert sorted(collection.docs) == sorted(job.id for job in jobs[2:])
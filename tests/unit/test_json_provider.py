@@ -0,0 +1,61 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from flask import Flask
+
+from flight_controll.models.event import Event
+from flight_controll.rest import json_provider
+from flight_controll.rest.json_provider import FastJSONProvider
+
+# providers hold only a weak reference to their app
+APP = Flask(__name__)
+
+PAYLOAD = {
+    "uid": "e1",
+    "dtstart": datetime(2030, 1, 1, 10, 0),
+    "start_time": datetime(2030, 1, 1, 10, 0, tzinfo=timezone.utc),
+    "local": datetime(2030, 1, 1, 11, 0, tzinfo=timezone(timedelta(hours=1))),
+    "day": date(2030, 1, 1),
+    "event": Event(uid="e2", summary="Flight ÅRN"),
+}
+
+EXPECTED = {
+    "uid": "e1",
+    "dtstart": "2030-01-01T10:00:00+00:00",
+    "start_time": "2030-01-01T10:00:00+00:00",
+    "local": "2030-01-01T11:00:00+01:00",
+    "day": "2030-01-01",
+    "event": Event(uid="e2", summary="Flight ÅRN").to_dict(),
+}
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def provider(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(json_provider, "orjson", None)
+    elif not json_provider.orjson_available():
+        pytest.skip("orjson is not installed")
+    return FastJSONProvider(APP)
+
+
+def test_encodes_datetimes_dates_and_events(provider):
+    assert provider.loads(provider.dumps(PAYLOAD)) == EXPECTED
+
+
+def test_orjson_and_stdlib_output_match(monkeypatch):
+    if not json_provider.orjson_available():
+        pytest.skip("orjson is not installed")
+    provider = FastJSONProvider(APP)
+    fast = provider.response(PAYLOAD).get_data()
+    monkeypatch.setattr(json_provider, "orjson", None)
+
+    assert provider.response(PAYLOAD).get_data() == fast
+    assert fast.endswith(b"\n") and "ÅRN".encode("utf-8") in fast
+
+
+def test_values_orjson_rejects_fall_back_to_stdlib(provider):
+    assert provider.loads(provider.dumps({1: 2 ** 70})) == {"1": 2 ** 70}
+
+
+def test_app_uses_fast_provider(app):
+    assert isinstance(app.json, FastJSONProvider)
@@ -0,0 +1,203 @@
+import threading
+
+from pymongo.errors import DuplicateKeyError
+
+from flight_controll.scheduler.leader import CheckLock, LeaderLease
+
+
+class FakeLocks:
+    """In-process stand-in for the locks collection.
+
+    Implements the subset of `find_one_and_update` the lease uses: ``_id``
+    equality plus an ``$or`` of ``owner`` equality / ``expires_at`` ``$lt``,
+    ``$set`` updates and upserts that fail on an existing ``_id``.
+    """
+
+    def __init__(self):
+        self.docs = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _matches(doc, clause):
+        for key, cond in clause.items():
+            if isinstance(cond, dict) and "$lt" in cond:
+                if not (key in doc and doc[key] < cond["$lt"]):
+                    return False
+            elif doc.get(key) != cond:
+                return False
+        return True
+
+    def find_one_and_update(self, filter, update, upsert=False, return_document=None):
+        with self._lock:
+            doc = self.docs.get(filter["_id"])
+            if doc is not None and any(self._matches(doc, c) for c in filter["$or"]):
+                doc.update(update["$set"])
+                return dict(doc)
+            if doc is None and upsert:
+                doc = self.docs[filter["_id"]] = {"_id": filter["_id"], **update["$set"]}
+                return dict(doc)
+            if upsert:
+                raise DuplicateKeyError("E11000 duplicate key error")
+            return None
+
+    def delete_one(self, filter):
+        with self._lock:
+            doc = self.docs.get(filter["_id"])
+            if doc is not None and doc.get("owner") == filter["owner"]:
+                del self.docs[filter["_id"]]
+
+
+class Clock:
+    """Shared wall time seen through a per-replica skew."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def skewed(self, offset):
+        return lambda: self.now + offset
+
+
+def _lease(locks, clock, owner, skew=0.0):
+    return LeaderLease(locks, owner=owner, ttl_seconds=30, max_clock_skew=5, clock=clock.skewed(skew))
+
+
+def test_first_replica_acquires_and_second_is_refused():
+    locks, clock = FakeLocks(), Clock()
+    a, b = _lease(locks, clock, "a"), _lease(locks, clock, "b")
+
+    assert a.try_acquire() is True
+    assert b.try_acquire() is False
+    assert a.is_leader() and not b.is_leader()
+    assert locks.docs["webcal-check"]["owner"] == "a"
+
+
+def test_holder_renews_and_keeps_the_lease():
+    locks, clock = FakeLocks(), Clock()
+    a, b = _lease(locks, clock, "a"), _lease(locks, clock, "b")
+    a.try_acquire()
+
+    for _ in range(10):
+        clock.now += a.heartbeat_seconds
+        assert a.try_acquire() is True
+        assert b.try_acquire() is False
+    assert locks.docs["webcal-check"]["expires_at"] == clock.now + 30
+
+
+def test_failover_after_leader_stops_renewing():
+    locks, clock = FakeLocks(), Clock()
+    a, b = _lease(locks, clock, "a"), _lease(locks, clock, "b")
+    a.try_acquire()
+
+    clock.now += 34  # expired, but within the skew allowance
+    assert b.try_acquire() is False
+    clock.now += 2
+    assert b.try_acquire() is True
+    assert a.is_leader() is False
+    # the old leader learns it lost the lease on its next renewal
+    assert a.try_acquire() is False
+
+
+def test_release_allows_immediate_takeover():
+    locks, clock = FakeLocks(), Clock()
+    a, b = _lease(locks, clock, "a"), _lease(locks, clock, "b")
+    a.try_acquire()
+
+    a.release()
+
+    assert a.is_leader() is False
+    assert b.try_acquire() is True
+
+
+def test_release_does_not_drop_another_owners_lease():
+    locks, clock = FakeLocks(), Clock()
+    a, b = _lease(locks, clock, "a"), _lease(locks, clock, "b")
+    a.try_acquire()
+
+    b.release()
+
+    assert locks.docs["webcal-check"]["owner"] == "a"
+
+
+def test_clock_skew_within_twice_the_allowance_never_yields_two_leaders():
+    locks, clock = FakeLocks(), Clock()
+    # a runs 4.9s behind, b 4.9s ahead: 9.8s apart, under 2 * max_clock_skew
+    a, b = _lease(locks, clock, "a", skew=-4.9), _lease(locks, clock, "b", skew=4.9)
+    a.try_acquire()
+
+    # a dies; step real time forward and check no instant has two leaders
+    for _ in range(600):
+        clock.now += 0.1
+        b.try_acquire()
+        assert not (a.is_leader() and b.is_leader())
+    assert b.is_leader() is True
+
+
+def test_skewed_contender_does_not_steal_a_renewed_lease():
+    locks, clock = FakeLocks(), Clock()
+    a, b = _lease(locks, clock, "a"), _lease(locks, clock, "b", skew=9)
+    a.try_acquire()
+
+    for _ in range(20):
+        clock.now += a.heartbeat_seconds
+        assert a.try_acquire() is True
+        assert b.try_acquire() is False
+
+
+def test_collection_errors_mean_not_leader():
+    class Broken:
+        def find_one_and_update(self, *args, **kwargs):
+            raise RuntimeError("mongo down")
+
+    lease = LeaderLease(Broken(), owner="a", clock=lambda: 0.0)
+
+    assert lease.try_acquire() is False
+    assert lease.is_leader() is False
+
+
+def test_check_lock_runs_once_at_a_time_across_processes():
+    locks = FakeLocks()
+    web, scheduled = CheckLock(locks, "webcal-check:run"), CheckLock(locks, "webcal-check:run")
+    inside = []
+
+    def check():
+        inside.append(locks.docs["webcal-check:run"]["owner"])
+        # a tick from the other process is refused while this run holds the lock
+        assert scheduled.run(lambda: "tick") == (False, None)
+        return "checked"
+
+    assert web.run(check) == (True, "checked")
+    assert inside and "webcal-check:run" not in locks.docs
+    assert scheduled.run(lambda: "tick") == (True, "tick")
+
+
+def test_check_lock_waits_for_the_running_check():
+    locks = FakeLocks()
+    holder, waiter = CheckLock(locks, "run"), CheckLock(locks, "run", poll_seconds=0.01)
+    started, finish = threading.Event(), threading.Event()
+
+    def long_check():
+        started.set()
+        finish.wait(5)
+        return "first"
+
+    thread = threading.Thread(target=holder.run, args=(long_check,))
+    thread.start()
+    started.wait(5)
+    assert waiter.run(lambda: "second", wait_seconds=0.05) == (False, None)
+    threading.Timer(0.05, finish.set).start()
+    assert waiter.run(lambda: "second", wait_seconds=5) == (True, "second")
+    thread.join()
+
+
+def test_check_lock_is_released_when_the_check_fails():
+    locks = FakeLocks()
+    lock = CheckLock(locks, "run")
+
+    def failing():
+        raise RuntimeError("feed down")
+
+    try:
+        lock.run(failing)
+    except RuntimeError:
+        pass
+    assert "run" not in locks.docs
@@ -0,0 +1,66 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from flight_controll.mail.outbound import MailQueue, MailQueueFull
+
+
+def test_enqueue_returns_before_delivery_and_flush_waits():
+    release = threading.Event()
+    sender = MagicMock()
+    sender.send_email.side_effect = lambda **kwargs: release.wait(5)
+    mail_queue = MailQueue(sender, maxsize=5)
+    mail_queue.start()
+
+    send = mail_queue.sender_cls()("smtp", 587, "u", "p").send_email
+    send("r@example.com", "Subject", "Body", html_body="<b>Body</b>")
+
+    assert not mail_queue.flush(timeout=0.05)
+    release.set()
+    assert mail_queue.flush(timeout=5)
+    sender.send_email.assert_called_once_with(
+        recipient="r@example.com", subject="Subject", body="Body", html_body="<b>Body</b>"
+    )
+    stats = mail_queue.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["sent"] == 1
+    assert stats["last_latency_seconds"] > 0
+    mail_queue.shutdown(timeout=5)
+
+
+def test_enqueue_raises_when_queue_is_full():
+    mail_queue = MailQueue(MagicMock(), maxsize=1)  # worker not started
+
+    mail_queue.enqueue("r@example.com", "S1", "B1")
+    with pytest.raises(MailQueueFull):
+        mail_queue.enqueue("r@example.com", "S2", "B2")
+
+
+def test_shutdown_flushes_pending_messages_and_counts_failures():
+    sender = MagicMock()
+    sender.send_email.side_effect = [None, RuntimeError("relay down")]
+    mail_queue = MailQueue(sender, maxsize=5)
+    mail_queue.enqueue("r@example.com", "S1", "B1")
+    mail_queue.enqueue("r@example.com", "S2", "B2")
+    mail_queue.start()
+
+    mail_queue.shutdown(timeout=5)
+
+    stats = mail_queue.stats()
+    assert (stats["sent"], stats["failed"]) == (1, 1)
+
+
+def test_sender_reporting_failure_is_counted_as_failed():
+    sender = MagicMock()
+    # MailService returns False once every retry failed instead of raising
+    sender.send_email.side_effect = [True, False]
+    mail_queue = MailQueue(sender, maxsize=5)
+    mail_queue.enqueue("r@example.com", "S1", "B1")
+    mail_queue.enqueue("r@example.com", "S2", "B2")
+    mail_queue.start()
+
+    mail_queue.shutdown(timeout=5)
+
+    stats = mail_queue.stats()
+    assert (stats["sent"], stats["failed"]) == (1, 1)
@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from flight_controll.mail.sender import EmailSender
+from flight_controll.mail.sender import EmailSender, build_message
 
 
 @pytest.fixture
@@ -60,3 +60,21 @@ def test_send_email_failure(mock_smtp, email_sender, caplog):
 
     assert "Failed to send email" in caplog.text
     assert "SMTP connection failed" in caplog.text
+
+
+def test_build_message_adds_attachments_and_message_id():
+    msg = build_message(
+        "from@example.com",
+        "to@example.com",
+        "Subject",
+        "Body",
+        html_body="<p>Body</p>",
+        message_id="<key@flight-controll>",
+        attachments=[("changes.csv.gz", b"\x1f\x8bdata", "application/gzip")],
+    )
+
+    assert msg["Message-ID"] == "<key@flight-controll>"
+    parts = [p for p in msg.walk() if p.get_filename() == "changes.csv.gz"]
+    assert len(parts) == 1
+    assert parts[0].get_content_type() == "application/gzip"
+    assert parts[0].get_payload(decode=True) == b"\x1f\x8bdata"
@@ -1,3 +1,4 @@
+from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock
 
 from flight_controll.event import notifier
@@ -118,3 +119,168 @@ def test_send_summary_updated_section_bolds_changed_fields():
     # Unchanged description "Same" should not be wrapped in strong
     assert "Old Description: Same\n" in html
     assert "New Description: Same\n" in html
+
+
+def test_send_summary_updated_section_uses_change_mask():
+    """A `changed_fields` mask decides bolding instead of re-comparing values."""
+    sent = []
+
+    class FakeSenderCls:
+        def __init__(self, server, port, user, pw):
+            pass
+
+        def send_email(self, recipient, subject, body, html_body=None):
+            sent.append({"body": body, "html_body": html_body})
+
+    # descriptions differ only by a DTSTAMP line, which detection ignores
+    updated = [
+        {
+            "uid": "u1",
+            "summary": "Meeting",
+            "old_start": "2025-01-01T10:00",
+            "new_start": "2025-01-01T11:00",
+            "old_end": "2025-01-01T12:00",
+            "new_end": "2025-01-01T12:00",
+            "old_description": "Agenda",
+            "new_description": "Agenda\nDTSTAMP:20250101T120000Z",
+            "changed_fields": ["start"],
+        }
+    ]
+
+    notifier.send_summary(FakeSenderCls, DummyConfig, [], [], updated)
+
+    html = sent[0]["html_body"]
+    assert "Old Start: <strong>2025-01-01T10:00</strong>" in html
+    assert "Old Description: Agenda\n" in html
+    assert "<strong>Agenda" not in html
+
+
+def test_split_by_priority_uses_start_within_horizon():
+    now = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+    soon = (now + timedelta(hours=2)).isoformat()
+    later = (now + timedelta(days=30)).isoformat()
+    removed = [
+        {"uid": "r-soon", "start_time": soon},
+        {"uid": "r-later", "start_time": later},
+    ]
+    updated = [
+        {"uid": "u-pulled-in", "old_start": later, "new_start": soon},
+        {"uid": "u-pushed-out", "old_start": soon, "new_start": later},
+        {"uid": "u-later", "old_start": later, "new_start": later},
+    ]
+
+    (urgent_removed, urgent_updated), (regular_removed, regular_updated) = notifier.split_by_priority(
+        removed, updated, 6, now=now
+    )
+
+    assert [e["uid"] for e in urgent_removed] == ["r-soon"]
+    assert [e["uid"] for e in urgent_updated] == ["u-pulled-in", "u-pushed-out"]
+    assert [e["uid"] for e in regular_removed] == ["r-later"]
+    assert [e["uid"] for e in regular_updated] == ["u-later"]
+
+
+def test_send_urgent_lists_only_changed_fields():
+    fake_sender = MagicMock()
+    removed = [{"uid": "r1", "summary": "Standup", "start_time": "2026-03-01T13:00:00"}]
+    updated = [
+        {
+            "uid": "u1",
+            "summary": "Review",
+            "old_start": "10:00",
+            "new_start": "11:00",
+            "old_location": "Room A",
+            "new_location": "Room A",
+            "changed_fields": ["start"],
+        }
+    ]
+
+    notifier.send_urgent(fake_sender, DummyConfig, removed, updated)
+
+    recipient, subject, body = fake_sender.return_value.send_email.call_args[0]
+    assert subject == "Urgent: 2 upcoming events changed"
+    assert "CANCELLED Standup" in body
+    assert "Start: 10:00 -> 11:00" in body
+    assert "Location" not in body
+
+
+def test_send_summary_over_budget_attaches_full_change_set():
+    class BudgetConfig(DummyConfig):
+        SUMMARY_BODY_BUDGET_CHARS = 500
+
+    fake_sender = MagicMock()
+    added = [{"uid": f"a{i}", "summary": f"A{i}", "dtstart": "s", "dtend": "e"} for i in range(20)]
+
+    notifier.send_summary(fake_sender, BudgetConfig, added, [], [])
+
+    kwargs = fake_sender.return_value.send_email.call_args[1]
+    (filename, content, content_type), = kwargs["attachments"]
+    assert (filename, content_type) == ("changes.csv.gz", "application/gzip")
+    assert content[:2] == b"\x1f\x8b"
+    assert "more changes not shown" in kwargs["html_body"]
+
+
+def test_send_summary_fans_out_one_render_per_variant():
+    class SubscriberConfig(DummyConfig):
+        RECIPIENT_SUBSCRIPTIONS = (
+            '[{"email": "a@example.com"}, {"email": "b@example.com"},'
+            ' {"email": "arn@example.com", "locations": ["ARN"]}]'
+        )
+
+    sent = []
+
+    class FakeSenderCls:
+        def __init__(self, server, port, user, pw):
+            pass
+
+        def send_email(self, recipient, subject, body, html_body=None):
+            sent.append((recipient, subject))
+
+    added = [
+        {"uid": "a1", "summary": "A", "dtstart": "s", "dtend": "e", "location": "ARN"},
+        {"uid": "a2", "summary": "B", "dtstart": "s", "dtend": "e", "location": "GOT"},
+    ]
+
+    notifier.send_summary(FakeSenderCls, SubscriberConfig, added, [], [])
+
+    assert sorted(sent) == [
+        ("a@example.com", "Events update: 2 added, 0 removed, 0 updated"),
+        ("arn@example.com", "Events update: 1 added, 0 removed, 0 updated"),
+        ("b@example.com", "Events update: 2 added, 0 removed, 0 updated"),
+    ]
+
+
+def test_fan_out_workers_are_capped_at_the_smtp_pool_size(monkeypatch):
+    class PooledConfig(DummyConfig):
+        MAIL_FANOUT_WORKERS = 4
+        SMTP_POOL_SIZE = 2
+
+    sizes = []
+    real_executor = notifier.ThreadPoolExecutor
+
+    def recording_executor(max_workers, **kwargs):
+        sizes.append(max_workers)
+        return real_executor(max_workers=max_workers, **kwargs)
+
+    monkeypatch.setattr(notifier, "ThreadPoolExecutor", recording_executor)
+    jobs = [(f"r{i}@example.com", ("subject", "body", {})) for i in range(5)]
+
+    notifier._deliver_all(MagicMock(), PooledConfig, jobs)
+
+    assert sizes == [2]
+
+
+def test_send_summary_passes_send_id_to_the_sender():
+    sent = []
+
+    class FakeSenderCls:
+        def __init__(self, server, port, user, pw):
+            pass
+
+        def send_email(self, recipient, subject, body, html_body=None, send_id=None):
+            sent.append(send_id)
+
+    added = [{"uid": "a1", "summary": "A", "dtstart": "s", "dtend": "e"}]
+    notifier.send_summary(FakeSenderCls, DummyConfig, added, [], [], send_id="run1:summary")
+    notifier.send_summary(FakeSenderCls, DummyConfig, added, [], [])
+
+    assert sent == ["run1:summary", None]
@@ -0,0 +1,157 @@
+import json
+import os
+from unittest.mock import MagicMock
+
+from flight_controll.mail.outbound import MailQueue
+from flight_controll.mail.outbox import Outbox, idempotency_key
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_outbox(tmp_path, clock, **kwargs):
+    return Outbox(str(tmp_path), base_delay=10, max_delay=100, clock=clock, rng=lambda: 0.5, **kwargs)
+
+
+def test_message_is_spooled_before_delivery_and_moved_to_sent(tmp_path):
+    outbox = make_outbox(tmp_path, FakeClock())
+    key = outbox.put("r@example.com", "Subject", "Body")
+
+    assert os.path.exists(tmp_path / "pending" / f"{key}.json")
+    sender = MagicMock()
+    sender.send_email.return_value = True
+
+    assert outbox.drain(sender) == 1
+    sender.send_email.assert_called_once_with(
+        "r@example.com", "Subject", "Body", html_body=None, message_id=f"<{key}@flight-controll>"
+    )
+    assert outbox.pending_count() == 0
+    assert os.path.exists(tmp_path / "sent" / f"{key}.json")
+
+
+def test_put_is_idempotent_while_pending_or_sent(tmp_path):
+    outbox = make_outbox(tmp_path, FakeClock())
+    key = outbox.put("r@example.com", "Subject", "Body", send_id="run1")
+    assert outbox.put("r@example.com", "Subject", "Body", send_id="run1") == key
+    assert outbox.pending_count() == 1
+
+    sender = MagicMock()
+    sender.send_email.return_value = True
+    outbox.drain(sender)
+    outbox.put("r@example.com", "Subject", "Body", send_id="run1")
+    assert outbox.pending_count() == 0
+    assert key == idempotency_key("r@example.com", "run1")
+
+
+def test_identical_content_from_different_sends_is_spooled_twice(tmp_path):
+    outbox = make_outbox(tmp_path, FakeClock())
+    first = outbox.put("r@example.com", "Subject", "Body", send_id="run1")
+    second = outbox.put("r@example.com", "Subject", "Body", send_id="run2")
+    assert first != second
+    assert outbox.put("r@example.com", "Subject", "Body") != outbox.put("r@example.com", "Subject", "Body")
+    assert outbox.pending_count() == 4
+
+
+def test_failed_delivery_backs_off_exponentially_then_goes_dead(tmp_path):
+    clock = FakeClock()
+    outbox = make_outbox(tmp_path, clock, max_attempts=3)
+    key = outbox.put("r@example.com", "Subject", "Body")
+    sender = MagicMock()
+    sender.send_email.side_effect = OSError("relay down")
+
+    assert outbox.drain(sender) == 0
+    record = json.loads((tmp_path / "pending" / f"{key}.json").read_text())
+    assert record["attempts"] == 1
+    assert record["next_attempt_at"] == clock.now + 10
+    assert record["last_error"] == "relay down"
+
+    # not due yet: no attempt is made
+    clock.now += 5
+    outbox.drain(sender)
+    assert sender.send_email.call_count == 1
+
+    clock.now += 5
+    outbox.drain(sender)
+    record = json.loads((tmp_path / "pending" / f"{key}.json").read_text())
+    assert record["next_attempt_at"] == clock.now + 20
+
+    clock.now += 20
+    outbox.drain(sender)
+    assert sender.send_email.call_count == 3
+    assert outbox.pending_count() == 0
+    assert os.path.exists(tmp_path / "dead" / f"{key}.json")
+
+
+def test_backoff_is_capped_and_jittered(tmp_path):
+    outbox = Outbox(str(tmp_path), base_delay=10, max_delay=100, rng=lambda: 0.0)
+    assert outbox.backoff(1) == 5
+    assert outbox.backoff(10) == 50
+
+
+def test_sender_reporting_failure_is_retried(tmp_path):
+    outbox = make_outbox(tmp_path, FakeClock())
+    outbox.put("r@example.com", "Subject", "Body")
+    sender = MagicMock()
+    sender.send_email.return_value = False
+
+    assert outbox.drain(sender) == 0
+    assert outbox.pending_count() == 1
+
+
+def test_abandoned_inflight_message_is_requeued(tmp_path):
+    clock = FakeClock()
+    outbox = make_outbox(tmp_path, clock, inflight_timeout=60)
+    key = outbox.put("r@example.com", "Subject", "Body")
+    # simulate a drainer that crashed after claiming the message
+    assert outbox._claim(key) is not None
+    sender = MagicMock()
+    sender.send_email.return_value = True
+
+    clock.now += 30
+    assert outbox.drain(sender) == 0
+    clock.now += 30
+    assert outbox.drain(sender) == 1
+
+
+def test_sender_cls_spools_then_drains(tmp_path):
+    outbox = make_outbox(tmp_path, FakeClock())
+    delivery = MagicMock()
+    delivery.send_email.return_value = True
+
+    outbox.sender_cls(delivery)("smtp", 587, "u", "p").send_email("r@example.com", "S", "B")
+
+    delivery.send_email.assert_called_once()
+    assert len(os.listdir(tmp_path / "sent")) == 1
+
+
+def test_mail_queue_with_outbox_spools_on_enqueue(tmp_path):
+    outbox = make_outbox(tmp_path, FakeClock())
+    delivery = MagicMock()
+    delivery.send_email.return_value = True
+    mail_queue = MailQueue(delivery, maxsize=1, outbox=outbox)  # worker not started
+
+    mail_queue.enqueue("r@example.com", "S1", "B1")
+    mail_queue.enqueue("r@example.com", "S2", "B2")  # queue full: drain already pending
+    assert outbox.pending_count() == 2
+
+    mail_queue.start()
+    assert mail_queue.flush(timeout=5)
+    assert delivery.send_email.call_count == 2
+    mail_queue.shutdown(timeout=5)
+
+
+def test_attachments_survive_the_spool(tmp_path):
+    outbox = make_outbox(tmp_path, FakeClock())
+    attachment = ("changes.csv.gz", b"\x1f\x8bdata", "application/gzip")
+    outbox.put("r@example.com", "S", "B", attachments=[attachment])
+    sender = MagicMock()
+    sender.send_email.return_value = True
+
+    outbox.drain(sender)
+
+    assert sender.send_email.call_args[1]["attachments"] == [attachment]
@@ -0,0 +1,160 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from flight_controll.event import pipeline
+from flight_controll.event.change_detector import description_hash
+from flight_controll.event.event_service import EventService
+
+
+class StreamingConfig:
+    WEB_CAL_URL = "https://example.com/calendar.ics"
+    CHANGE_DETECTION_ENGINE = "streaming"
+    DIFF_BATCH_SIZE = 2
+
+
+def _event(uid, start="2099-01-01T10:00:00"):
+    return {
+        "uid": uid,
+        "summary": uid,
+        "dtstart": start,
+        "dtend": "2099-01-01T11:00:00",
+        "description": "d",
+        "location": "L",
+    }
+
+
+def _doc(uid):
+    return {
+        "uid": uid,
+        "summary": uid,
+        "start_time": "2099-01-01T10:00:00",
+        "end_time": "2099-01-01T11:00:00",
+        "description": "d",
+        "description_hash": description_hash("d"),
+        "location": "L",
+    }
+
+
+def _service(fetcher_cls, stored, config=None):
+    repo = MagicMock()
+    snapshot_read = threading.Event()
+
+    def iter_docs(batch_size):
+        snapshot_read.set()
+        return iter(sorted(stored, key=lambda d: d["uid"]))
+
+    repo.iter_docs_sorted_by_uid.side_effect = iter_docs
+    es = EventService(config=config or StreamingConfig(), fetcher_cls=fetcher_cls, repo=repo)
+    es._notify = MagicMock(return_value="sent")
+    return es, repo, snapshot_read
+
+
+def test_snapshot_read_overlaps_the_download_and_stages_are_timed():
+    overlapped = []
+
+    class SlowFetcher:
+        def __init__(self, url):
+            self.cache_hints = {"max_age": 60.0, "retry_after": None}
+
+        def iter_events(self):
+            yield _event("a")
+            # the snapshot stage runs while the feed is still downloading
+            overlapped.append(snapshot_read.wait(5))
+            yield _event("c")
+
+    es, repo, snapshot_read = _service(SlowFetcher, [_doc("b"), _doc("c")])
+
+    added = es.fetch_persist_and_send_events()
+
+    assert overlapped == [True]
+    assert [e["uid"] for e in added] == ["a"]
+    removed = es._notify.call_args[0][1]
+    assert [d["uid"] for d in removed] == ["b"]
+    repo.insert_new_events.assert_called_once()
+    repo.delete_by_uids.assert_called_once_with(["b"])
+    stages = es.last_run_stats["stages"]
+    assert set(stages) == {"fetch", "snapshot", "diff", "persist", "notify"}
+    assert stages["fetch"]["items"] == 2
+    assert stages["snapshot"]["items"] == 2
+    assert stages["persist"]["items"] == 2
+    assert es.last_run_stats["cache_hints"]["max_age"] == 60.0
+
+
+def test_write_failure_is_raised_after_the_run():
+    class Fetcher:
+        def __init__(self, url):
+            pass
+
+        def fetch_events(self):
+            return [_event("a")]
+
+    es, repo, _ = _service(Fetcher, [])
+    repo.insert_new_events.side_effect = RuntimeError("db down")
+
+    with pytest.raises(RuntimeError, match="db down"):
+        es.fetch_persist_and_send_events()
+    es._notify.assert_not_called()
+
+
+def test_diff_failure_is_not_masked_by_a_write_failure(monkeypatch):
+    class Fetcher:
+        def __init__(self, url):
+            pass
+
+        def fetch_events(self):
+            # one write batch, so the failed write can only surface from finish()
+            return [_event("a")]
+
+    es, repo, _ = _service(Fetcher, [])
+    repo.insert_new_events.side_effect = RuntimeError("db down")
+    real_stream_diff = pipeline.streaming_diff.stream_diff
+
+    def failing_diff(*args, **kwargs):
+        yield from real_stream_diff(*args, **kwargs)
+        raise ValueError("diff bug")
+
+    monkeypatch.setattr(pipeline.streaming_diff, "stream_diff", failing_diff)
+
+    with pytest.raises(ValueError, match="diff bug"):
+        es.fetch_persist_and_send_events()
+
+
+def test_fetch_failure_propagates_without_notifying():
+    class BrokenFetcher:
+        def __init__(self, url):
+            pass
+
+        def iter_events(self):
+            yield _event("a")
+            raise ConnectionError("reset")
+
+    es, repo, _ = _service(BrokenFetcher, [_doc("a")])
+
+    with pytest.raises(ConnectionError):
+        es.fetch_persist_and_send_events()
+    es._notify.assert_not_called()
+    repo.delete_by_uids.assert_not_called()
+
+
+def test_standard_engine_runs_fetch_diff_notify_stages():
+    class Config(StreamingConfig):
+        CHANGE_DETECTION_ENGINE = "standard"
+
+    class Fetcher:
+        def __init__(self, url):
+            pass
+
+        def fetch_events(self):
+            return [_event("a"), dict(_event("p"), location="Privat")]
+
+    es, _, _ = _service(Fetcher, [], config=Config())
+    es._detect_changes = MagicMock(return_value=([_event("a")], [], []))
+
+    result = pipeline.run(es)
+
+    assert [e["uid"] for e in es._detect_changes.call_args[0][0]] == ["a"]
+    assert result.fetched_count == 1
+    assert set(result.stages) == {"fetch", "diff", "notify"}
+    assert result.email_status == "sent"
@@ -0,0 +1,64 @@
+import csv
+import gzip
+import io
+
+from flight_controll.event.renderer import SummaryRenderer, changes_csv_gz, render_summary, render_summary_capped
+
+
+def test_render_summary_escapes_html_once_per_block():
+    added = [{"uid": "a1", "summary": "A <b>&", "dtstart": "s", "dtend": "e", "location": "R&D"}]
+
+    plain, html = render_summary(added, [], [])
+
+    assert plain == (
+        "Events Update:\n\nAdded Events:\n\n"
+        "Summary: A <b>&\nStart Time: s\nEnd Time: e\nDescription: N/A\nLocation: R&D\n"
+        "--------------------------\n"
+    )
+    assert "Summary: A &lt;b&gt;&amp;\n" in html
+    assert "Location: R&amp;D\n" in html
+    assert html.endswith("</pre></body></html>")
+
+
+def test_render_summary_orders_sections_and_skips_empty_ones():
+    removed = [{"uid": "r1", "summary": "R", "start_time": "s", "end_time": "e"}]
+    updated = [{"uid": "u1", "summary": "U", "old_start": "o", "new_start": "n", "changed_fields": ["start"]}]
+
+    plain, html = render_summary([], removed, updated)
+
+    assert "Added Events" not in plain
+    assert plain.index("Removed Events") < plain.index("Updated Events")
+    assert "Old Start: o\n" in plain
+    assert "Old Start: <strong>o</strong>\n" in html
+    assert "Old End: N/A\n" in html
+
+
+def test_renderer_size_tracks_both_buffers():
+    renderer = SummaryRenderer()
+    before = renderer.size
+    renderer.write("x & y\n")
+    assert renderer.size == before + len("x & y\n") + len("x &amp; y\n")
+
+
+def test_render_summary_capped_truncates_and_counts_omitted():
+    added = [{"uid": f"a{i}", "summary": f"A{i}", "dtstart": "s", "dtend": "e"} for i in range(50)]
+    removed = [{"uid": "r1", "summary": "R", "start_time": "s", "end_time": "e"}]
+
+    plain, html, omitted = render_summary_capped(added, removed, [], budget=1000)
+
+    assert 0 < omitted < 51
+    assert "Removed Events" not in plain
+    assert f"... {omitted} more changes not shown ({omitted - 1} added, 1 removed, 0 updated)." in plain
+    assert "attached as changes.csv.gz" in html
+    assert render_summary_capped(added, removed, [], budget=0)[2] == 0
+
+
+def test_changes_csv_gz_contains_every_change():
+    added = [{"uid": "a1", "summary": "A", "dtstart": "s", "dtend": "e", "location": "L"}]
+    updated = [{"uid": "u1", "summary": "U", "old_start": "o", "new_start": "n"}]
+
+    rows = list(csv.reader(io.StringIO(gzip.decompress(changes_csv_gz(added, [], updated)).decode("utf-8"))))
+
+    assert rows[0][:3] == ["change", "uid", "summary"]
+    assert rows[1][:6] == ["added", "a1", "A", "s", "e", "L"]
+    assert rows[2][0] == "updated" and rows[2][3] == "n" and rows[2][7] == "o"
@@ -0,0 +1,207 @@
+from datetime import datetime, timedelta, timezone
+
+from flight_controll.event.change_detector import detect_and_apply_updates
+from flight_controll.event.repository import EVENT_FIELDS, EventRepository, create_indexes
+
+
+def _bson_type(value):
+    if value is None:
+        return "null"
+    return "date" if isinstance(value, datetime) else "string"
+
+
+# MongoDB orders values by type bracket first: null < string < date
+_BRACKETS = {"null": 0, "string": 1, "date": 2}
+
+
+def _sort_key(value):
+    bracket = _bson_type(value)
+    return (_BRACKETS[bracket], value if value is not None else 0)
+
+
+def _matches(doc, query):
+    for key, cond in query.items():
+        if key == "$and":
+            if not all(_matches(doc, q) for q in cond):
+                return False
+        elif key == "$or":
+            if not any(_matches(doc, q) for q in cond):
+                return False
+        elif isinstance(cond, dict):
+            value = doc.get(key)
+            for op, operand in cond.items():
+                if op == "$in" and value not in operand:
+                    return False
+                same_type = value is not None and _bson_type(value) == _bson_type(operand)
+                if op == "$gt" and not (same_type and value > operand):
+                    return False
+                if op == "$gte" and not (same_type and value >= operand):
+                    return False
+                if op == "$lt" and not (same_type and value < operand):
+                    return False
+                if op == "$type" and _bson_type(value) not in (operand if isinstance(operand, list) else [operand]):
+                    return False
+        elif doc.get(key) != cond:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys, direction=None):
+        if isinstance(keys, str):
+            keys = [(keys, direction)]
+        for key, order in reversed(keys):
+            self.docs.sort(key=lambda d: _sort_key(d.get(key)), reverse=order < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    def batch_size(self, n):
+        self.batch = n
+        return self
+
+    def __iter__(self):
+        return iter(self.docs)
+
+
+class QueryableCollection:
+    """Fake collection evaluating the filters `query_events` builds."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        fields = [k for k, v in (projection or {}).items() if v]
+        rows = [d for d in self.docs if _matches(d, query)]
+        if fields:
+            rows = [{k: d[k] for k in fields if k in d} for d in rows]
+        return FakeCursor(rows)
+
+    def estimated_document_count(self):
+        return len(self.docs)
+
+    def update_one(self, query, update):
+        for doc in self.docs:
+            if _matches(doc, query):
+                doc.update(update["$set"])
+                return
+
+
+def reschedule(collection, uid, start):
+    """Run change detection for `uid` moved to `start`, as a feed update would."""
+    stored = next(d for d in collection.docs if d["uid"] == uid)
+    naive = start.replace(tzinfo=None)
+    event = {**stored, "dtstart": naive, "dtend": naive + timedelta(hours=1)}
+    event.pop("start_time")
+    event.pop("end_time", None)
+    return detect_and_apply_updates([event], {uid}, EventRepository(collection))
+
+
+T0 = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+
+def make_docs():
+    # two events share a start time so the uid tie-breaker matters
+    return [
+        {"uid": "e1", "start_time": T0, "location": "ARN", "updated_at": "2030-01-01T00:00:00", "_id": 1},
+        {"uid": "e0", "start_time": T0, "location": "CPH", "updated_at": "2030-01-01T00:00:01", "_id": 2},
+        {"uid": "e2", "start_time": T0 + timedelta(hours=1), "location": "ARN", "updated_at": "2030-01-01T00:00:02"},
+        {"uid": "e3", "start_time": T0 + timedelta(hours=2), "location": "ARN", "updated_at": "2030-01-01T00:00:03"},
+    ]
+
+
+def test_query_events_pages_by_start_time_then_uid():
+    repo = EventRepository(QueryableCollection(make_docs()))
+
+    first = repo.query_events(limit=2)
+    last = first[-1]
+    second = repo.query_events(after=(last["start_time"], last["uid"]), limit=2)
+
+    assert [d["uid"] for d in first] == ["e0", "e1"]
+    assert [d["uid"] for d in second] == ["e2", "e3"]
+    assert all("_id" not in d and set(d) <= set(EVENT_FIELDS) for d in first + second)
+
+
+def test_rescheduled_event_still_matches_a_date_range_query():
+    coll = QueryableCollection(make_docs())
+    moved_to = T0 + timedelta(days=1)
+
+    updates = reschedule(coll, "e2", moved_to)
+
+    assert updates[0]["changed_fields"][0] == "start"
+    repo = EventRepository(coll)
+    assert [d["uid"] for d in repo.query_events(start=moved_to, end=moved_to + timedelta(hours=1))] == ["e2"]
+    assert [d["uid"] for d in repo.query_events(limit=10)] == ["e0", "e1", "e3", "e2"]
+
+
+def test_query_events_pages_across_null_string_and_date_start_times():
+    docs = make_docs() + [
+        {"uid": "allday-b", "start_time": None, "updated_at": "2030-01-01T00:00:04"},
+        {"uid": "allday-a", "updated_at": "2030-01-01T00:00:05"},
+        {"uid": "raw", "start_time": "20300101", "updated_at": "2030-01-01T00:00:06"},
+    ]
+    repo = EventRepository(QueryableCollection(docs))
+
+    seen = []
+    after = None
+    while True:
+        page = repo.query_events(after=after, limit=2)
+        seen += [d["uid"] for d in page]
+        if len(page) < 2:
+            break
+        after = (page[-1].get("start_time"), page[-1]["uid"])
+
+    assert seen == ["allday-a", "allday-b", "raw", "e0", "e1", "e2", "e3"]
+
+
+def test_query_events_filters_time_range_and_location():
+    repo = EventRepository(QueryableCollection(make_docs()))
+
+    docs = repo.query_events(start=T0, end=T0 + timedelta(hours=2), locations=["ARN"])
+
+    assert [d["uid"] for d in docs] == ["e1", "e2"]
+
+
+def test_iter_events_streams_every_match_in_page_order():
+    repo = EventRepository(QueryableCollection(make_docs()))
+
+    streamed = repo.iter_events(locations=["ARN"], after=(T0, "e1"))
+
+    assert [d["uid"] for d in streamed] == ["e2", "e3"]
+
+
+def test_state_version_changes_on_insert_update_and_delete():
+    coll = QueryableCollection(make_docs())
+    repo = EventRepository(coll)
+    versions = [repo.state_version()]
+
+    coll.docs.append({"uid": "e4", "start_time": T0, "updated_at": "2030-01-02T00:00:00"})
+    versions.append(repo.state_version())
+    coll.docs[0]["updated_at"] = "2030-01-03T00:00:00"
+    versions.append(repo.state_version())
+    coll.docs.pop(1)
+    versions.append(repo.state_version())
+
+    assert len(set(versions)) == 4
+    assert repo.state_version() == versions[-1]
+
+
+def test_create_indexes_adds_keyset_index():
+    class Recorder:
+        def __init__(self):
+            self.indexes = []
+
+        def create_index(self, keys, **kwargs):
+            self.indexes.append(keys)
+
+    coll = Recorder()
+    create_indexes(coll)
+
+    assert [("start_time", 1), ("uid", 1)] in coll.indexes
@@ -25,3 +25,102 @@ def test_init_scheduler_initializes_and_starts(mock_scheduler):
 
     mock_scheduler.init_app.assert_called_once_with(app)
     mock_scheduler.start.assert_called_once()
+
+
+@patch.object(scheduler_module, "scheduler")
+def test_adaptive_mode_reschedules_after_each_tick(mock_scheduler):
+    app = DummyApp()
+    app.app_config.WEBCAL_SCHEDULER_MODE = "adaptive"
+    app.app_config.WEBCAL_MIN_INTERVAL_SECONDS = 60
+    app.app_config.WEBCAL_MAX_INTERVAL_SECONDS = 600
+    service = MagicMock()
+    service.fetch_persist_and_send_events.return_value = []
+    service.last_run_stats = {
+        "new_count": 0,
+        "updated_count": 0,
+        "removed_count": 0,
+        "cache_hints": {"max_age": None, "retry_after": None},
+    }
+    app.extensions["make_event_service"] = lambda cfg: service
+
+    scheduler_module.init_scheduler(app)
+    app.extensions["_webcal_check_func"]()
+
+    mock_scheduler.scheduler.reschedule_job.assert_called_once_with(
+        "webcal-check", trigger="interval", seconds=120
+    )
+    assert app.extensions["adaptive_interval"].current == 120
+
+
+@patch.object(scheduler_module, "scheduler")
+def test_webcal_check_skips_when_another_replica_holds_the_lease(mock_scheduler):
+    app = DummyApp()
+    app.app_config.LEADER_ELECTION_ENABLED = True
+    app.extensions["locks_collection"] = MagicMock()
+    service = MagicMock()
+    app.extensions["make_event_service"] = lambda cfg: service
+
+    scheduler_module.init_scheduler(app)
+    lease = app.extensions["leader_lease"]
+    with patch.object(lease, "try_acquire", return_value=False):
+        app.extensions["_webcal_check_func"]()
+    service.fetch_persist_and_send_events.assert_not_called()
+
+    service.fetch_persist_and_send_events.return_value = []
+    with patch.object(lease, "try_acquire", return_value=True):
+        app.extensions["_webcal_check_func"]()
+    service.fetch_persist_and_send_events.assert_called_once()
+
+
+@patch.object(scheduler_module, "scheduler")
+def test_webcal_check_skips_while_another_process_runs_the_check(mock_scheduler):
+    app = DummyApp()
+    service = MagicMock()
+    service.fetch_persist_and_send_events.return_value = []
+    app.extensions["make_event_service"] = lambda cfg: service
+    check_lock = MagicMock()
+    check_lock.run.return_value = (False, None)
+    app.extensions["make_check_lock"] = MagicMock(return_value=check_lock)
+
+    scheduler_module.init_scheduler(app)
+    app.extensions["_webcal_check_func"]()
+
+    app.extensions["make_check_lock"].assert_called_once_with("webcal-check")
+    check_lock.run.assert_called_once_with(service.fetch_persist_and_send_events)
+    assert app.extensions["feed_state"]["default"]["last_status"] is None
+
+
+@patch.object(scheduler_module, "scheduler")
+def test_one_staggered_job_per_feed_with_independent_state(mock_scheduler):
+    app = DummyApp()
+    app.app_config.WEBCAL_FEEDS = (
+        '[{"name": "crew", "url": "https://example.com/crew.ics"},'
+        ' {"name": "training", "url": "https://example.com/t.ics", "interval_minutes": 30}]'
+    )
+    services = {}
+
+    def make_event_service(cfg):
+        service = services[cfg.FEED_NAME] = MagicMock()
+        if cfg.FEED_NAME == "crew":
+            service.fetch_persist_and_send_events.side_effect = RuntimeError("feed down")
+        else:
+            service.fetch_persist_and_send_events.return_value = [{"uid": "1"}]
+        return service
+
+    app.extensions["make_event_service"] = make_event_service
+
+    scheduler_module.init_scheduler(app)
+
+    jobs = {c.kwargs["id"]: c.kwargs for c in mock_scheduler.task.call_args_list}
+    assert jobs["webcal-check:crew"]["seconds"] == 60
+    assert jobs["webcal-check:training"]["seconds"] == 1800
+    assert jobs["webcal-check:crew"]["start_date"] != jobs["webcal-check:training"]["start_date"]
+
+    for func in app.extensions["webcal_check_funcs"].values():
+        func()
+
+    state = app.extensions["feed_state"]
+    assert state["crew"]["last_status"] == "failed"
+    assert state["training"]["last_status"] == "ok"
+    assert state["training"]["last_new_events"] == 1
+    assert services["training"].fetch_persist_and_send_events.call_count == 1
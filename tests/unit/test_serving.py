@@ -0,0 +1,48 @@
+import os
+import runpy
+import threading
+from unittest.mock import MagicMock
+
+from flight_controll import serving
+from tests.conftest import TestConfig
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+
+def test_wsgi_app_never_starts_the_scheduler(monkeypatch):
+    init_scheduler = MagicMock()
+    monkeypatch.setattr("flight_controll.init_scheduler", init_scheduler)
+
+    app = serving.create_wsgi_app(TestConfig)
+
+    assert TestConfig.SCHEDULER_ENABLED
+    init_scheduler.assert_not_called()
+    assert "/events/fetch" in {rule.rule for rule in app.url_map.iter_rules()}
+
+
+def test_run_scheduler_starts_and_stops_the_scheduler(monkeypatch):
+    create_app = MagicMock()
+    fake_scheduler = MagicMock()
+    monkeypatch.setattr(serving, "create_app", create_app)
+    monkeypatch.setattr(serving, "scheduler", fake_scheduler)
+    monkeypatch.setattr(serving, "setup_logging", MagicMock())
+    stop = threading.Event()
+    stop.set()
+
+    serving.run_scheduler(TestConfig, stop=stop)
+
+    create_app.assert_called_once_with(TestConfig, enable_scheduler=True)
+    fake_scheduler.shutdown.assert_called_once()
+
+
+def test_gunicorn_settings_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("PORT", "8000")
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    monkeypatch.setenv("GUNICORN_THREADS", "16")
+
+    settings = runpy.run_path(os.path.join(ROOT, "gunicorn.conf.py"))
+
+    assert settings["bind"] == "0.0.0.0:8000"
+    assert (settings["workers"], settings["threads"]) == (3, 16)
+    assert settings["worker_class"] == "gthread"
+    assert settings["preload_app"] is False
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from flight_controll.scheduler.single_flight import SingleFlight
+
+
+def _start_leader(single_flight, fn):
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = single_flight.run("key", fn)
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread, outcome
+
+
+def _wait_for_joiners(single_flight, count):
+    deadline = time.monotonic() + 5
+    while single_flight._flights["key"].joiners < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_join_the_in_flight_run():
+    single_flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ["event"]
+
+    leader, outcome = _start_leader(single_flight, slow)
+    assert started.wait(5)
+    joiners = [_start_leader(single_flight, lambda: calls.append(2)) for _ in range(3)]
+    _wait_for_joiners(single_flight, 3)
+    release.set()
+    leader.join(5)
+    for thread, joined in joiners:
+        thread.join(5)
+        assert joined["result"] == ["event"]
+
+    assert outcome["result"] == ["event"]
+    assert calls == [1]
+    assert not single_flight.in_flight("key")
+
+
+def test_joiners_receive_the_leaders_exception():
+    single_flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("feed down")
+
+    leader, outcome = _start_leader(single_flight, failing)
+    assert started.wait(5)
+    joiner, joined = _start_leader(single_flight, lambda: "unused")
+    _wait_for_joiners(single_flight, 1)
+    release.set()
+    leader.join(5)
+    joiner.join(5)
+
+    assert isinstance(outcome["error"], RuntimeError)
+    assert joined["error"] is outcome["error"]
+    # the next call starts a fresh run
+    assert single_flight.run("key", lambda: "ok") == "ok"
+
+
+def test_run_if_idle_skips_while_a_run_is_in_flight():
+    single_flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    leader, outcome = _start_leader(single_flight, slow)
+    assert started.wait(5)
+    assert single_flight.run_if_idle("key", pytest.fail) == (False, None)
+    release.set()
+    leader.join(5)
+
+    assert single_flight.run_if_idle("key", lambda: "again") == (True, "again")
@@ -0,0 +1,119 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from flight_controll.mail.sender import MailService
+from flight_controll.mail.transport import SMTPTransport
+
+
+class FakeSMTP:
+    instances = []
+
+    def __init__(self, host, port, timeout=None):
+        self.noop_code = 250
+        self.sent = []
+        self.starttls = MagicMock()
+        self.login = MagicMock()
+        self.quit = MagicMock()
+        FakeSMTP.instances.append(self)
+
+    def noop(self):
+        return (self.noop_code, b"OK")
+
+    def send_message(self, msg):
+        self.sent.append(msg)
+
+
+@pytest.fixture(autouse=True)
+def reset_instances():
+    FakeSMTP.instances = []
+
+
+def make_transport(**kwargs):
+    return SMTPTransport("smtp.example.com", 587, "u", "p", smtp_class=FakeSMTP, **kwargs)
+
+
+def test_transport_reuses_one_authenticated_session():
+    transport = make_transport()
+
+    for _ in range(3):
+        transport.send_message(MagicMock())
+
+    assert len(FakeSMTP.instances) == 1
+    server = FakeSMTP.instances[0]
+    server.starttls.assert_called_once()
+    server.login.assert_called_once_with("u", "p")
+    assert len(server.sent) == 3
+
+
+def test_transport_reconnects_when_noop_health_check_fails():
+    transport = make_transport(health_check_interval=0)
+    transport.send_message(MagicMock())
+    FakeSMTP.instances[0].noop_code = 421
+
+    transport.send_message(MagicMock())
+
+    assert len(FakeSMTP.instances) == 2
+    FakeSMTP.instances[0].quit.assert_called_once()
+    assert len(FakeSMTP.instances[1].sent) == 1
+
+
+def test_transport_drops_session_that_failed_mid_send():
+    transport = make_transport()
+    transport.send_message(MagicMock())
+    FakeSMTP.instances[0].send_message = MagicMock(side_effect=OSError("reset"))
+
+    with pytest.raises(OSError):
+        transport.send_message(MagicMock())
+    transport.send_message(MagicMock())
+
+    assert len(FakeSMTP.instances) == 2
+
+
+def test_waiter_opens_a_new_session_when_the_busy_one_breaks():
+    transport = make_transport(pool_size=1)
+    in_send = threading.Event()
+    release = threading.Event()
+
+    def failing_send(msg):
+        in_send.set()
+        release.wait(5)
+        raise OSError("reset")
+
+    transport.send_message(MagicMock())
+    FakeSMTP.instances[0].send_message = failing_send
+    errors = []
+
+    def first():
+        try:
+            transport.send_message(MagicMock())
+        except OSError as e:
+            errors.append(e)
+
+    t1 = threading.Thread(target=first)
+    t1.start()
+    assert in_send.wait(5)
+    # blocks on the full pool until the first session is dropped
+    t2 = threading.Thread(target=transport.send_message, args=(MagicMock(),))
+    t2.start()
+    release.set()
+    t1.join(5)
+    t2.join(5)
+
+    assert not t2.is_alive()
+    assert len(errors) == 1
+    assert len(FakeSMTP.instances) == 2 and len(FakeSMTP.instances[1].sent) == 1
+
+
+def test_mail_service_builds_message_once_across_retries():
+    transport = MagicMock()
+    transport.send_message.side_effect = [OSError("busy"), None]
+    service = MailService("smtp.example.com", 587, "u", "p", transport=transport)
+
+    service.send_email("r@example.com", "Subject", "Body")
+
+    assert transport.send_message.call_count == 2
+    first, second = (c[0][0] for c in transport.send_message.call_args_list)
+    assert first is second
+    assert first["To"] == "r@example.com"
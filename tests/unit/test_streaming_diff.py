@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+from flight_controll.event.change_detector import description_hash
+from flight_controll.event.streaming_diff import merge_join, stream_diff
+
+
+def _repo(stored_docs):
+    repo = MagicMock()
+    repo.iter_docs_sorted_by_uid.return_value = iter(sorted(stored_docs, key=lambda d: d["uid"]))
+    return repo
+
+
+def test_merge_join_pairs_sorted_streams_and_skips_duplicate_uids():
+    fetched = [{"uid": "a"}, {"uid": "b"}, {"uid": "b"}, {"uid": "d"}]
+    stored = [{"uid": "b"}, {"uid": "c"}, {"uid": "d"}]
+
+    pairs = [
+        (ev and ev["uid"], doc and doc["uid"]) for ev, doc in merge_join(fetched, stored)
+    ]
+
+    assert pairs == [("a", None), ("b", "b"), (None, "c"), ("d", "d")]
+
+
+def test_stream_diff_emits_added_removed_updated_and_flushes_writes():
+    stored = [
+        {
+            "uid": "keep",
+            "summary": "Keep",
+            "start_time": "2099-01-01T10:00:00",
+            "end_time": "2099-01-01T11:00:00",
+            "description": "d",
+            "description_hash": description_hash("d"),
+            "location": "L",
+        },
+        {
+            "uid": "moved",
+            "summary": "Moved",
+            "start_time": "2099-01-01T10:00:00",
+            "end_time": "2099-01-01T11:00:00",
+            "description": "d",
+            "description_hash": description_hash("d"),
+            "location": "L",
+        },
+        {"uid": "gone", "summary": "Gone", "start_time": "2099-01-01T10:00:00"},
+        {"uid": "old", "summary": "Old", "start_time": "2000-01-01T10:00:00"},
+    ]
+    fetched = [
+        {
+            "uid": "moved",
+            "summary": "Moved",
+            "dtstart": "2099-01-02T10:00:00",
+            "dtend": "2099-01-02T11:00:00",
+            "description": "d",
+            "location": "L",
+        },
+        {
+            "uid": "keep",
+            "summary": "Keep",
+            "dtstart": "2099-01-01T10:00:00",
+            "dtend": "2099-01-01T11:00:00",
+            "description": "d",
+            "location": "L",
+        },
+        {"uid": "new", "summary": "New", "dtstart": "2099-03-01T10:00:00"},
+    ]
+    repo = _repo(stored)
+
+    changes = list(stream_diff(fetched, repo, batch_size=100))
+
+    assert [(kind, rec["uid"]) for kind, rec in changes] == [
+        ("removed", "gone"),
+        ("updated", "moved"),
+        ("added", "new"),
+    ]
+    repo.insert_new_events.assert_called_once_with([fetched[2]])
+    repo.delete_by_uids.assert_called_once_with(["gone"])
+    repo.bulk_update.assert_called_once()
+    (uid, payload), = repo.bulk_update.call_args[0][0]
+    assert uid == "moved"
+    assert payload["start_time"] == datetime(2099, 1, 2, 10, tzinfo=timezone.utc)
+
+
+def test_stream_diff_flushes_in_batches_as_merge_advances():
+    fetched = [{"uid": f"u{i}", "summary": "S"} for i in range(5)]
+    repo = _repo([])
+
+    changes = stream_diff(fetched, repo, batch_size=2)
+    next(changes)
+    next(changes)
+    # the second pending insert triggers a flush before the merge finishes
+    assert repo.insert_new_events.call_count == 1
+
+    rest = list(changes)
+    assert len(rest) == 3
+    assert repo.insert_new_events.call_count == 3
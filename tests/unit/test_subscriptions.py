@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from flight_controll.event.subscriptions import Subscription, load_subscriptions, route
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class Config:
+    RECIPIENT_EMAIL = "default@example.com"
+
+
+def test_load_subscriptions_defaults_to_recipient_email():
+    assert load_subscriptions(Config) == [Subscription("default@example.com")]
+
+
+def test_load_subscriptions_parses_json_and_rejects_garbage():
+    class WithSubs(Config):
+        RECIPIENT_SUBSCRIPTIONS = '[{"email": "a@example.com", "locations": [" ARN "], "horizon_hours": 24}]'
+
+    (sub,) = load_subscriptions(WithSubs)
+    assert sub.locations == frozenset({"arn"})
+    assert sub.horizon_hours == 24
+
+    class Broken(Config):
+        RECIPIENT_SUBSCRIPTIONS = '[{"locations": ["ARN"]}]'
+
+    with pytest.raises(ValueError):
+        load_subscriptions(Broken)
+
+
+def test_route_groups_recipients_by_selected_changes():
+    soon = (NOW + timedelta(hours=2)).isoformat()
+    later = (NOW + timedelta(days=10)).isoformat()
+    added = [
+        {"uid": "a1", "summary": "Night shift", "dtstart": soon, "location": "ARN"},
+        {"uid": "a2", "summary": "Day shift", "dtstart": later, "location": "GOT"},
+    ]
+    updated = [{"uid": "u1", "summary": "Day", "old_location": "GOT", "new_location": "ARN", "new_start": later}]
+    subscriptions = [
+        Subscription("all@example.com"),
+        Subscription("all2@example.com"),
+        Subscription("arn@example.com", locations=frozenset({"arn"})),
+        Subscription("night@example.com", summary_pattern="(?i)night"),
+        Subscription("soon@example.com", horizon_hours=24),
+        Subscription("nobody@example.com", locations=frozenset({"cph"})),
+    ]
+
+    variants = route(subscriptions, added, [], updated, now=NOW)
+
+    assert variants == {
+        ((0, 1), (), (0,)): ["all@example.com", "all2@example.com"],
+        ((0,), (), (0,)): ["arn@example.com"],
+        ((0,), (), ()): ["night@example.com", "soon@example.com"],
+    }
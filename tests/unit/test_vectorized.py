@@ -0,0 +1,110 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from flight_controll.event import vectorized
+from flight_controll.event.change_detector import description_hash
+
+np = pytest.importorskip("numpy")
+
+
+def _stored(uid, start="2099-01-01T10:00:00", desc="d", loc="L"):
+    return {
+        "uid": uid,
+        "summary": "Event",
+        "start_time": start,
+        "end_time": "2099-01-01T11:00:00",
+        "description": desc,
+        "description_hash": description_hash(desc),
+        "location": loc,
+    }
+
+
+def _fetched(uid, start="2099-01-01T10:00:00", desc="d", loc="L"):
+    return {
+        "uid": uid,
+        "summary": "Event",
+        "dtstart": start,
+        "dtend": "2099-01-01T11:00:00",
+        "description": desc,
+        "location": loc,
+    }
+
+
+def test_changed_mask_flags_time_description_and_location_changes():
+    stored = [_stored("same"), _stored("moved"), _stored("desc"), _stored("loc")]
+    events = [
+        _fetched("new"),
+        _fetched("loc", loc="Other"),
+        _fetched("same", desc="d\nDTSTAMP:20250101T120000Z"),
+        _fetched("moved", start="2099-01-02T10:00:00"),
+        _fetched("desc", desc="changed"),
+    ]
+
+    changed, codes = vectorized.changed_mask(events, stored)
+
+    assert codes.tolist() == [-1, 3, 0, 1, 2]
+    assert changed.tolist() == [False, True, False, True, True]
+
+
+def test_detect_and_apply_updates_bulk_writes_only_changed_events():
+    repo = MagicMock()
+    repo.find_docs_by_uids.return_value = [_stored("same"), _stored("moved")]
+    events = [_fetched("same"), _fetched("moved", start="2099-01-02T10:00:00")]
+
+    updates = vectorized.detect_and_apply_updates(events, {"same", "moved"}, repo)
+
+    assert [u["uid"] for u in updates] == ["moved"]
+    (uid, payload), = repo.bulk_update.call_args[0][0]
+    assert uid == "moved"
+    assert payload["start_time"] == datetime(2099, 1, 2, 10, tzinfo=timezone.utc)
+
+
+def test_legacy_documents_without_a_hash_are_backfilled_in_the_bulk_write():
+    legacy = _stored("legacy")
+    del legacy["description_hash"]
+    repo = MagicMock()
+    repo.find_docs_by_uids.return_value = [_stored("same"), legacy]
+    events = [_fetched("same"), _fetched("legacy", desc="d\nDTSTAMP:20250101T120000Z")]
+
+    updates = vectorized.detect_and_apply_updates(events, {"same", "legacy"}, repo)
+
+    assert updates == []
+    assert repo.bulk_update.call_args[0][0] == [("legacy", {"description_hash": description_hash("d")})]
+
+
+def test_detect_and_apply_updates_falls_back_without_numpy(monkeypatch):
+    repo = MagicMock()
+    repo.find_docs_by_uids.return_value = [_stored("u1", desc="old")]
+    monkeypatch.setattr(vectorized, "np", None)
+
+    updates = vectorized.detect_and_apply_updates([_fetched("u1", desc="new")], {"u1"}, repo)
+
+    assert [u["uid"] for u in updates] == ["u1"]
+    repo.update_one.assert_called_once()
+
+
+def test_changed_mask_uses_version_pair_when_feed_populates_it():
+    lm = "20250101T000000Z"
+    stored = [
+        dict(_stored("same"), sequence=1, last_modified=lm),
+        dict(_stored("bumped"), sequence=1, last_modified=lm),
+    ]
+    events = [
+        dict(_fetched("same", desc="ignored"), sequence=1, last_modified=lm),
+        dict(_fetched("bumped"), sequence=2, last_modified="20250102T000000Z"),
+    ]
+
+    changed, _ = vectorized.changed_mask(events, stored)
+
+    assert changed.tolist() == [False, True]
+
+
+def test_changed_mask_compares_fields_when_only_sequence_is_set():
+    stored = [dict(_stored("u1", desc="old"), sequence=0)]
+    events = [dict(_fetched("u1", desc="new"), sequence=0)]
+
+    changed, _ = vectorized.changed_mask(events, stored)
+
+    assert changed.tolist() == [True]
@@ -1,8 +1,8 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
-from flight_controll.webcal.fetcher import WebcalFetcher
+from flight_controll.webcal.fetcher import WebcalFetcher, parse_cache_hints
 
 MOCK_ICAL_DATA = """BEGIN:VCALENDAR
 BEGIN:VEVENT
@@ -129,3 +129,107 @@ END:VCALENDAR"""
 
     assert events[0]["dtstart"] == datetime(2026, 1, 26, 10, 15, 30)
     assert events[0]["dtend"] == datetime(2026, 1, 26, 11, 15, 30)
+
+
+@patch("flight_controll.webcal.fetcher.requests.get")
+def test_fetch_events_extracts_version_properties(mock_get):
+    ical_data = """BEGIN:VCALENDAR
+BEGIN:VEVENT
+UID:event-5@example.com
+DTSTAMP:20260101T120000Z
+LAST-MODIFIED:20251231T080000Z
+SEQUENCE:3
+DTSTART:20260126T100000
+SUMMARY:Versioned
+END:VEVENT
+BEGIN:VEVENT
+UID:event-6@example.com
+DTSTART:20260126T100000
+SUMMARY:Unversioned
+END:VEVENT
+END:VCALENDAR"""
+
+    mock_response = MagicMock()
+    mock_response.text = ical_data
+    mock_get.return_value = mock_response
+
+    events = WebcalFetcher("https://example.com/calendar.ics").fetch_events()
+
+    assert events[0]["sequence"] == 3
+    assert events[0]["last_modified"] == "20251231T080000Z"
+    assert events[0]["dtstamp"] == "20260101T120000Z"
+    assert events[1]["sequence"] is None
+    assert events[1]["last_modified"] is None
+    assert events[1]["dtstamp"] is None
+
+
+def test_parse_cache_hints_reads_max_age_and_retry_after():
+    hints = parse_cache_hints({"Cache-Control": "public, max-age=600", "Retry-After": "120"})
+    assert hints == {"max_age": 600.0, "retry_after": 120.0}
+
+    future = (datetime.now(timezone.utc) + timedelta(minutes=5)).strftime("%a, %d %b %Y %H:%M:%S GMT")
+    assert 200 < parse_cache_hints({"Retry-After": future})["retry_after"] <= 300
+    assert parse_cache_hints({}) == {"max_age": None, "retry_after": None}
+    assert parse_cache_hints(None) == {"max_age": None, "retry_after": None}
+
+
+@patch("flight_controll.webcal.fetcher.requests.get")
+def test_fetch_events_keeps_retry_after_on_http_error(mock_get):
+    mock_response = MagicMock()
+    mock_response.headers = {"Retry-After": "900"}
+    mock_response.raise_for_status.side_effect = Exception("429 Too Many Requests")
+    mock_get.return_value = mock_response
+    fetcher = WebcalFetcher("https://example.com/calendar.ics")
+
+    with pytest.raises(Exception):
+        fetcher.fetch_events()
+    assert fetcher.cache_hints["retry_after"] == 900.0
+
+
+@patch("flight_controll.webcal.fetcher.requests.get")
+def test_iter_events_parses_across_chunk_boundaries(mock_get):
+    ical = MOCK_ICAL_DATA.replace("Test Location", "Tëst Löcation").replace("\n", "\r\n")
+    body = ("X-WR-CALNAME:Crew\r\n" + ical).encode("utf-8")
+    expected_response = MagicMock(text=body.decode("utf-8"), headers={})
+    streamed_response = MagicMock(encoding="utf-8", headers={"Cache-Control": "max-age=120"})
+    # 7-byte chunks split markers, CRLFs and multi-byte characters
+    streamed_response.iter_content.return_value = [body[i:i + 7] for i in range(0, len(body), 7)]
+    mock_get.side_effect = [expected_response, streamed_response]
+    fetcher = WebcalFetcher("https://example.com/calendar.ics")
+
+    expected = fetcher.fetch_events()
+    events = list(fetcher.iter_events())
+
+    assert events == expected
+    assert [e["uid"] for e in events] == ["event-1@example.com", "event-2@example.com"]
+    assert events[0]["location"] == "Tëst Löcation"
+    assert mock_get.call_args.kwargs == {"stream": True}
+    assert fetcher.cache_hints["max_age"] == 120.0
+    streamed_response.close.assert_called_once()
+
+
+@patch("flight_controll.webcal.fetcher.requests.get")
+def test_fetch_events_if_changed_revalidates_with_etag(mock_get):
+    changed = MagicMock(status_code=200, text=MOCK_ICAL_DATA, headers={"ETag": '"v1"'})
+    not_modified = MagicMock(status_code=304, headers={})
+    mock_get.side_effect = [changed, not_modified]
+    fetcher = WebcalFetcher("https://example.com/calendar.ics")
+
+    events = fetcher.fetch_events_if_changed()
+    assert len(events) == 2
+    assert fetcher.validator == 'etag:"v1"'
+
+    assert fetcher.fetch_events_if_changed(fetcher.validator) is None
+    assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+    assert fetcher.validator == 'etag:"v1"'
+
+
+@patch("flight_controll.webcal.fetcher.requests.get")
+def test_fetch_events_if_changed_falls_back_to_content_hash(mock_get):
+    mock_get.return_value = MagicMock(status_code=200, text=MOCK_ICAL_DATA, headers={})
+    fetcher = WebcalFetcher("https://example.com/calendar.ics")
+
+    assert len(fetcher.fetch_events_if_changed()) == 2
+    assert fetcher.validator.startswith("sha256:")
+    assert fetcher.fetch_events_if_changed(fetcher.validator) is None
+    assert mock_get.call_args.kwargs["headers"] == {}
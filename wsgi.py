@@ -0,0 +1,8 @@
+"""WSGI entry point for production: ``gunicorn -c gunicorn.conf.py wsgi:app``.
+
+Serves the HTTP API only; run the scheduler separately with
+``python -m flight_controll.scheduler``.
+"""
+from flight_controll.serving import create_wsgi_app
+
+app = create_wsgi_app()